@@ -1,7 +1,11 @@
 import sys
 import os
 import json
+import re
+import sqlite3
+import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -9,12 +13,26 @@ if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
 
 from crewai import Agent, Task, Crew, LLM, Process
+from crewai.tasks.output_format import OutputFormat
+from crewai.tasks.task_output import TaskOutput
 from tools.company_intelligence_tool import CompanyIntelligenceTool
 from tools.market_research_tool import MarketResearchTool
 from tools.financial_analysis_tool import FinancialAnalysisTool
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel
+from services.company_research_service import CompanyIntelligenceService
+from typing import Callable, List, Optional, Dict, Any
+from pydantic import BaseModel, Field
+from utils.checkpoint_store import get_checkpoint_store
+from utils.instrumentation import (
+    COUNT_BUCKETS,
+    SECONDS_BUCKETS,
+    TOKEN_BUCKETS,
+    Span,
+    get_histogram_store,
+    instrument,
+    record_step
+)
 from utils.langfuse_integration import LangfuseIntegration
+from utils.llm_cache import CachedLLM
 
 
 class Outreach(BaseModel):
@@ -57,9 +75,184 @@ class ExtractedMarketTrendList(BaseModel):
     market_trends: List[ExtractedMarketTrend]
 
 
+class RunCancelled(Exception):
+    """Raised inside a research run once ResearchCrew.cancel() has been called"""
+
+
+class ResearchTask(Task):
+    """
+    Task whose asynchronous execution reports failures to the crew.
+
+    CrewAI's own async runner never resolves the future when the task raises,
+    which would leave the joining task waiting forever. ``start_callback`` is
+    called with the task when it starts, for progress reporting.
+
+    Each execution is timed as a "task" instrumentation span carrying the
+    agent's token usage and retries; ``span_callback`` receives the finished
+    span, including the tool spans nested in it.
+    """
+    start_callback: Optional[Any] = Field(default=None, description="Called with the task when it starts")
+    span_callback: Optional[Any] = Field(default=None, description="Called with the task's Span when it ends")
+
+    def _execute_core(self, agent, context, tools):
+        if self.start_callback:
+            self.start_callback(self)
+        usage_before = agent_usage(agent)
+        span = None
+        try:
+            with instrument("task", task_label(self.name), agent=agent.role) as span:
+                return super()._execute_core(agent, context, tools)
+        finally:
+            if span is not None:
+                record_task_usage(span, agent, usage_before)
+                if self.span_callback:
+                    self.span_callback(span)
+
+    def _execute_task_async(self, agent, context, tools, future) -> None:
+        try:
+            result = self._execute_core(agent, context, tools)
+        except Exception as e:
+            future.set_exception(e)
+            return
+        future.set_result(result)
+
+
+def task_label(name: Optional[str]) -> str:
+    """Task name without its map-reduce batch suffixes (e.g. ``_3_1``), to keep metric labels bounded"""
+    return re.sub(r"(_(\d+|all))+$", "", name or "")
+
+
+def agent_usage(agent: Agent) -> Dict[str, int]:
+    """Cumulative LLM usage and retry count of ``agent`` so far"""
+    usage = agent._token_process.get_summary()
+    return {
+        "prompt_tokens": usage.prompt_tokens,
+        "completion_tokens": usage.completion_tokens,
+        "llm_calls": usage.successful_requests,
+        "retries": getattr(agent, "_times_executed", 0)
+    }
+
+
+def record_task_usage(span: Span, agent: Agent, usage_before: Dict[str, int]) -> None:
+    """
+    Store the agent's usage during one task on its span and in the histogram
+    store. An agent running two tasks at once would have its usage split
+    arbitrarily between them; the pipeline never does that.
+    """
+    usage = agent_usage(agent)
+    labels = {"task": span.name, "agent": agent.role}
+    store = get_histogram_store()
+    for key in ["prompt_tokens", "completion_tokens", "llm_calls", "retries"]:
+        span.set(key, usage[key] - usage_before[key])
+    store.observe("llm_prompt_tokens", span.attributes["prompt_tokens"], labels, TOKEN_BUCKETS)
+    store.observe("llm_completion_tokens", span.attributes["completion_tokens"], labels, TOKEN_BUCKETS)
+    store.observe("task_retries", span.attributes["retries"], labels, COUNT_BUCKETS)
+    store.observe("task_tool_calls", span.attributes.get("tool_calls", 0), labels, COUNT_BUCKETS)
+    store.observe("agent_duration_seconds", span.duration_seconds, {"name": agent.role}, SECONDS_BUCKETS)
+
+
+def build_task_dependencies(tasks: List[Task]) -> Dict[str, List[Task]]:
+    """
+    Map each task (by name) to the tasks it depends on. An explicit
+    ``Task.context`` is the dependency list; a task without one depends on the
+    task before it, as in a sequential crew.
+    """
+    task_ids = {id(task) for task in tasks}
+    dependencies: Dict[str, List[Task]] = {}
+    for index, task in enumerate(tasks):
+        if task.context is not None:
+            dependencies[task.name] = [t for t in task.context if id(t) in task_ids]
+        else:
+            dependencies[task.name] = [tasks[index - 1]] if index > 0 else []
+    return dependencies
+
+
+def schedule_parallel_tasks(tasks: List[Task]) -> List[Task]:
+    """
+    Derive the task graph from ``Task.context`` and return the tasks in
+    topological order, with independent branches marked ``async_execution``.
+
+    Tasks are grouped by depth in the graph. A group of several tasks runs
+    concurrently when it sits between two single-task groups: CrewAI starts
+    async tasks back to back and the next synchronous task joins them.
+    """
+    dependencies = build_task_dependencies(tasks)
+    depth: Dict[str, int] = {}
+    for task in tasks:
+        parents = dependencies[task.name]
+        depth[task.name] = 1 + max((depth[p.name] for p in parents), default=-1)
+
+    order = sorted(range(len(tasks)), key=lambda i: (depth[tasks[i].name], i))
+    ordered = [tasks[i] for i in order]
+
+    levels: List[List[Task]] = []
+    for task in ordered:
+        if levels and depth[levels[-1][0].name] == depth[task.name]:
+            levels[-1].append(task)
+        else:
+            levels.append([task])
+
+    for index, level in enumerate(levels):
+        is_fan_out = len(level) > 1
+        has_single_parent_level = index == 0 or len(levels[index - 1]) == 1
+        has_join = index + 1 < len(levels) and len(levels[index + 1]) == 1
+        parallel = is_fan_out and has_single_parent_level and has_join and \
+            all(task.context is not None for task in level)
+        for task in level:
+            task.async_execution = parallel
+
+    return ordered
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English text)"""
+    return len(text) // 4 + 1
+
+
+def pack_company_batches(companies: List[Dict[str, Any]],
+                         token_budget: int,
+                         max_batch_size: int) -> List[List[Dict[str, Any]]]:
+    """
+    Greedily pack companies, in order, into batches whose serialized size
+    stays under ``token_budget`` tokens and ``max_batch_size`` items. A company
+    larger than the budget gets a batch of its own.
+    """
+    batches: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    current_tokens = 0
+    for company in companies:
+        tokens = estimate_tokens(json.dumps(company))
+        if current and (current_tokens + tokens > token_budget or len(current) >= max_batch_size):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(company)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def critical_path_seconds(tasks: List[Task]) -> float:
+    """Longest chain of measured task durations through the task graph"""
+    dependencies = build_task_dependencies(tasks)
+    finish: Dict[str, float] = {}
+    for task in tasks:
+        start = max((finish[p.name] for p in dependencies[task.name]), default=0.0)
+        finish[task.name] = start + (task.execution_duration or 0.0)
+    return max(finish.values(), default=0.0)
+
+
 class ResearchCrew:
-    def __init__(self, sambanova_key: str, exa_key: str, user_id: Optional[str] = None):
-        self.llm = LLM(
+    def __init__(self,
+                 sambanova_key: str,
+                 exa_key: str,
+                 user_id: Optional[str] = None,
+                 direct_tool_stage: Optional[bool] = None,
+                 execution_mode: Optional[str] = None,
+                 event_callback: Optional[Callable[[str, Dict[str, Any]], None]] = None):
+        # Identical prompts at this temperature are answered from the
+        # completion cache when LLM_CACHE_ENABLED is true
+        self.llm = CachedLLM(
             model="sambanova/Meta-Llama-3.1-70B-Instruct",
             temperature=0.01,
             max_tokens=4096,
@@ -70,6 +263,31 @@ class ResearchCrew:
         self.user_id = user_id
         self.langfuse = LangfuseIntegration()
         self.trace_id: Optional[str] = None
+        self.parallel_tasks = os.getenv("CREW_PARALLEL_TASKS", "true").lower() == "true"
+        # Direct tool stage: call the aggregator search ourselves instead of
+        # asking an LLM agent to forward the inputs to CompanyIntelligenceTool
+        if direct_tool_stage is None:
+            direct_tool_stage = os.getenv("CREW_DIRECT_TOOL_STAGE", "true").lower() == "true"
+        # "crew" runs one prompt over all companies per task; "map_reduce"
+        # splits companies into token-budgeted batches processed concurrently
+        self.execution_mode = (execution_mode or os.getenv("CREW_EXECUTION_MODE", "crew")).lower()
+        if self.execution_mode not in ("crew", "map_reduce"):
+            raise ValueError(f"Unknown execution_mode '{self.execution_mode}'. Must be 'crew' or 'map_reduce'.")
+        # Map-reduce needs the company list up front, so it always uses the direct stage
+        self.direct_tool_stage = direct_tool_stage or self.execution_mode == "map_reduce"
+        self.batch_token_budget = int(os.getenv("CREW_BATCH_TOKEN_BUDGET", "6000"))
+        self.batch_max_companies = int(os.getenv("CREW_BATCH_MAX_COMPANIES", "5"))
+        self.map_concurrency = int(os.getenv("CREW_MAP_CONCURRENCY", "4"))
+        self.task_timings: List[Dict[str, Any]] = []
+        self._direct_stage_timing: Optional[Dict[str, Any]] = None
+        # Stage checkpoints of the current run, see _start_run()
+        self.run_id: Optional[str] = None
+        self.checkpoints = get_checkpoint_store()
+        self.completed_stages: Dict[str, Any] = {}
+        # Progress events, e.g. ("stage_started", {"stage": "outreach_task"})
+        self.event_callback = event_callback
+        # Set by cancel(); the run stops before its next task or stage
+        self._cancelled = threading.Event()
         self._initialize_agents()
         self._initialize_tasks()
         
@@ -143,7 +361,8 @@ class ResearchCrew:
         """
 
         # 1) aggregator_search_task
-        self.aggregator_search_task = Task(
+        self.aggregator_search_task = ResearchTask(
+            name="aggregator_search_task",
             description=(
                 "Step 1: aggregator_agent calls CompanyIntelligenceTool.run(...) with:\n"
                 "  industry={industry}\n"
@@ -160,8 +379,14 @@ class ResearchCrew:
         )
 
         # 2) data_extraction_task
-        self.data_extraction_task = Task(
+        self.data_extraction_task = ResearchTask(
+            name="data_extraction_task",
             description=(
+                (
+                    "Aggregator search results (already retrieved):\n"
+                    "{aggregator_results}\n\n"
+                    if self.direct_tool_stage else ""
+                ) +
                 "Step 2: data_extraction_agent reads aggregator_search_task's 'companies'. "
                 "For each company's 'description' aggregator snippet, parse with LLM output to get detailed fields. "
                 "If the 'text' field is available parse information from that field as well."
@@ -182,12 +407,14 @@ class ResearchCrew:
                 "]"
             ),
             agent=self.data_extraction_agent,
-            context=[self.aggregator_search_task],
+            # In direct tool stage mode the aggregator results are injected above
+            context=[] if self.direct_tool_stage else [self.aggregator_search_task],
             output_pydantic=ExtractedCompanyList
         )
 
         # 3) data_enrichment_task
-        self.data_enrichment_task = Task(
+        self.data_enrichment_task = ResearchTask(
+            name="data_enrichment_task",
             description=(
                 "Step 3: For each partial company, if missing fields, do an extra aggregator query, parse again.  "
                 "The data should be as enriched as possible. Listing all named products and services from that company."
@@ -212,7 +439,8 @@ class ResearchCrew:
         )
 
         # 4) market_trends_task
-        self.market_trends_task = Task(
+        self.market_trends_task = ResearchTask(
+            name="market_trends_task",
             description=(
                 "Use Market Research Intelligence with:\n"
                 "  industry={industry}\n"
@@ -233,7 +461,8 @@ class ResearchCrew:
         )
 
         # 4.5) financial_analysis_task (NEW)
-        self.financial_analysis_task = Task(
+        self.financial_analysis_task = ResearchTask(
+            name="financial_analysis_task",
             description=(
                 "Use Financial Analysis Intelligence to provide comprehensive news integration "
                 "and detailed financial analysis for the financial analysis route. "
@@ -256,12 +485,13 @@ class ResearchCrew:
                 "- Detailed news articles with summaries"
             ),
             agent=self.financial_analysis_agent,
-            context=[self.data_enrichment_task],
-            output_pydantic=dict  # Using dict for flexible output structure
+            context=[self.data_enrichment_task]
+            # Raw JSON output: output_pydantic must be a BaseModel subclass, not dict
         )
 
         # 5) outreach_task
-        self.outreach_task = Task(
+        self.outreach_task = ResearchTask(
+            name="outreach_task",
             description=(
                 "Create a JSON array of personalized emails for the final companies. "
                 "company_name, website, headquarters, funding_status, email_subject, email_body. "
@@ -296,11 +526,23 @@ class ResearchCrew:
             output_pydantic=OutreachList
         )
 
+        for task in [self.aggregator_search_task, self.data_extraction_task, self.data_enrichment_task,
+                     self.market_trends_task, self.financial_analysis_task, self.outreach_task]:
+            task.start_callback = self._on_task_start
+            task.span_callback = self._log_span
+
 
-    def execute_research(self, inputs: dict) -> str:
+    def execute_research(self, inputs: dict, resume_run_id: Optional[str] = None) -> str:
         """
-        Run the 6-step pipeline with 5 agents in sequential order with Langfuse logging.
+        Run the 6-step pipeline with 5 agents with Langfuse logging. Independent
+        tasks run concurrently unless CREW_PARALLEL_TASKS is false.
+
+        Each completed stage is checkpointed under ``self.run_id``. Passing the
+        ``run_id`` of a failed run as ``resume_run_id`` reuses that run's inputs
+        and restarts from its first incomplete stage.
         """
+        inputs = self._start_run(inputs, resume_run_id)
+
         # Create Langfuse trace for this research execution
         self.trace_id = self.langfuse.create_trace(
             name="research_crew_execution",
@@ -309,7 +551,9 @@ class ResearchCrew:
                 "model": "sambanova/Meta-Llama-3.1-70B-Instruct",
                 "temperature": 0.01,
                 "max_tokens": 4096,
-                "inputs": inputs
+                "inputs": inputs,
+                "run_id": self.run_id,
+                "resumed_stages": list(self.completed_stages)
             }
         )
         
@@ -323,30 +567,75 @@ class ResearchCrew:
                 metadata={"status": "started", "timestamp": datetime.now().isoformat()}
             )
         
+        # CrewAI rejects missing or None template variables during interpolation,
+        # and the financial task prompt names {company_name}, which the
+        # extractor does not produce
+        inputs = {key: ("" if value is None else value) for key, value in inputs.items()}
+        for key in ["industry", "company_stage", "geography", "funding_stage", "product", "company_name"]:
+            inputs.setdefault(key, "")
+
+        if self.execution_mode == "map_reduce":
+            return self._execute_logged(inputs, [], lambda: self._execute_map_reduce(inputs))
+
+        tasks = [
+            self.data_extraction_task,
+            self.data_enrichment_task,
+            self.market_trends_task,
+            self.financial_analysis_task,
+            self.outreach_task
+        ]
+        agents = [
+            self.data_extraction_agent,
+            self.market_trends_agent,
+            self.financial_analysis_agent,
+            self.outreach_agent
+        ]
+        if not self.direct_tool_stage:
+            tasks.insert(0, self.aggregator_search_task)
+            agents.insert(0, self.aggregator_agent)
+
+        # Tasks finished by an earlier attempt keep their output (downstream
+        # tasks read it as context) and are left out of the crew
+        for task in tasks:
+            if task.name in self.completed_stages:
+                self._restore_task_output(task, self.completed_stages[task.name])
+        tasks = [task for task in tasks if task.name not in self.completed_stages]
+        if not tasks:
+            return self._execute_logged(inputs, [], lambda: self.outreach_task.output.pydantic.model_dump_json())
+
+        if self.parallel_tasks:
+            # market_trends_task and financial_analysis_task only depend on
+            # data_enrichment_task, so they run side by side
+            tasks = schedule_parallel_tasks(tasks)
+
         crew = Crew(
-            agents=[
-                self.aggregator_agent,
-                self.data_extraction_agent,
-                self.market_trends_agent,
-                self.financial_analysis_agent,
-                self.outreach_agent
-            ],
-            tasks=[
-                self.aggregator_search_task,
-                self.data_extraction_task,
-                self.data_enrichment_task,
-                self.market_trends_task,
-                self.financial_analysis_task,
-                self.outreach_task
-            ],
+            agents=agents,
+            tasks=tasks,
             process=Process.sequential,
             verbose=True,
-            memory=False
+            memory=False,
+            task_callback=self._checkpoint_task_output,
+            step_callback=record_step
         )
-        
-        try:
+
+        def run_crew() -> str:
+            if self.direct_tool_stage and self.data_extraction_task in tasks:
+                inputs["aggregator_results"] = self._checkpointed_stage(
+                    "aggregator_search_direct", lambda: self._run_direct_aggregator_search(inputs)
+                )
+            else:
+                inputs["aggregator_results"] = ""
             results = crew.kickoff(inputs=inputs)
-            final_output = results.pydantic.model_dump_json()
+            self._record_task_timings(tasks)
+            return results.pydantic.model_dump_json()
+
+        return self._execute_logged(inputs, tasks, run_crew)
+
+    def _execute_logged(self, inputs: dict, tasks: List[Task], run: Callable[[], str]) -> str:
+        """Run one research execution and log its completion or failure to Langfuse"""
+        try:
+            final_output = run()
+            self._set_run_status("completed")
             
             # Log successful completion
             if self.trace_id:
@@ -362,6 +651,10 @@ class ResearchCrew:
             return final_output
             
         except Exception as e:
+            self._set_run_status("failed", str(e))
+            if tasks:
+                self._record_task_timings(tasks)
+
             # Log error to Langfuse
             if self.trace_id:
                 self.langfuse.log_error(
@@ -369,6 +662,7 @@ class ResearchCrew:
                     error_message=str(e),
                     context={
                         "inputs": inputs,
+                        "run_id": self.run_id,
                         "error_type": type(e).__name__,
                         "timestamp": datetime.now().isoformat()
                     }
@@ -377,6 +671,378 @@ class ResearchCrew:
             
             # Re-raise the exception
             raise
+        finally:
+            self.langfuse.end_trace(self.trace_id)
+
+    def _start_run(self, inputs: dict, resume_run_id: Optional[str]) -> dict:
+        """Open a new checkpointed run, or reload a previous one; returns the run inputs"""
+        self.completed_stages = {}
+        self._direct_stage_timing = None
+        if resume_run_id:
+            run = self.checkpoints.get_run(resume_run_id) if self.checkpoints else None
+            if run is None:
+                raise ValueError(f"Unknown run '{resume_run_id}'. It may have expired or checkpointing is disabled.")
+            self.run_id = resume_run_id
+            self.completed_stages = self.checkpoints.get_stages(resume_run_id)
+            self._set_run_status("running")
+            return run["inputs"]
+
+        self.run_id = str(uuid.uuid4())
+        if self.checkpoints:
+            try:
+                self.checkpoints.create_run(inputs, self.run_id)
+            except sqlite3.Error as e:
+                print(f"Failed to create checkpoint run: {e}")
+        return inputs
+
+    def _set_run_status(self, status: str, error: Optional[str] = None) -> None:
+        if self.checkpoints and self.run_id:
+            try:
+                self.checkpoints.set_status(self.run_id, status, error)
+            except sqlite3.Error as e:
+                print(f"Failed to update checkpoint run status: {e}")
+
+    def _save_stage(self, stage: str, output: Any) -> None:
+        self.completed_stages[stage] = output
+        if self.checkpoints and self.run_id:
+            try:
+                self.checkpoints.save_stage(self.run_id, stage, output)
+            except sqlite3.Error as e:
+                print(f"Failed to checkpoint stage {stage}: {e}")
+        self._emit("stage_completed", {"stage": stage})
+        self._emit_stage_results(stage, output)
+
+    def _emit_stage_results(self, stage: str, output: Any) -> None:
+        """
+        Stream partial results: the company list as soon as extraction or
+        enrichment finishes, and each Outreach record once it is final.
+        ``output`` is a crew task checkpoint or a list of map-reduce records.
+        """
+        if not self.event_callback:
+            return
+        if isinstance(output, dict):
+            structured = output.get("pydantic") or {}
+            output = structured.get("companies", structured.get("outreach_list"))
+        if not isinstance(output, list):
+            return
+        if stage.startswith((self.data_extraction_task.name, self.data_enrichment_task.name)):
+            self._emit("companies", {"stage": stage, "companies": output})
+        elif stage.startswith(self.outreach_task.name):
+            for record in output:
+                self._emit("outreach", {"stage": stage, "outreach": record})
+
+    def _emit(self, event: str, data: Dict[str, Any]) -> None:
+        """Send a progress event to ``event_callback``; callback errors never fail the run"""
+        if not self.event_callback:
+            return
+        try:
+            self.event_callback(event, dict(data, run_id=self.run_id))
+        except Exception as e:
+            print(f"Research event callback failed for {event}: {e}")
+
+    def _log_span(self, span: Span, parent_id: Optional[str] = None) -> None:
+        """Log an instrumentation span and everything nested in it as Langfuse spans"""
+        if not self.trace_id:
+            return
+        self.langfuse.log_span(
+            trace_id=self.trace_id,
+            span_id=span.id,
+            parent_id=parent_id,
+            name=f"{span.kind}_{span.name}",
+            start_time=span.start_time,
+            end_time=span.end_time,
+            metadata={
+                **span.labels,
+                **span.attributes,
+                "duration_seconds": span.duration_seconds,
+                "run_id": self.run_id
+            },
+            error=span.error
+        )
+        for child in list(span.children):
+            self._log_span(child, span.id)
+
+    def cancel(self) -> None:
+        """
+        Stop the current run at its next task or stage boundary (e.g. when
+        the client that asked for it has gone away). The LLM call in flight
+        finishes; the run fails with RunCancelled and can be resumed.
+        """
+        self._cancelled.set()
+
+    def _check_cancelled(self) -> None:
+        if self._cancelled.is_set():
+            raise RunCancelled(f"Run {self.run_id} was cancelled")
+
+    def _on_task_start(self, task: Task) -> None:
+        self._check_cancelled()
+        self._emit("stage_started", {"stage": task.name})
+
+    def _checkpointed_stage(self, stage: str, compute: Callable[[], Any]) -> Any:
+        """Return the checkpointed output of ``stage``, or compute and checkpoint it"""
+        if stage in self.completed_stages:
+            return self.completed_stages[stage]
+        self._check_cancelled()
+        output = compute()
+        self._save_stage(stage, output)
+        return output
+
+    def _checkpoint_task_output(self, output: TaskOutput) -> None:
+        """Crew task callback: persist each task's output as soon as it completes"""
+        self._save_stage(output.name, {
+            "raw": output.raw,
+            "pydantic": output.pydantic.model_dump() if output.pydantic else None,
+            "json_dict": output.json_dict,
+            "agent": output.agent,
+            "output_format": output.output_format.value
+        })
+
+    def _restore_task_output(self, task: Task, saved: Dict[str, Any]) -> None:
+        pydantic_output = None
+        if saved.get("pydantic") is not None and task.output_pydantic:
+            pydantic_output = task.output_pydantic.model_validate(saved["pydantic"])
+        task.output = TaskOutput(
+            name=task.name,
+            description=task.description,
+            expected_output=task.expected_output,
+            raw=saved["raw"],
+            pydantic=pydantic_output,
+            json_dict=saved.get("json_dict"),
+            agent=saved.get("agent", ""),
+            output_format=OutputFormat(saved.get("output_format", OutputFormat.RAW.value))
+        )
+
+    def _execute_map_reduce(self, inputs: dict) -> str:
+        """
+        Map-reduce execution: the aggregator companies are packed into
+        token-budgeted batches, and extraction/enrichment and outreach run
+        once per batch with up to CREW_MAP_CONCURRENCY batches in flight.
+        Market trends and financial analysis run once over the merged
+        companies. Returns the same OutreachList JSON as the crew mode.
+        """
+        started = datetime.now()
+        map_tasks: List[Task] = []
+
+        aggregator_results = json.loads(self._checkpointed_stage(
+            "aggregator_search_direct", lambda: self._run_direct_aggregator_search(inputs)
+        ))
+        aggregator_batches = pack_company_batches(
+            aggregator_results.get("companies", []), self.batch_token_budget, self.batch_max_companies
+        )
+
+        # Map 1: extraction + enrichment per batch of aggregator companies
+        def extract_batch(index: str, batch: List[Dict[str, Any]]) -> List[ExtractedCompany]:
+            def run() -> List[Dict[str, Any]]:
+                agent = self.data_extraction_agent.copy()
+                extraction = self._clone_task(self.data_extraction_task, agent, index)
+                enrichment = self._clone_task(self.data_enrichment_task, agent, index, context=[extraction])
+                map_tasks.extend([extraction, enrichment])
+                batch_results = dict(aggregator_results, companies=batch, total_companies=len(batch))
+                result = self._kickoff_batch([agent], [extraction, enrichment], inputs, {
+                    "aggregator_results": json.dumps(batch_results, indent=2)
+                })
+                return [company.model_dump() for company in result.pydantic.companies]
+
+            saved = self._checkpointed_stage(f"{self.data_enrichment_task.name}_{index}", run)
+            return [ExtractedCompany(**company) for company in saved]
+
+        enriched = ExtractedCompanyList(companies=self._map_batches("extraction", aggregator_batches, extract_batch))
+        enriched_json = enriched.model_dump_json(indent=2)
+
+        # Company-independent analysis, run once for all companies
+        def analyze(template: Task, source_agent: Agent, to_output: Callable[[Any], Any]) -> Any:
+            def run() -> Any:
+                agent = source_agent.copy()
+                task = self._clone_task(template, agent, "all", prefix=(
+                    "Final companies from data_enrichment_task:\n{enriched_companies}\n\n"
+                ))
+                map_tasks.append(task)
+                return to_output(self._kickoff_batch([agent], [task], inputs, {"enriched_companies": enriched_json}))
+
+            return self._checkpointed_stage(f"{template.name}_all", run)
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            trends_future = pool.submit(
+                analyze, self.market_trends_task, self.market_trends_agent,
+                lambda result: [t.model_dump() for t in result.pydantic.market_trends] if result.pydantic else []
+            )
+            financial_future = pool.submit(
+                analyze, self.financial_analysis_task, self.financial_analysis_agent,
+                lambda result: result.raw
+            )
+            market_trends = [ExtractedMarketTrend(**trend) for trend in trends_future.result()]
+            financial_analysis = financial_future.result()
+
+        # Map 2: outreach per batch of enriched companies
+        def outreach_batch(index: str, batch: List[Dict[str, Any]]) -> List[Outreach]:
+            def run() -> List[Dict[str, Any]]:
+                names = {company["name"].lower() for company in batch}
+                batch_trends = [t.model_dump() for t in market_trends if t.company_name.lower() in names]
+                agent = self.outreach_agent.copy()
+                task = self._clone_task(self.outreach_task, agent, index, prefix=(
+                    "Final companies from data_enrichment_task:\n{batch_companies}\n\n"
+                    "Output of market_trends_task:\n{batch_market_trends}\n\n"
+                    "Output of financial_analysis_task:\n{financial_analysis}\n\n"
+                ))
+                map_tasks.append(task)
+                result = self._kickoff_batch([agent], [task], inputs, {
+                    "batch_companies": json.dumps(batch, indent=2),
+                    "batch_market_trends": json.dumps(batch_trends or [t.model_dump() for t in market_trends], indent=2),
+                    "financial_analysis": financial_analysis
+                })
+                return [outreach.model_dump() for outreach in result.pydantic.outreach_list]
+
+            saved = self._checkpointed_stage(f"{self.outreach_task.name}_{index}", run)
+            return [Outreach(**outreach) for outreach in saved]
+
+        outreach_batches = pack_company_batches(
+            [company.model_dump() for company in enriched.companies],
+            self.batch_token_budget,
+            self.batch_max_companies
+        )
+        outreach = OutreachList(outreach_list=self._map_batches("outreach", outreach_batches, outreach_batch))
+
+        self._record_task_timings(map_tasks, wall_seconds=(datetime.now() - started).total_seconds())
+        return outreach.model_dump_json()
+
+    def _clone_task(self,
+                    template: Task,
+                    agent: Agent,
+                    index: str,
+                    context: Optional[List[Task]] = None,
+                    prefix: str = "") -> Task:
+        """Copy of a pipeline task for one map-reduce batch, with upstream outputs inlined in the prompt"""
+        return ResearchTask(
+            name=f"{template.name}_{index}",
+            description=prefix + (template._original_description or template.description),
+            expected_output=template._original_expected_output or template.expected_output,
+            agent=agent,
+            context=context or [],
+            output_pydantic=template.output_pydantic,
+            start_callback=self._on_task_start,
+            span_callback=self._log_span
+        )
+
+    def _kickoff_batch(self, agents: List[Agent], tasks: List[Task], inputs: dict, extra_inputs: dict):
+        crew = Crew(
+            agents=agents,
+            tasks=tasks,
+            process=Process.sequential,
+            verbose=True,
+            memory=False,
+            step_callback=record_step
+        )
+        return crew.kickoff(inputs={**inputs, **extra_inputs})
+
+    def _map_batches(self,
+                     stage: str,
+                     batches: List[List[Dict[str, Any]]],
+                     run_batch: Callable[[str, List[Dict[str, Any]]], List[Any]]) -> List[Any]:
+        """
+        Run ``run_batch`` over every batch with bounded parallelism and
+        concatenate the results in batch order. A failed batch is retried one
+        company at a time so a single bad record only loses itself.
+        """
+        def run_with_fallback(batch_index: int, batch: List[Dict[str, Any]]) -> List[Any]:
+            try:
+                return run_batch(str(batch_index), batch)
+            except RunCancelled:
+                raise
+            except Exception as e:
+                print(f"Map-reduce {stage} batch {batch_index} ({len(batch)} companies) failed: {e}")
+                if len(batch) == 1:
+                    return []
+            results: List[Any] = []
+            for company_index, company in enumerate(batch):
+                try:
+                    results.extend(run_batch(f"{batch_index}_{company_index}", [company]))
+                except RunCancelled:
+                    raise
+                except Exception as e:
+                    print(f"Map-reduce {stage} failed for {company.get('name', 'unknown company')}: {e}")
+            return results
+
+        if not batches:
+            return []
+        with ThreadPoolExecutor(max_workers=max(1, min(self.map_concurrency, len(batches)))) as pool:
+            futures = [pool.submit(run_with_fallback, i, batch) for i, batch in enumerate(batches)]
+            merged = [item for future in futures for item in future.result()]
+        if not merged:
+            raise RuntimeError(f"Map-reduce {stage} stage produced no results")
+        return merged
+
+    def _run_direct_aggregator_search(self, inputs: dict) -> str:
+        """
+        Direct tool stage: run the aggregator search with the extracted inputs
+        and return the JSON that data_extraction_task receives as context.
+        """
+        self._emit("stage_started", {"stage": "aggregator_search_direct"})
+        started = datetime.now()
+        service = CompanyIntelligenceService()
+        service.api_key = self.exa_key
+        span = None
+        try:
+            with instrument("stage", "aggregator_search_direct") as span:
+                results = service.get_raw_search_results(
+                    industry=inputs.get("industry") or None,
+                    company_stage=(inputs.get("company_stage") or "").lower() or None,
+                    geography=inputs.get("geography") or None,
+                    funding_stage=inputs.get("funding_stage") or None,
+                    product=inputs.get("product") or None
+                )
+        finally:
+            if span is not None:
+                self._log_span(span)
+        ended = datetime.now()
+        self._direct_stage_timing = {
+            "task": "aggregator_search_direct",
+            "async_execution": False,
+            "start_time": started.isoformat(),
+            "end_time": ended.isoformat(),
+            "duration_seconds": (ended - started).total_seconds()
+        }
+        return json.dumps(results, indent=2)
+
+    def _record_task_timings(self, tasks: List[Task], wall_seconds: Optional[float] = None) -> None:
+        """
+        Keep per-task start/end timestamps and compare the critical path of
+        the task graph with the sum of all task durations. When the tasks ran
+        outside a single crew, ``wall_seconds`` is the measured critical path.
+        """
+        self.task_timings = [
+            {
+                "task": task.name,
+                "async_execution": bool(task.async_execution),
+                "start_time": task.start_time.isoformat() if task.start_time else None,
+                "end_time": task.end_time.isoformat() if task.end_time else None,
+                "duration_seconds": task.execution_duration
+            }
+            for task in tasks
+        ]
+        total = sum(task.execution_duration or 0.0 for task in tasks)
+        critical_path = critical_path_seconds(tasks)
+
+        # The direct tool stage runs before the crew, on the critical path
+        if self._direct_stage_timing:
+            self.task_timings.insert(0, self._direct_stage_timing)
+            direct_seconds = self._direct_stage_timing["duration_seconds"]
+            total += direct_seconds
+            critical_path += direct_seconds
+        if wall_seconds is not None:
+            critical_path = wall_seconds
+
+        if self.trace_id:
+            self.langfuse.log_task_execution(
+                trace_id=self.trace_id,
+                task_name="research_crew_task_timings",
+                input_data={"parallel_tasks": self.parallel_tasks, "execution_mode": self.execution_mode},
+                output_data=self.task_timings,
+                metadata={
+                    "sequential_seconds": total,
+                    "critical_path_seconds": critical_path,
+                    "saved_seconds": total - critical_path
+                }
+            )
 
 
 def main():
@@ -6,20 +6,29 @@ import json
 import uvicorn
 import sys
 import os
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 import time
-import asyncio
-from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator
 
 parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
 
 from services.financial_analysis_service import FinancialAnalysisService
-
-# Create a global ThreadPoolExecutor for CPU-heavy tasks
-executor = ThreadPoolExecutor(max_workers=2)
+from tools.exa_dev_tool import get_exa_cache
+from utils.async_http import AsyncHttpClientManager
+from utils.envutils import EnvUtils
+from utils.metrics import (
+    PROMETHEUS_CONTENT_TYPE,
+    MetricsMiddleware,
+    cache_gauges,
+    get_metrics_registry,
+    scheduler_gauges
+)
+from utils.news_index import get_news_index
+from utils.scheduler import AsyncAdmissionController, QueueFullError
+from utils.streaming import STREAM_HEADERS, STREAM_MEDIA_TYPES, format_stream_event
 
 class FinancialAnalysisRequest(BaseModel):
     company_name: str = None
@@ -30,7 +39,19 @@ class FinancialAnalysisRequest(BaseModel):
 class FinancialAnalysisAPI:
     def __init__(self):
         self.app = FastAPI()
+        config = EnvUtils().get_config({
+            "FINANCIAL_MAX_CONCURRENT_REQUESTS": 32,
+            "FINANCIAL_REQUEST_QUEUE_SIZE": 64,
+            "FINANCIAL_BATCH_MAX_SUBJECTS": 100
+        })
+        self.batch_max_subjects = int(config["FINANCIAL_BATCH_MAX_SUBJECTS"])
+        self.admission = AsyncAdmissionController(
+            name="financial_analysis",
+            max_concurrency=int(config["FINANCIAL_MAX_CONCURRENT_REQUESTS"]),
+            queue_size=int(config["FINANCIAL_REQUEST_QUEUE_SIZE"])
+        )
         self.setup_cors()
+        self.setup_metrics()
         self.setup_routes()
 
     def setup_cors(self):
@@ -53,7 +74,45 @@ class FinancialAnalysisAPI:
         )
         
 
+    def setup_metrics(self):
+        self.app.add_middleware(MetricsMiddleware, app_name="financial_analysis")
+        get_metrics_registry().register_collector("financial_analysis", self._collect_metrics)
+
+    def _collect_metrics(self) -> list:
+        """Gauges read at scrape time: admission queue and the Exa cache"""
+        exa_cache = get_exa_cache()
+        families = scheduler_gauges(self.admission.get_stats())
+        families.extend(cache_gauges({"exa": exa_cache.get_stats() if exa_cache else None}))
+        return families
+
+    async def _stream_analysis(self,
+                               service: FinancialAnalysisService,
+                               body: dict,
+                               stream_format: str) -> AsyncIterator[str]:
+        """Yield each analysis section as it becomes available, then a final "done" event"""
+        try:
+            async with self.admission.slot():
+                async for section, data in service.aiter_financial_analysis(
+                    company_name=body.get("company_name"),
+                    industry=body.get("industry"),
+                    product=body.get("product"),
+                    max_results=body.get("max_results", 15)
+                ):
+                    yield format_stream_event(section, data, stream_format)
+            yield format_stream_event("done", {}, stream_format)
+        except QueueFullError as e:
+            yield format_stream_event("error", {
+                "error": "Too many financial analysis requests in progress",
+                "retry_after": e.retry_after
+            }, stream_format)
+        except Exception as e:
+            yield format_stream_event("error", {"error": str(e)}, stream_format)
+
     def setup_routes(self):
+        @self.app.on_event("shutdown")
+        async def close_http_clients():
+            await AsyncHttpClientManager().aclose()
+
         @self.app.post("/financial-analysis")
         async def financial_analysis(request: Request, background_tasks: BackgroundTasks):
             # Extract API key from headers
@@ -77,19 +136,85 @@ class FinancialAnalysisAPI:
                 service = FinancialAnalysisService()
                 service.api_key = exa_key
 
-                # Offload CPU-bound analysis to a separate thread
-                loop = asyncio.get_running_loop()
-                future = executor.submit(
-                    service.get_financial_analysis,
-                    company_name=company_name,
-                    industry=industry,
-                    product=product,
-                    max_results=max_results
+                # The analysis is I/O-bound: await the Exa queries on the event
+                # loop instead of parking a worker thread per request. The
+                # admission controller bounds how many run and wait at once.
+                async with self.admission.slot():
+                    result = await service.get_financial_analysis_async(
+                        company_name=company_name,
+                        industry=industry,
+                        product=product,
+                        max_results=max_results
+                    )
+
+                return JSONResponse(content=result)
+
+            except QueueFullError as e:
+                return JSONResponse(
+                    status_code=429,
+                    content={"error": "Too many financial analysis requests in progress", "retry_after": e.retry_after},
+                    headers={"Retry-After": str(e.retry_after)}
+                )
+            except json.JSONDecodeError:
+                return JSONResponse(
+                    status_code=500,
+                    content={"error": "Invalid JSON in request body"}
                 )
-                result = await loop.run_in_executor(None, future.result)
+            except Exception as e:
+                return JSONResponse(
+                    status_code=500,
+                    content={"error": str(e)}
+                )
+
+        @self.app.post("/financial-analysis/batch")
+        async def financial_analysis_batch(request: Request):
+            """
+            Analyses for many subjects in one call. Body: {"subjects": [{"company_name",
+            "industry", "product"}, ...], "max_results"}. Queries shared between
+            subjects run once; the response reports the plan.
+            """
+            exa_key = request.headers.get("x-exa-key")
+
+            if not exa_key:
+                return JSONResponse(
+                    status_code=401,
+                    content={"error": "Missing required Exa API key"}
+                )
+
+            try:
+                body = await request.json()
+                subjects = body.get("subjects")
+                if not isinstance(subjects, list) or not subjects \
+                        or not all(isinstance(subject, dict) for subject in subjects):
+                    return JSONResponse(
+                        status_code=400,
+                        content={"error": "'subjects' must be a non-empty list of objects"}
+                    )
+                if len(subjects) > self.batch_max_subjects:
+                    return JSONResponse(
+                        status_code=400,
+                        content={"error": f"At most {self.batch_max_subjects} subjects per batch"}
+                    )
+
+                service = FinancialAnalysisService()
+                service.api_key = exa_key
+
+                # The whole batch takes one admission slot; its queries share
+                # the service's own concurrency limit
+                async with self.admission.slot():
+                    result = await service.get_financial_analysis_batch_async(
+                        subjects,
+                        max_results=body.get("max_results", 15)
+                    )
 
                 return JSONResponse(content=result)
 
+            except QueueFullError as e:
+                return JSONResponse(
+                    status_code=429,
+                    content={"error": "Too many financial analysis requests in progress", "retry_after": e.retry_after},
+                    headers={"Retry-After": str(e.retry_after)}
+                )
             except json.JSONDecodeError:
                 return JSONResponse(
                     status_code=500,
@@ -101,9 +226,61 @@ class FinancialAnalysisAPI:
                     content={"error": str(e)}
                 )
 
+        @self.app.post("/financial-analysis/stream")
+        async def financial_analysis_stream(request: Request):
+            """
+            Streaming /financial-analysis: "metadata", one "article" event per
+            deduplicated article, "duplicate_clusters", then the aggregate
+            sections. NDJSON by default; ``?format=sse`` for Server-Sent Events.
+            """
+            exa_key = request.headers.get("x-exa-key")
+            stream_format = request.query_params.get("format", "ndjson")
+
+            if not exa_key:
+                return JSONResponse(
+                    status_code=401,
+                    content={"error": "Missing required Exa API key"}
+                )
+            if stream_format not in STREAM_MEDIA_TYPES:
+                return JSONResponse(
+                    status_code=400,
+                    content={"error": f"Unsupported format '{stream_format}'. Use 'sse' or 'ndjson'."}
+                )
+            try:
+                body = await request.json()
+            except json.JSONDecodeError:
+                return JSONResponse(
+                    status_code=500,
+                    content={"error": "Invalid JSON in request body"}
+                )
+            if self.admission.is_full():
+                retry_after = self.admission.retry_after()
+                return JSONResponse(
+                    status_code=429,
+                    content={"error": "Too many financial analysis requests in progress", "retry_after": retry_after},
+                    headers={"Retry-After": str(retry_after)}
+                )
+
+            service = FinancialAnalysisService()
+            service.api_key = exa_key
+            return StreamingResponse(
+                self._stream_analysis(service, body, stream_format),
+                media_type=STREAM_MEDIA_TYPES[stream_format],
+                headers=STREAM_HEADERS
+            )
+
+        @self.app.get("/metrics")
+        async def metrics():
+            return Response(content=get_metrics_registry().render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
         @self.app.get("/health")
         async def health_check():
-            return {"status": "healthy", "service": "Financial Analysis API"}
+            return {
+                "status": "healthy",
+                "service": "Financial Analysis API",
+                "admission": self.admission.get_stats(),
+                "news_index": get_news_index().get_stats() if get_news_index() else None
+            }
 
 def create_app():
     api = FinancialAnalysisAPI()
@@ -6,12 +6,12 @@ import json
 import uvicorn
 import sys
 import os
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 import time
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
 import uuid
+from typing import AsyncIterator, Optional
 
 
 parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -19,22 +19,59 @@ if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
 
 # Services, Tools, etc.
+from services.rule_based_prompt_extractor import (
+    canonicalize_lead_fields, fast_path_stats, unexplained_prompt_words
+)
 from services.user_prompt_extractor_service import UserPromptExtractor
 from agent.lead_generation_crew import ResearchCrew
+from tools.exa_dev_tool import get_exa_cache
 from utils.langfuse_integration import LangfuseIntegration
-
-# Create a global ThreadPoolExecutor if you want concurrency in a single worker
-# for CPU-heavy tasks (Pick a reasonable max_workers based on your environment).
-executor = ThreadPoolExecutor(max_workers=2)
+from utils.async_http import AsyncHttpClientManager
+from utils.checkpoint_store import get_checkpoint_store
+from utils.envutils import EnvUtils
+from utils.job_store import JobWorkerPool, get_job_store
+from utils.lead_result_cache import get_lead_result_cache
+from utils.llm_cache import get_llm_cache
+from utils.metrics import (
+    PROMETHEUS_CONTENT_TYPE,
+    MetricsMiddleware,
+    cache_gauges,
+    get_metrics_registry,
+    scheduler_gauges
+)
+from utils.scheduler import BoundedScheduler, QueueFullError
+from utils.streaming import STREAM_HEADERS, STREAM_MEDIA_TYPES, format_stream_event
 
 class QueryRequest(BaseModel):
     prompt: str
+    resume_run_id: Optional[str] = None
 
 class LeadGenerationAPI:
     def __init__(self):
         self.app = FastAPI()
         self.langfuse = LangfuseIntegration()
+        config = EnvUtils().get_config({
+            "LEAD_SCHEDULER_WORKERS": 2,
+            "LEAD_SCHEDULER_QUEUE_SIZE": 8
+        })
+        # CrewAI is synchronous: each run holds one scheduler thread, and
+        # requests beyond the bounded queue are turned away with 429
+        self.scheduler = BoundedScheduler(
+            name="generate_leads",
+            workers=int(config["LEAD_SCHEDULER_WORKERS"]),
+            queue_size=int(config["LEAD_SCHEDULER_QUEUE_SIZE"])
+        )
+        # Job mode: submitted runs are queued in SQLite and executed by a
+        # fixed number of worker threads instead of one held-open request each
+        self.job_store = get_job_store()
+        self.lead_jobs = JobWorkerPool(
+            store=self.job_store,
+            kind="generate_leads",
+            handler=self._run_lead_job,
+            workers=int(EnvUtils().get_env("JOB_WORKERS", 2))
+        )
         self.setup_cors()
+        self.setup_metrics()
         self.setup_routes()
 
     def setup_cors(self):
@@ -54,10 +91,367 @@ class LeadGenerationAPI:
             allow_credentials=True,
             allow_methods=["*"],
             allow_headers=["*", "x-sambanova-key", "x-exa-key"],
+            expose_headers=["X-Run-Id", "X-Cache"],
         )
         
 
+    def setup_metrics(self):
+        self.app.add_middleware(MetricsMiddleware, app_name="lead_generation")
+        get_metrics_registry().register_collector("lead_generation", self._collect_metrics)
+
+    def _collect_metrics(self) -> list:
+        """Gauges read at scrape time: scheduler and job queues, caches, telemetry drops"""
+        exa_cache = get_exa_cache()
+        llm_cache = get_llm_cache()
+        lead_cache = get_lead_result_cache()
+        lead_cache_stats = lead_cache.get_stats() if lead_cache else None
+
+        families = scheduler_gauges(self.scheduler.get_stats())
+        families.append((
+            "jobs", "gauge", "Lead generation jobs by status",
+            [({"status": status}, self.job_store.count(status)) for status in ("queued", "running")]
+        ))
+        families.append(("job_workers", "gauge", "Job mode worker threads", [({}, self.lead_jobs.workers)]))
+        families.extend(cache_gauges({
+            "exa": exa_cache.get_stats() if exa_cache else None,
+            "llm": llm_cache.get_stats() if llm_cache else None,
+            "lead_results": lead_cache_stats["storage"] if lead_cache_stats else None
+        }))
+        if lead_cache_stats:
+            families.append((
+                "lead_cache_endpoint_hit_ratio", "gauge", "Lead result cache hit ratio (fresh and stale) per endpoint",
+                [({"endpoint": endpoint}, stats["hit_ratio"]) for endpoint, stats in lead_cache_stats["endpoints"].items()]
+            ))
+        families.append((
+            "prompt_fast_path_hit_ratio", "gauge", "Share of prompts extracted without an LLM call",
+            [({}, fast_path_stats.get_stats()["hit_rate"])]
+        ))
+        telemetry = self.langfuse.get_stats()
+        if telemetry:
+            families.append((
+                "telemetry_events_dropped", "gauge", "Trace events dropped because the export queue was full",
+                [({}, telemetry["dropped_newest"] + telemetry["dropped_oldest"])]
+            ))
+        return families
+
+    def _cached_leads(self,
+                      endpoint: str,
+                      prompt: str,
+                      extracted_info: dict,
+                      sambanova_key: str,
+                      exa_key: str,
+                      user_id: Optional[str]) -> tuple:
+        """
+        Look up an earlier result for the same canonical query and return
+        (cache_key, entry, is_stale). A stale entry is still returned, and a
+        refresh is queued on the scheduler if it has room.
+
+        The key also holds the prompt's words that the gazetteers and filler
+        words do not explain ("nigeria", "not"), since the LLM extraction may
+        have dropped them: "fintech in Nigeria" and "fintech" must not share
+        an entry.
+        """
+        cache = get_lead_result_cache()
+        canonical = canonicalize_lead_fields(extracted_info)
+        # Resumed runs and failed extractions have nothing to key on
+        if cache is None or not any(canonical.values()):
+            return None, None, False
+        cache_key = cache.make_key(canonical, unexplained_prompt_words(prompt))
+        found = cache.lookup(endpoint, cache_key)
+        if found is None:
+            return cache_key, None, False
+
+        entry, is_stale = found
+        if is_stale:
+            def refresh() -> Optional[dict]:
+                crew = ResearchCrew(sambanova_key=sambanova_key, exa_key=exa_key, user_id=user_id)
+                result = json.loads(crew.execute_research(dict(extracted_info)))
+                return self._lead_cache_entry(result.get("outreach_list", []), crew.run_id)
+
+            cache.revalidate(cache_key, refresh, self.scheduler.submit)
+        return cache_key, entry, is_stale
+
+    @staticmethod
+    def _lead_cache_entry(outreach_list: list, run_id: Optional[str]) -> Optional[dict]:
+        # Empty results are not worth serving again
+        return {"outreach_list": outreach_list, "run_id": run_id} if outreach_list else None
+
+    def _store_leads(self, cache_key: Optional[str], outreach_list: list, run_id: Optional[str]) -> None:
+        cache = get_lead_result_cache()
+        entry = self._lead_cache_entry(outreach_list, run_id)
+        if cache is not None and cache_key and entry:
+            cache.store(cache_key, entry)
+
+    def _run_lead_job(self, job: dict, secrets: dict, set_stage) -> dict:
+        """Job worker: the /generate-leads pipeline for one queued job"""
+        payload = job["payload"]
+        resume_run_id = payload.get("resume_run_id")
+
+        def on_event(event: str, data: dict) -> None:
+            if event == "stage_started":
+                self.job_store.set_run_id(job["job_id"], data.get("run_id"))
+                set_stage(data["stage"])
+
+        extracted_info = {}
+        if not resume_run_id:
+            set_stage("prompt_extraction")
+            extractor = UserPromptExtractor(secrets["sambanova_key"])
+            extracted_info = extractor.extract_lead_info(payload["prompt"])
+
+        cache_key, cached, _ = self._cached_leads(
+            "generate_leads_jobs", payload["prompt"], extracted_info,
+            secrets["sambanova_key"], secrets["exa_key"], payload.get("user_id")
+        )
+        if cached is not None:
+            self.job_store.set_run_id(job["job_id"], cached["run_id"])
+            return {"outreach_list": cached["outreach_list"]}
+
+        crew = ResearchCrew(
+            sambanova_key=secrets["sambanova_key"],
+            exa_key=secrets["exa_key"],
+            user_id=payload.get("user_id"),
+            event_callback=on_event
+        )
+        try:
+            result = crew.execute_research(extracted_info, resume_run_id)
+        finally:
+            self.job_store.set_run_id(job["job_id"], crew.run_id)
+        outreach_list = json.loads(result).get("outreach_list", [])
+        self._store_leads(cache_key, outreach_list, crew.run_id)
+        return {"outreach_list": outreach_list}
+
+    async def _stream_leads(self,
+                            prompt: str,
+                            resume_run_id: Optional[str],
+                            sambanova_key: str,
+                            exa_key: str,
+                            user_id: str,
+                            stream_format: str) -> AsyncIterator[str]:
+        """
+        Run the /generate-leads pipeline and yield its progress: stage events,
+        the companies once extracted, each Outreach record as it is finalized
+        and finally a "result" event whose data is the usual outreach list.
+        """
+        loop = asyncio.get_running_loop()
+        events: asyncio.Queue = asyncio.Queue()
+
+        def on_event(event: str, data: dict) -> None:
+            # Called from the crew's worker threads
+            loop.call_soon_threadsafe(events.put_nowait, (event, data))
+
+        crew = None
+        run = None
+        try:
+            extracted_info = {}
+            cache_key = None
+            if not resume_run_id:
+                yield format_stream_event("stage_started", {"stage": "prompt_extraction"}, stream_format)
+                extractor = UserPromptExtractor(sambanova_key)
+                extracted_info = await extractor.extract_lead_info_async(prompt)
+                yield format_stream_event(
+                    "stage_completed", {"stage": "prompt_extraction", "extracted_info": extracted_info}, stream_format
+                )
+                cache_key, cached, is_stale = self._cached_leads(
+                    "generate_leads_stream", prompt, extracted_info, sambanova_key, exa_key, user_id
+                )
+                if cached is not None:
+                    yield format_stream_event(
+                        "cache_hit", {"run_id": cached["run_id"], "stale": is_stale}, stream_format
+                    )
+                    yield format_stream_event("result", cached["outreach_list"], stream_format)
+                    return
+
+            crew = ResearchCrew(sambanova_key=sambanova_key, exa_key=exa_key, user_id=user_id, event_callback=on_event)
+            run = asyncio.ensure_future(self.scheduler.run(crew.execute_research, extracted_info, resume_run_id))
+            while True:
+                next_event = asyncio.ensure_future(events.get())
+                done, _ = await asyncio.wait({next_event, run}, return_when=asyncio.FIRST_COMPLETED)
+                if next_event not in done:
+                    next_event.cancel()
+                    break
+                event, data = next_event.result()
+                yield format_stream_event(event, data, stream_format)
+            # Events posted before the run finished are already queued
+            while not events.empty():
+                event, data = events.get_nowait()
+                yield format_stream_event(event, data, stream_format)
+
+            outreach_list = json.loads(run.result()).get("outreach_list", [])
+            self._store_leads(cache_key, outreach_list, crew.run_id)
+            yield format_stream_event("result", outreach_list, stream_format)
+
+        except (asyncio.CancelledError, GeneratorExit):
+            # The client disconnected: drop the run if it is still queued,
+            # otherwise stop the crew before its next task
+            if run is not None:
+                run.cancel()
+            if crew is not None:
+                crew.cancel()
+            raise
+        except QueueFullError as e:
+            yield format_stream_event("error", {
+                "error": "Too many lead generation requests in progress",
+                "retry_after": e.retry_after
+            }, stream_format)
+        except Exception as e:
+            yield format_stream_event("error", {
+                "error": str(e),
+                "run_id": crew.run_id if crew else None
+            }, stream_format)
+
     def setup_routes(self):
+        @self.app.on_event("startup")
+        async def start_job_workers():
+            self.lead_jobs.start()
+
+        @self.app.on_event("shutdown")
+        async def close_http_clients():
+            self.lead_jobs.stop(timeout=1)
+            self.scheduler.shutdown()
+            # Send queued trace events before the process exits
+            self.langfuse.shutdown()
+            await AsyncHttpClientManager().aclose()
+
+        @self.app.post("/generate-leads/stream")
+        async def generate_leads_stream(request: Request):
+            """
+            Streaming /generate-leads. ``?format=sse`` (default) sends
+            Server-Sent Events, ``?format=ndjson`` one JSON object per line.
+            """
+            sambanova_key = request.headers.get("x-sambanova-key")
+            exa_key = request.headers.get("x-exa-key")
+            user_id = request.headers.get("x-user-id", str(uuid.uuid4()))
+            stream_format = request.query_params.get("format", "sse")
+
+            if not sambanova_key or not exa_key:
+                return JSONResponse(
+                    status_code=401,
+                    content={"error": "Missing required API keys"}
+                )
+            if stream_format not in STREAM_MEDIA_TYPES:
+                return JSONResponse(
+                    status_code=400,
+                    content={"error": f"Unsupported format '{stream_format}'. Use 'sse' or 'ndjson'."}
+                )
+
+            try:
+                body = await request.json()
+            except json.JSONDecodeError:
+                return JSONResponse(
+                    status_code=400,
+                    content={"error": "Invalid JSON in request body"}
+                )
+            prompt = body.get("prompt", "")
+            resume_run_id = body.get("resume_run_id")
+
+            if not prompt and not resume_run_id:
+                return JSONResponse(
+                    status_code=400,
+                    content={"error": "Missing prompt in request body"}
+                )
+            if self.scheduler.is_full():
+                retry_after = self.scheduler.retry_after()
+                return JSONResponse(
+                    status_code=429,
+                    content={"error": "Too many lead generation requests in progress", "retry_after": retry_after},
+                    headers={"Retry-After": str(retry_after)}
+                )
+
+            return StreamingResponse(
+                self._stream_leads(prompt, resume_run_id, sambanova_key, exa_key, user_id, stream_format),
+                media_type=STREAM_MEDIA_TYPES[stream_format],
+                headers=STREAM_HEADERS
+            )
+
+        @self.app.post("/generate-leads/jobs")
+        async def submit_generate_leads_job(request: Request):
+            """Queue a lead generation run and return its job id immediately"""
+            sambanova_key = request.headers.get("x-sambanova-key")
+            exa_key = request.headers.get("x-exa-key")
+            user_id = request.headers.get("x-user-id", str(uuid.uuid4()))
+
+            if not sambanova_key or not exa_key:
+                return JSONResponse(
+                    status_code=401,
+                    content={"error": "Missing required API keys"}
+                )
+
+            try:
+                body = await request.json()
+            except json.JSONDecodeError:
+                return JSONResponse(
+                    status_code=400,
+                    content={"error": "Invalid JSON in request body"}
+                )
+            prompt = body.get("prompt", "")
+            resume_run_id = body.get("resume_run_id")
+
+            if not prompt and not resume_run_id:
+                return JSONResponse(
+                    status_code=400,
+                    content={"error": "Missing prompt in request body"}
+                )
+            if resume_run_id:
+                store = get_checkpoint_store()
+                if store is None or store.get_run(resume_run_id) is None:
+                    return JSONResponse(
+                        status_code=404,
+                        content={"error": f"Unknown run_id '{resume_run_id}'"}
+                    )
+
+            job_id = self.lead_jobs.submit(
+                payload={"prompt": prompt, "resume_run_id": resume_run_id, "user_id": user_id},
+                secrets={"sambanova_key": sambanova_key, "exa_key": exa_key}
+            )
+            return JSONResponse(
+                status_code=202,
+                content={"job_id": job_id, "status": "queued", "status_url": f"/jobs/{job_id}"}
+            )
+
+        @self.app.get("/jobs/{job_id}")
+        async def get_job(job_id: str):
+            job = self.job_store.get(job_id)
+            if job is None:
+                return JSONResponse(
+                    status_code=404,
+                    content={"error": f"Unknown or expired job '{job_id}'"}
+                )
+            content = {
+                "job_id": job["job_id"],
+                "status": job["status"],
+                "stage": job["stage"],
+                "run_id": job["run_id"],
+                "created_at": job["created_at"],
+                "started_at": job["started_at"],
+                "finished_at": job["finished_at"]
+            }
+            if job["status"] == "completed":
+                content["outreach_list"] = job["result"]["outreach_list"]
+            if job["status"] == "failed":
+                content["error"] = job["error"]
+            return JSONResponse(content=content)
+
+        @self.app.get("/metrics")
+        async def metrics():
+            return Response(content=get_metrics_registry().render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+        @self.app.get("/health")
+        async def health_check():
+            lead_cache = get_lead_result_cache()
+            return {
+                "status": "healthy",
+                "service": "Lead Generation API",
+                "scheduler": self.scheduler.get_stats(),
+                "jobs": {
+                    "workers": self.lead_jobs.workers,
+                    "queued": self.job_store.count("queued"),
+                    "running": self.job_store.count("running")
+                },
+                "prompt_fast_path": fast_path_stats.get_stats(),
+                "result_cache": lead_cache.get_stats() if lead_cache else None,
+                "telemetry": self.langfuse.get_stats()
+            }
+
         @self.app.post("/generate-leads")
         async def generate_leads(request: Request, background_tasks: BackgroundTasks):
             # Extract API keys from headers
@@ -82,12 +476,27 @@ class LeadGenerationAPI:
                 }
             )
 
+            crew = None
             try:
                 # Get request body
                 body = await request.json()
                 prompt = body.get("prompt", "")
+                # run_id of a failed run; completed stages are not re-run
+                resume_run_id = body.get("resume_run_id")
+
+                if resume_run_id:
+                    store = get_checkpoint_store()
+                    if store is None or store.get_run(resume_run_id) is None:
+                        return JSONResponse(
+                            status_code=404,
+                            content={"error": f"Unknown run_id '{resume_run_id}'"}
+                        )
 
-                if not prompt:
+                # Reject before spending tokens on prompt extraction
+                if self.scheduler.is_full():
+                    raise QueueFullError(self.scheduler.name, self.scheduler.retry_after())
+
+                if not prompt and not resume_run_id:
                     # Log error to Langfuse
                     if trace_id:
                         self.langfuse.log_error(
@@ -112,24 +521,44 @@ class LeadGenerationAPI:
                         metadata={"status": "started"}
                     )
 
-                # Initialize services with API keys
-                extractor = UserPromptExtractor(sambanova_key)
-                extracted_info = extractor.extract_lead_info(prompt)
+                # Initialize services with API keys. A resumed run reuses the
+                # inputs extracted by its first attempt
+                extracted_info = {}
+                if not resume_run_id:
+                    extractor = UserPromptExtractor(sambanova_key)
+                    extracted_info = await extractor.extract_lead_info_async(prompt)
+
+                # Differently worded prompts that extract to the same query
+                # are answered from the result cache
+                cache_key, cached, is_stale = self._cached_leads(
+                    "generate_leads", prompt, extracted_info, sambanova_key, exa_key, user_id
+                )
+                if cached is not None:
+                    if trace_id:
+                        self.langfuse.log_task_execution(
+                            trace_id=trace_id,
+                            task_name="api_request_complete",
+                            input_data={"prompt": prompt},
+                            output_data={"results_count": len(cached["outreach_list"])},
+                            metadata={"status": "completed", "cache": "stale" if is_stale else "hit"}
+                        )
+                        self.langfuse.flush()
+                    return JSONResponse(
+                        content=cached["outreach_list"],
+                        headers={"X-Run-Id": cached["run_id"] or "", "X-Cache": "STALE" if is_stale else "HIT"}
+                    )
 
                 # Initialize crew with API keys and user ID for Langfuse tracking
                 crew = ResearchCrew(sambanova_key=sambanova_key, exa_key=exa_key, user_id=user_id)
 
-                # Offload CPU-bound or time-consuming "execute_research" call 
-                # to a separate thread so it doesn't block the async event loop.
-                loop = asyncio.get_running_loop()
-                future = executor.submit(crew.execute_research, extracted_info)
-                result = await loop.run_in_executor(None, future.result)
-                # Alternatively:
-                # result = await loop.run_in_executor(executor, crew.execute_research, extracted_info)
+                # CrewAI is synchronous, so "execute_research" runs on a
+                # scheduler thread so it doesn't block the async event loop.
+                result = await self.scheduler.run(crew.execute_research, extracted_info, resume_run_id)
 
                 # Parse result and return
                 parsed_result = json.loads(result)
                 outreach_list = parsed_result.get("outreach_list", [])
+                self._store_leads(cache_key, outreach_list, crew.run_id)
 
                 # Log successful API completion
                 if trace_id:
@@ -142,8 +571,22 @@ class LeadGenerationAPI:
                     )
                     self.langfuse.flush()
 
-                return JSONResponse(content=outreach_list)
+                return JSONResponse(content=outreach_list, headers={"X-Run-Id": crew.run_id or "", "X-Cache": "MISS"})
 
+            except QueueFullError as e:
+                if trace_id:
+                    self.langfuse.log_error(
+                        trace_id=trace_id,
+                        error_message=str(e),
+                        context={"status_code": 429, "retry_after": e.retry_after}
+                    )
+                    self.langfuse.flush()
+
+                return JSONResponse(
+                    status_code=429,
+                    content={"error": "Too many lead generation requests in progress", "retry_after": e.retry_after},
+                    headers={"Retry-After": str(e.retry_after)}
+                )
             except json.JSONDecodeError as e:
                 # Log JSON error to Langfuse
                 if trace_id:
@@ -156,7 +599,10 @@ class LeadGenerationAPI:
                 
                 return JSONResponse(
                     status_code=500,
-                    content={"error": "Invalid JSON response from research crew"}
+                    content={
+                        "error": "Invalid JSON response from research crew",
+                        "run_id": crew.run_id if crew else None
+                    }
                 )
             except Exception as e:
                 # Log general error to Langfuse
@@ -172,10 +618,14 @@ class LeadGenerationAPI:
                     )
                     self.langfuse.flush()
                 
+                # The run_id lets the client retry with resume_run_id
                 return JSONResponse(
                     status_code=500,
-                    content={"error": str(e)}
+                    content={"error": str(e), "run_id": crew.run_id if crew else None}
                 )
+            finally:
+                # Errors logged above make the sampler keep this trace
+                self.langfuse.end_trace(trace_id)
 
 def create_app():
     api = LeadGenerationAPI()
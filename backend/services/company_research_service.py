@@ -45,6 +45,26 @@ class CompanyIntelligenceService:
         )
         return json.dumps(exa_results, indent=2)
 
+    async def get_company_intelligence_async(
+        self,
+        industry=None,
+        company_name=None,
+        product=None,
+        company_stage=None,
+        geography=None,
+        funding_stage=None
+    ) -> str:
+        """Async variant of get_company_intelligence()"""
+        exa_results = await self.get_raw_search_results_async(
+            industry=industry,
+            company_name=company_name,
+            product=product,
+            company_stage=company_stage,
+            geography=geography,
+            funding_stage=funding_stage
+        )
+        return json.dumps(exa_results, indent=2)
+
     def get_raw_search_results(
         self,
         industry=None,
@@ -55,16 +75,49 @@ class CompanyIntelligenceService:
         funding_stage=None
     ) -> dict:
         query = self._build_search_query(industry, company_name, product, company_stage, geography, funding_stage)
-        exa_results = self.search_tool.run(
-            search_query=query,
-            search_type="auto",
-            category="company",
-            num_results=20,
-            text=True,
-            summary=True,
-            livecrawl="always",
-            api_key=self.api_key
+        exa_results = self.search_tool.run(**self._search_params(query))
+        return self._format_search_results(
+            exa_results, industry, company_name, product, company_stage, geography, funding_stage
         )
+
+    async def get_raw_search_results_async(
+        self,
+        industry=None,
+        company_name=None,
+        product=None,
+        company_stage=None,
+        geography=None,
+        funding_stage=None
+    ) -> dict:
+        """Async variant of get_raw_search_results()"""
+        query = self._build_search_query(industry, company_name, product, company_stage, geography, funding_stage)
+        exa_results = await self.search_tool.arun(**self._search_params(query))
+        return self._format_search_results(
+            exa_results, industry, company_name, product, company_stage, geography, funding_stage
+        )
+
+    def _search_params(self, query: str) -> dict:
+        return {
+            "search_query": query,
+            "search_type": "auto",
+            "category": "company",
+            "num_results": 20,
+            "text": True,
+            "summary": True,
+            "livecrawl": "always",
+            "api_key": self.api_key
+        }
+
+    def _format_search_results(
+        self,
+        exa_results,
+        industry,
+        company_name,
+        product,
+        company_stage,
+        geography,
+        funding_stage
+    ) -> dict:
         if not isinstance(exa_results, dict) or "results" not in exa_results:
             return {
                 "companies": [],
@@ -3,14 +3,104 @@
 import os
 import json
 import sys
+import time
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
 
 parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
 
+from utils.envutils import EnvUtils
 from tools.exa_dev_tool import ExaDevTool
+from utils.keyword_scanner import KeywordScanner
+from utils.near_duplicate import NearDuplicateIndex
+from utils.news_index import NewsIndex, get_news_index, subject_key
+from services.news_sentiment import NewsSentimentScorer, load_sentiment_lexicon
+
+# Sections of a financial analysis, in the order they are streamed
+ANALYSIS_SECTIONS = [
+    "metadata",
+    "article",
+    "duplicate_clusters",
+    "key_insights",
+    "market_outlook",
+    "investment_recommendations",
+    "risk_assessment",
+    "opportunities"
+]
+
+# Keyword lexicons of the aggregate sections ({keyword: label}); NEWS_LEXICONS_PATH
+# may point to a JSON file replacing any of them by name
+NEWS_LEXICONS = {
+    "insights": {
+        "earnings": "Strong earnings performance reported",
+        "growth": "Significant growth opportunities identified",
+        "acquisition": "Merger and acquisition activity noted",
+        "innovation": "Innovation and R&D developments",
+        "regulation": "Regulatory changes affecting the market",
+        "competition": "Competitive landscape developments"
+    },
+    "risks": {
+        "volatility": "Market volatility",
+        "regulation": "Regulatory changes",
+        "competition": "Increased competition",
+        "economic": "Economic uncertainty",
+        "supply chain": "Supply chain disruptions"
+    },
+    "opportunities": {keyword: keyword for keyword in ["growth", "innovation", "expansion", "partnership", "investment"]}
+}
+
+# One Exa news search: (query, max_results, published_since)
+NewsSearch = Tuple[str, int, Optional[str]]
+
+_news_scanner: Optional[KeywordScanner] = None
+_news_scanner_lock = threading.Lock()
+
+
+def get_news_scanner() -> KeywordScanner:
+    """Scanner over NEWS_LEXICONS plus the overrides in NEWS_LEXICONS_PATH, compiled once"""
+    global _news_scanner
+    if _news_scanner is None:
+        with _news_scanner_lock:
+            if _news_scanner is None:
+                lexicons = dict(NEWS_LEXICONS)
+                path = EnvUtils().get_env("NEWS_LEXICONS_PATH")
+                if path:
+                    try:
+                        with open(path) as f:
+                            lexicons.update(json.load(f))
+                    except (OSError, ValueError) as e:
+                        print(f"Could not load news lexicons from {path}: {e}")
+                _news_scanner = KeywordScanner(lexicons)
+    return _news_scanner
+
+
+_sentiment_scorer: Optional[NewsSentimentScorer] = None
+_sentiment_scorer_lock = threading.Lock()
+
+
+def get_sentiment_scorer() -> NewsSentimentScorer:
+    """Market outlook scorer over SENTIMENT_LEXICON plus NEWS_SENTIMENT_LEXICON_PATH, built once"""
+    global _sentiment_scorer
+    if _sentiment_scorer is None:
+        with _sentiment_scorer_lock:
+            if _sentiment_scorer is None:
+                config = EnvUtils().get_config({
+                    "NEWS_SENTIMENT_LEXICON_PATH": "",
+                    "NEWS_SENTIMENT_HALF_LIFE_DAYS": 14
+                })
+                _sentiment_scorer = NewsSentimentScorer(
+                    lexicon=load_sentiment_lexicon(config["NEWS_SENTIMENT_LEXICON_PATH"]),
+                    half_life_days=float(config["NEWS_SENTIMENT_HALF_LIFE_DAYS"])
+                )
+    return _sentiment_scorer
+
 
 class FinancialAnalysisService:
     """
@@ -18,9 +108,26 @@ class FinancialAnalysisService:
     for financial analysis routes.
     """
     
-    def __init__(self):
+    def __init__(self, max_concurrency: Optional[int] = None, query_timeout: Optional[float] = None):
         self.search_tool = ExaDevTool()
         self.news_categories = ["business", "finance", "technology", "markets"]
+
+        config = EnvUtils().get_config({
+            "FINANCIAL_QUERY_CONCURRENCY": 6,
+            "FINANCIAL_QUERY_TIMEOUT": 30,
+            "NEWS_INDEX_FULL_REFRESH_SECONDS": 7 * 24 * 3600,
+            "NEWS_INDEX_DELTA_RESULTS": 10,
+            "NEWS_DEDUP_THRESHOLD": 0.7,
+            "NEWS_DEDUP_PREFERRED_SOURCES": "reuters.com,bloomberg.com,wsj.com,ft.com,cnbc.com"
+        })
+        self.max_concurrency = max(1, int(max_concurrency or config["FINANCIAL_QUERY_CONCURRENCY"]))
+        self.query_timeout = float(query_timeout or config["FINANCIAL_QUERY_TIMEOUT"])
+        self.full_refresh_seconds = float(config["NEWS_INDEX_FULL_REFRESH_SECONDS"])
+        self.delta_results = int(config["NEWS_INDEX_DELTA_RESULTS"])
+        self.dedup_threshold = float(config["NEWS_DEDUP_THRESHOLD"])
+        self.preferred_sources = [
+            source.strip().lower() for source in str(config["NEWS_DEDUP_PREFERRED_SOURCES"]).split(",") if source.strip()
+        ]
     
     def get_financial_analysis(self, 
                              company_name: str = None,
@@ -39,26 +146,340 @@ class FinancialAnalysisService:
         Returns:
             Dict containing financial analysis with detailed news
         """
-        
-        # Build search queries for different aspects
-        queries = self._build_financial_queries(company_name, industry, product)
-        
-        # Get news articles for each query
-        all_news = []
-        for query in queries:
-            news_results = self._get_financial_news(query, max_results=5)
-            all_news.extend(news_results)
-        
-        # Remove duplicates and limit results
-        all_news = self._deduplicate_news(all_news)[:max_results]
-        
-        # Generate comprehensive analysis
-        analysis = self._generate_financial_analysis(
-            company_name, industry, product, all_news
+        return self.collect_financial_analysis(
+            self.iter_financial_analysis(company_name, industry, product, max_results)
         )
-        
+
+    async def get_financial_analysis_async(self,
+                                           company_name: str = None,
+                                           industry: str = None,
+                                           product: str = None,
+                                           max_results: int = 15) -> Dict:
+        """
+        Async variant of get_financial_analysis(). The Exa queries are awaited
+        on the event loop instead of occupying worker threads.
+        """
+        sections = []
+        async for section in self.aiter_financial_analysis(company_name, industry, product, max_results):
+            sections.append(section)
+        return self.collect_financial_analysis(sections)
+
+    def get_financial_analysis_batch(self, subjects: List[Dict], max_results: int = 15) -> Dict:
+        """
+        Financial analyses for several subjects at once.
+
+        Args:
+            subjects: Dicts with any of company_name, industry and product
+            max_results: Maximum number of news articles per analysis
+
+        Returns:
+            Dict with one analysis per subject, in order, and the query plan.
+            Queries shared between subjects (e.g. the industry queries of
+            companies in one industry) run only once.
+        """
+        searches, plans = self._plan_batch(subjects)
+        results = dict(self._iter_search_results(searches))
+        analyses = [self._assemble_subject(plan, results, max_results) for plan in plans]
+        return self._batch_result(searches, plans, results, analyses)
+
+    async def get_financial_analysis_batch_async(self, subjects: List[Dict], max_results: int = 15) -> Dict:
+        """
+        Async variant of get_financial_analysis_batch(). Only the Exa fan-out
+        runs on the event loop; the news index lookups and each subject's
+        deduplication and scoring run in a worker thread, one subject at a
+        time, so a large batch does not stall other requests.
+        """
+        searches, plans = await asyncio.to_thread(self._plan_batch, subjects)
+        results = {}
+        async for index, news in self._aiter_search_results(searches):
+            results[index] = news
+        analyses = []
+        for plan in plans:
+            analyses.append(await asyncio.to_thread(self._assemble_subject, plan, results, max_results))
+        return self._batch_result(searches, plans, results, analyses)
+
+    def _plan_batch(self, subjects: List[Dict]) -> Tuple[List[NewsSearch], List[Dict]]:
+        """
+        The union of every subject's searches with duplicates removed, and per
+        subject the positions of its searches in that union (a single delta
+        search for subjects already in the news index).
+        """
+        searches: List[NewsSearch] = []
+        positions: Dict[NewsSearch, int] = {}
+        plans = []
+        for subject in subjects:
+            company_name, industry, product = (subject.get(key) for key in ("company_name", "industry", "product"))
+            store, key, watermark = self._news_watermark(company_name, industry, product)
+            if watermark is not None:
+                subject_searches = [(self._delta_query(company_name, industry, product), self.delta_results, watermark)]
+            else:
+                subject_searches = [
+                    (query, 5, None) for query in self._build_financial_queries(company_name, industry, product)
+                ]
+            ids = []
+            for search in subject_searches:
+                if search not in positions:
+                    positions[search] = len(searches)
+                    searches.append(search)
+                ids.append(positions[search])
+            plans.append({
+                "company_name": company_name,
+                "industry": industry,
+                "product": product,
+                "store": store,
+                "subject": key,
+                "watermark": watermark,
+                "searches": ids
+            })
+        return searches, plans
+
+    def _assemble_subject(self, plan: Dict, results: Dict[int, Optional[List[Dict]]], max_results: int) -> Dict:
+        """Build one subject's analysis from the shared search results"""
+        news = [results.get(i) for i in plan["searches"]]
+        store = plan["store"]
+        if store is not None:
+            fetched = [item for batch in news if batch for item in batch]
+            if plan["watermark"] is None:
+                self._index_full_refresh(store, plan["subject"], fetched, None not in news)
+            else:
+                if news[0] is not None:
+                    store.merge(plan["subject"], fetched)
+                news = [store.articles(plan["subject"], limit=max_results * 3)]
+        # Subjects sharing a search get their own copies of its articles
+        batches = [self._dated(batch) for batch in news if batch]
+        return self.collect_financial_analysis(self._iter_sections_from_batches(
+            plan["company_name"], plan["industry"], plan["product"], batches, max_results
+        ))
+
+    @staticmethod
+    def _batch_result(searches: List[NewsSearch],
+                      plans: List[Dict],
+                      results: Dict[int, Optional[List[Dict]]],
+                      analyses: List[Dict]) -> Dict:
+        return {
+            "analyses": analyses,
+            "plan": {
+                "subjects": len(plans),
+                "queries_requested": sum(len(plan["searches"]) for plan in plans),
+                "queries_run": len(searches),
+                # Errors and timeouts both come back as None
+                "queries_failed": sum(1 for i in range(len(searches)) if results.get(i) is None)
+            }
+        }
+
+    def _iter_sections_from_batches(self,
+                                    company_name: str,
+                                    industry: str,
+                                    product: str,
+                                    batches: List[List[Dict]],
+                                    max_results: int) -> Iterator[Tuple[str, Any]]:
+        """The sections of iter_financial_analysis() for news that is already fetched"""
+        yield "metadata", self._analysis_metadata(company_name, industry, product)
+        news_items: List[Dict] = []
+        index = self._dedup_index()
+        for batch in batches:
+            for item in self._new_unique_news(batch, index, max_results - len(news_items)):
+                news_items.append(item)
+                yield "article", item
+            if len(news_items) >= max_results:
+                break
+        yield "duplicate_clusters", self._duplicate_clusters(index)
+        yield from self._iter_analysis_sections(company_name, industry, product, self._kept_news(index))
+
+    def iter_financial_analysis(self,
+                                company_name: str = None,
+                                industry: str = None,
+                                product: str = None,
+                                max_results: int = 15) -> Iterator[Tuple[str, Any]]:
+        """
+        Yield the analysis as (section, data) pairs: "metadata" first, then
+        one "article" per deduplicated news item as soon as its query (and
+        every earlier query) has returned, then the aggregate sections once
+        all articles are in. See ANALYSIS_SECTIONS.
+        """
+        yield "metadata", self._analysis_metadata(company_name, industry, product)
+
+        store, subject, watermark = self._news_watermark(company_name, industry, product)
+        if watermark is not None:
+            # Tracked subject: one query for what was published since the last analysis
+            query = self._delta_query(company_name, industry, product)
+            batches = self._iter_delta_news(store, subject, query, watermark, max_results)
+        else:
+            # Build search queries for different aspects
+            queries = self._build_financial_queries(company_name, industry, product)
+            batches = self._iter_news_for_queries(queries, max_results=5)
+
+        refreshing = store is not None and watermark is None
+        news_items: List[Dict] = []
+        fetched: List[Dict] = []
+        completed = failed = 0
+        index = self._dedup_index()
+        try:
+            for batch in batches:
+                if batch is None:
+                    failed += 1
+                    batch = []
+                completed += 1
+                fetched.extend(batch)
+                batch = self._dated(batch)
+                if len(news_items) < max_results:
+                    for item in self._new_unique_news(batch, index, max_results - len(news_items)):
+                        news_items.append(item)
+                        yield "article", item
+                # A full refresh drains every query so the index gets all their articles
+                if len(news_items) >= max_results and (failed or not refreshing):
+                    break
+        finally:
+            # Stop the remaining queries once enough articles are in
+            batches.close()
+            if refreshing:
+                self._index_full_refresh(store, subject, fetched, completed == len(queries) and not failed)
+
+        yield "duplicate_clusters", self._duplicate_clusters(index)
+        yield from self._iter_analysis_sections(company_name, industry, product, self._kept_news(index))
+
+    async def aiter_financial_analysis(self,
+                                       company_name: str = None,
+                                       industry: str = None,
+                                       product: str = None,
+                                       max_results: int = 15) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Async variant of iter_financial_analysis(). The news index is SQLite
+        behind a lock, so its reads and writes run in worker threads.
+        """
+        yield "metadata", self._analysis_metadata(company_name, industry, product)
+
+        store, subject, watermark = await asyncio.to_thread(self._news_watermark, company_name, industry, product)
+        if watermark is not None:
+            query = self._delta_query(company_name, industry, product)
+            batches = self._aiter_delta_news(store, subject, query, watermark, max_results)
+        else:
+            queries = self._build_financial_queries(company_name, industry, product)
+            batches = self._aiter_news_for_queries(queries, max_results=5)
+
+        refreshing = store is not None and watermark is None
+        news_items: List[Dict] = []
+        fetched: List[Dict] = []
+        completed = failed = 0
+        index = self._dedup_index()
+        try:
+            async for batch in batches:
+                if batch is None:
+                    failed += 1
+                    batch = []
+                completed += 1
+                fetched.extend(batch)
+                batch = self._dated(batch)
+                if len(news_items) < max_results:
+                    for item in self._new_unique_news(batch, index, max_results - len(news_items)):
+                        news_items.append(item)
+                        yield "article", item
+                if len(news_items) >= max_results and (failed or not refreshing):
+                    break
+        finally:
+            await batches.aclose()
+            if refreshing:
+                await asyncio.to_thread(
+                    self._index_full_refresh, store, subject, fetched, completed == len(queries) and not failed
+                )
+
+        yield "duplicate_clusters", self._duplicate_clusters(index)
+        for section in self._iter_analysis_sections(company_name, industry, product, self._kept_news(index)):
+            yield section
+
+    @staticmethod
+    def collect_financial_analysis(sections: Iterable[Tuple[str, Any]]) -> Dict:
+        """Assemble streamed (section, data) pairs into the analysis dict"""
+        analysis: Dict[str, Any] = {}
+        articles: List[Dict] = []
+        for section, data in sections:
+            if section == "metadata":
+                analysis.update(data)
+                analysis["news_summary"] = {}
+            elif section == "article":
+                articles.append(data)
+            elif section == "duplicate_clusters":
+                # Swap each streamed article for the best source of its cluster
+                kept = {cluster["streamed_url"]: cluster["kept"] for cluster in data}
+                articles = [kept.get(article.get("url"), article) for article in articles]
+                analysis[section] = data
+            else:
+                analysis[section] = data
+        analysis["news_summary"] = {
+            "total_articles": len(articles),
+            "articles": articles[:10]  # Limit to top 10 articles
+        }
         return analysis
+
+    def _analysis_metadata(self, company_name: str, industry: str, product: str) -> Dict:
+        return {
+            "company_name": company_name or "",
+            "industry": industry or "",
+            "product_focus": product or "",
+            "analysis_date": datetime.now().isoformat()
+        }
     
+    def _news_watermark(self,
+                        company_name: str,
+                        industry: str,
+                        product: str) -> Tuple[Optional[NewsIndex], str, Optional[str]]:
+        """
+        (news index, subject key, watermark date). The watermark is None when
+        the subject needs a full refresh: it was never analyzed, or its last
+        full run is older than NEWS_INDEX_FULL_REFRESH_SECONDS.
+        """
+        store = get_news_index()
+        subject = subject_key(company_name, industry, product)
+        if store is None:
+            return None, subject, None
+        state = store.get_watermark(subject)
+        if state is None or not state["full_refresh_at"] \
+                or time.time() - state["full_refresh_at"] > self.full_refresh_seconds:
+            return store, subject, None
+        # Fall back to the day of the last full run when no article had a date
+        watermark = state["published_date"] or datetime.fromtimestamp(state["full_refresh_at"]).strftime("%Y-%m-%d")
+        return store, subject, watermark
+
+    @staticmethod
+    def _index_full_refresh(store: NewsIndex, subject: str, fetched: List[Dict], complete: bool) -> None:
+        """
+        Index the articles of a full query run. Only a run in which every
+        query returned, with at least one article, counts as a full refresh;
+        otherwise the articles are kept but the subject stays due for one.
+        """
+        if fetched:
+            store.merge(subject, fetched, full_refresh=complete)
+
+    @staticmethod
+    def _delta_query(company_name: str, industry: str, product: str) -> str:
+        return " ".join(part.strip() for part in (company_name, industry, product) if part and part.strip()) + " news"
+
+    def _iter_delta_news(self,
+                         store: NewsIndex,
+                         subject: str,
+                         query: str,
+                         watermark: str,
+                         max_results: int) -> Iterator[List[Dict]]:
+        """Merge the articles published since ``watermark`` into the index, then yield the subject's newest ones"""
+        news = self._get_financial_news(query, self.delta_results, watermark)
+        # On failure the indexed articles are still served, just without the newest ones
+        if news is not None:
+            store.merge(subject, news)
+        # Extra headroom for the articles deduplication will collapse
+        yield store.articles(subject, limit=max_results * 3)
+
+    async def _aiter_delta_news(self,
+                                store: NewsIndex,
+                                subject: str,
+                                query: str,
+                                watermark: str,
+                                max_results: int) -> AsyncIterator[List[Dict]]:
+        """Async variant of _iter_delta_news()"""
+        news = await self._get_financial_news_async(query, self.delta_results, watermark)
+        if news is not None:
+            await asyncio.to_thread(store.merge, subject, news)
+        yield await asyncio.to_thread(store.articles, subject, max_results * 3)
+
     def _build_financial_queries(self, company_name: str, industry: str, product: str) -> List[str]:
         """Build comprehensive search queries for financial analysis"""
         queries = []
@@ -89,57 +510,280 @@ class FinancialAnalysisService:
         
         return queries if queries else ["financial markets news"]
     
-    def _get_financial_news(self, query: str, max_results: int = 5) -> List[Dict]:
-        """Get financial news using Exa search"""
+    def _iter_news_for_queries(self, queries: List[str], max_results: int = 5) -> Iterator[Optional[List[Dict]]]:
+        """
+        Run the Exa query for every entry in ``queries`` concurrently (at most
+        ``max_concurrency`` at a time) and yield each query's news in query
+        order as soon as it and all earlier queries have finished, so the
+        deduplicated output is the same as with a sequential loop.
+
+        A query that has been running for longer than ``query_timeout`` is
+        dropped instead of stalling the whole analysis; it yields None, as
+        does a query that failed. Closing the generator cancels the queries
+        that have not started.
+        """
+        results = self._iter_search_results([(query, max_results, None) for query in queries])
         try:
-            # Get recent news (last 30 days)
-            exa_results = self.search_tool.run(
-                search_query=query,
-                search_type="neural",
-                category="news",
-                num_results=max_results,
-                text=True,
-                summary=True,
-                livecrawl="always",
-                api_key=self.api_key
-            )
-            
-            if isinstance(exa_results, dict) and "results" in exa_results:
-                news_items = []
-                for result in exa_results["results"]:
-                    news_item = {
-                        "title": result.get("title", ""),
-                        "url": result.get("url", ""),
-                        "summary": result.get("summary", ""),
-                        "text": result.get("text", "")[:500],  # Limit text length
-                        "published_date": self._extract_date(result)
-                    }
-                    news_items.append(news_item)
-                return news_items
+            for _, news in results:
+                yield news
+        finally:
+            results.close()
+
+    def _iter_search_results(self, searches: List[NewsSearch]) -> Iterator[Tuple[int, Optional[List[Dict]]]]:
+        """(position, news) of each search, in order; see _iter_news_for_queries()"""
+        if not searches:
+            return
+
+        started_at: Dict[int, float] = {}
+
+        def run_query(index: int, search: NewsSearch) -> Optional[List[Dict]]:
+            started_at[index] = time.monotonic()
+            return self._get_financial_news(*search)
+
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.max_concurrency, len(searches)),
+            thread_name_prefix="financial-news"
+        )
+        dropped = set()
+        try:
+            # Each query runs in a copy of the caller's context so its Exa call
+            # is recorded under the caller's instrumentation span
+            futures = [
+                executor.submit(contextvars.copy_context().run, run_query, i, search)
+                for i, search in enumerate(searches)
+            ]
+            next_index = 0
+            while next_index < len(futures):
+                now = time.monotonic()
+                for index in range(next_index, len(futures)):
+                    if index in started_at and index not in dropped and not futures[index].done() \
+                            and now - started_at[index] >= self.query_timeout:
+                        dropped.add(index)
+
+                # Release the finished (or dropped) prefix in query order
+                while next_index < len(futures):
+                    future = futures[next_index]
+                    if next_index not in dropped and not future.done():
+                        break
+                    if next_index in dropped or future.cancelled() or future.exception() is not None:
+                        yield next_index, None
+                    else:
+                        yield next_index, future.result()
+                    next_index += 1
+                if next_index >= len(futures):
+                    break
+
+                # Sleep until the next completion or the earliest per-query deadline
+                pending = [
+                    futures[i] for i in range(next_index, len(futures))
+                    if i not in dropped and not futures[i].done()
+                ]
+                deadlines = [
+                    started_at[i] + self.query_timeout
+                    for i in range(next_index, len(futures))
+                    if i in started_at and i not in dropped and not futures[i].done()
+                ]
+                timeout = max(0.0, min(deadlines) - now) if deadlines else self.query_timeout
+                wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        finally:
+            # Do not block on stragglers; their results are discarded
+            executor.shutdown(wait=False, cancel_futures=True)
+            if dropped:
+                print(f"Dropped {len(dropped)} of {len(searches)} financial news queries after {self.query_timeout:g}s")
+
+    async def _aiter_news_for_queries(self,
+                                      queries: List[str],
+                                      max_results: int = 5) -> AsyncIterator[Optional[List[Dict]]]:
+        """
+        Async variant of _iter_news_for_queries(): at most ``max_concurrency``
+        queries in flight, results yielded in query order, and any query
+        slower than ``query_timeout`` dropped.
+        """
+        results = self._aiter_search_results([(query, max_results, None) for query in queries])
+        try:
+            async for _, news in results:
+                yield news
+        finally:
+            await results.aclose()
+
+    async def _aiter_search_results(self,
+                                    searches: List[NewsSearch]) -> AsyncIterator[Tuple[int, Optional[List[Dict]]]]:
+        """Async variant of _iter_search_results()"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        dropped = 0
+
+        async def run_query(search: NewsSearch) -> Optional[List[Dict]]:
+            nonlocal dropped
+            async with semaphore:
+                try:
+                    return await asyncio.wait_for(
+                        self._get_financial_news_async(*search), timeout=self.query_timeout
+                    )
+                except asyncio.TimeoutError:
+                    dropped += 1
+                    return None
+
+        tasks = [asyncio.ensure_future(run_query(search)) for search in searches]
+        try:
+            for index, task in enumerate(tasks):
+                yield index, await task
+        finally:
+            # Abandoned early: cancel the remaining searches and wait for them to unwind
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if dropped:
+                print(f"Dropped {dropped} of {len(searches)} financial news queries after {self.query_timeout:g}s")
+
+    def _get_financial_news(self,
+                            query: str,
+                            max_results: int = 5,
+                            published_since: Optional[str] = None) -> Optional[List[Dict]]:
+        """
+        Get financial news using Exa search, optionally only articles published
+        since a date. Returns None when the search failed, so callers can tell
+        a failure from a query without news.
+        """
+        try:
+            exa_results = self.search_tool.run(**self._news_search_params(query, max_results, published_since))
+            return self._parse_news_results(exa_results)
         except Exception as e:
             print(f"Error fetching financial news: {e}")
         
-        return []
+        return None
+
+    async def _get_financial_news_async(self,
+                                        query: str,
+                                        max_results: int = 5,
+                                        published_since: Optional[str] = None) -> Optional[List[Dict]]:
+        """Async variant of _get_financial_news()"""
+        try:
+            exa_results = await self.search_tool.arun(**self._news_search_params(query, max_results, published_since))
+            return self._parse_news_results(exa_results)
+        except Exception as e:
+            print(f"Error fetching financial news: {e}")
+
+        return None
+
+    def _news_search_params(self, query: str, max_results: int, published_since: Optional[str] = None) -> Dict:
+        params = {
+            "search_query": query,
+            "search_type": "neural",
+            "category": "news",
+            "num_results": max_results,
+            "text": True,
+            "summary": True,
+            "livecrawl": "always",
+            "timeout": self.query_timeout,
+            "api_key": self.api_key
+        }
+        if published_since:
+            params["start_published_date"] = f"{published_since[:10]}T00:00:00.000Z"
+        return params
+
+    def _parse_news_results(self, exa_results) -> Optional[List[Dict]]:
+        """Convert an Exa response into news items; None for an error response"""
+        if isinstance(exa_results, dict) and "results" in exa_results:
+            news_items = []
+            for result in exa_results["results"]:
+                news_item = {
+                    "title": result.get("title", ""),
+                    "url": result.get("url", ""),
+                    "summary": result.get("summary", ""),
+                    "text": result.get("text", "")[:500],  # Limit text length
+                    "published_date": self._extract_date(result)
+                }
+                news_items.append(news_item)
+            return news_items
+        # ExaDevTool reports failed requests as {"error": ...}
+        error = exa_results.get("error") if isinstance(exa_results, dict) else exa_results
+        print(f"Error fetching financial news: {error}")
+        return None
     
-    def _extract_date(self, result: Dict) -> str:
-        """Extract or estimate publication date"""
-        # Exa might provide dates in metadata
-        # For now, use current date as fallback
-        return datetime.now().strftime("%Y-%m-%d")
+    def _extract_date(self, result: Dict) -> Optional[str]:
+        """Extract the publication date, or None when Exa has none (see _dated())"""
+        # Exa returns an ISO 8601 publishedDate for most news results
+        published = result.get("publishedDate")
+        if published:
+            return str(published)[:10]
+        return None
+
+    @staticmethod
+    def _dated(news_items: List[Dict]) -> List[Dict]:
+        """
+        Copies of ``news_items`` as presented, undated articles showing today's
+        date. The index only ever sees real dates, so an undated article
+        cannot move a subject's watermark.
+        """
+        today = datetime.now().strftime("%Y-%m-%d")
+        return [dict(item, published_date=item.get("published_date") or today) for item in news_items]
     
+    def _dedup_index(self) -> NearDuplicateIndex:
+        return NearDuplicateIndex(threshold=self.dedup_threshold)
+
+    @staticmethod
+    def _news_text(item: Dict) -> str:
+        """Text fingerprinted for near-duplicate detection"""
+        return f"{item['title']} {item.get('summary') or item.get('text', '')}"
+
     def _deduplicate_news(self, news_items: List[Dict]) -> List[Dict]:
-        """Remove duplicate news articles based on title similarity"""
-        seen_titles = set()
+        """Collapse near-duplicate articles, keeping the best source of each cluster"""
+        index = self._dedup_index()
+        self._new_unique_news(news_items, index)
+        return self._kept_news(index)
+
+    def _new_unique_news(self,
+                         news_items: List[Dict],
+                         index: NearDuplicateIndex,
+                         limit: Optional[int] = None) -> List[Dict]:
+        """
+        Items of ``news_items`` that start a new cluster in ``index`` (at most
+        ``limit``). Near-duplicates are added to their cluster instead, so
+        the stream can deduplicate incrementally and still pick the best
+        source per cluster at the end.
+        """
         unique_news = []
         
         for item in news_items:
-            # Simple deduplication based on title
-            title = item["title"].lower().strip()
-            if title not in seen_titles:
-                seen_titles.add(title)
+            if limit is not None and len(unique_news) >= limit:
+                break
+            # Same title, or title plus summary similar above the threshold
+            _, is_new = index.add(self._news_text(item), item, exact_key=item["title"].lower().strip())
+            if is_new:
                 unique_news.append(item)
         
         return unique_news
+
+    def _source_score(self, item: Dict) -> Tuple[int, int, int]:
+        """Preferred domains first, then the most detailed article"""
+        domain = urlparse(item.get("url", "")).netloc.lower()
+        preference = 0
+        for rank, source in enumerate(self.preferred_sources):
+            if domain == source or domain.endswith("." + source):
+                preference = len(self.preferred_sources) - rank
+                break
+        return preference, len(item.get("summary") or ""), len(item.get("text") or "")
+
+    def _kept_news(self, index: NearDuplicateIndex) -> List[Dict]:
+        """Best source of every cluster, in the order the clusters were found"""
+        return [max(members, key=self._source_score) for members in index.clusters().values()]
+
+    def _duplicate_clusters(self, index: NearDuplicateIndex) -> List[Dict]:
+        """Clusters with more than one article: the one streamed, the one kept and the rest"""
+        clusters = []
+        for members in index.clusters().values():
+            if len(members) < 2:
+                continue
+            kept = max(members, key=self._source_score)
+            clusters.append({
+                "size": len(members),
+                "streamed_url": members[0].get("url", ""),
+                "kept": kept,
+                "duplicates": [
+                    {"title": item["title"], "url": item.get("url", "")} for item in members if item is not kept
+                ]
+            })
+        return clusters
     
     def _generate_financial_analysis(self, 
                                    company_name: str, 
@@ -147,84 +791,61 @@ class FinancialAnalysisService:
                                    product: str,
                                    news_items: List[Dict]) -> Dict:
         """Generate comprehensive financial analysis"""
-        
+        sections = [("metadata", self._analysis_metadata(company_name, industry, product))]
+        sections.extend(("article", item) for item in news_items)
+        sections.extend(self._iter_analysis_sections(company_name, industry, product, news_items))
+        return self.collect_financial_analysis(sections)
+
+    def _iter_analysis_sections(self,
+                                company_name: str,
+                                industry: str,
+                                product: str,
+                                news_items: List[Dict]) -> Iterator[Tuple[str, Any]]:
+        """Aggregate sections over the final article list, each yielded as soon as it is computed"""
+        # One keyword scan per article, shared by every section
+        hits = self._scan_news(news_items)
+
         # Analyze news sentiment and extract key points
-        key_insights = self._extract_key_insights(news_items)
-        
+        yield "key_insights", self._extract_key_insights(news_items, hits)
+
         # Generate market outlook
-        market_outlook = self._generate_market_outlook(company_name, industry, product, news_items)
-        
+        yield "market_outlook", self._generate_market_outlook(company_name, industry, product, news_items)
+
         # Create investment recommendations
-        recommendations = self._generate_recommendations(company_name, industry, product, news_items)
-        
-        analysis = {
-            "company_name": company_name or "",
-            "industry": industry or "",
-            "product_focus": product or "",
-            "analysis_date": datetime.now().isoformat(),
-            "news_summary": {
-                "total_articles": len(news_items),
-                "articles": news_items[:10]  # Limit to top 10 articles
-            },
-            "key_insights": key_insights,
-            "market_outlook": market_outlook,
-            "investment_recommendations": recommendations,
-            "risk_assessment": self._assess_risks(news_items),
-            "opportunities": self._identify_opportunities(company_name, industry, product, news_items)
-        }
-        
-        return analysis
+        yield "investment_recommendations", self._generate_recommendations(company_name, industry, product, news_items)
+
+        yield "risk_assessment", self._assess_risks(news_items, hits)
+        yield "opportunities", self._identify_opportunities(company_name, industry, product, news_items, hits)
+
+    @staticmethod
+    def _scan_news(news_items: List[Dict]) -> List[int]:
+        """Keyword mask of each article's title and summary, see KeywordScanner.scan"""
+        scanner = get_news_scanner()
+        return [scanner.scan(f"{item['title']} {item.get('summary', '')}") for item in news_items]
     
-    def _extract_key_insights(self, news_items: List[Dict]) -> List[str]:
+    def _extract_key_insights(self, news_items: List[Dict], hits: Optional[List[int]] = None) -> List[str]:
         """Extract key insights from news articles"""
+        scanner = get_news_scanner()
+        if hits is None:
+            hits = self._scan_news(news_items)
         insights = []
         
-        for item in news_items:
-            text = f"{item['title']} {item.get('summary', '')}"
-            
-            # Simple keyword-based insight extraction
-            keywords = {
-                "earnings": "Strong earnings performance reported",
-                "growth": "Significant growth opportunities identified",
-                "acquisition": "Merger and acquisition activity noted",
-                "innovation": "Innovation and R&D developments",
-                "regulation": "Regulatory changes affecting the market",
-                "competition": "Competitive landscape developments"
-            }
-            
-            for keyword, insight in keywords.items():
-                if keyword.lower() in text.lower():
+        for mask in hits:
+            for insight in scanner.labels(mask, "insights"):
+                if insight not in insights:
                     insights.append(insight)
         
-        return list(set(insights))[:5]  # Return top 5 unique insights
+        return insights[:5]  # Return top 5 unique insights
     
     def _generate_market_outlook(self, company_name: str, industry: str, product: str, news_items: List[Dict]) -> Dict:
         """Generate market outlook based on news analysis"""
-        
-        # Simple sentiment analysis based on keywords
-        positive_indicators = ["growth", "profit", "expansion", "innovation", "opportunity"]
-        negative_indicators = ["decline", "loss", "risk", "challenge", "competition"]
-        
-        positive_count = sum(1 for item in news_items 
-                           if any(indicator in item["title"].lower() 
-                                for indicator in positive_indicators))
-        negative_count = sum(1 for item in news_items 
-                           if any(indicator in item["title"].lower() 
-                                for indicator in negative_indicators))
-        
-        if positive_count > negative_count:
-            outlook = "positive"
-        elif negative_count > positive_count:
-            outlook = "cautious"
-        else:
-            outlook = "neutral"
-        
-        return {
-            "sentiment": outlook,
-            "confidence": min(90, max(60, (positive_count / len(news_items)) * 100)) if news_items else 50,
+        # Recency-weighted lexicon sentiment over every article's title and summary
+        outlook = get_sentiment_scorer().score_articles(news_items)
+        outlook.update({
             "key_drivers": ["Market trends", "Economic indicators", "Industry developments"],
             "time_horizon": "6-12 months"
-        }
+        })
+        return outlook
     
     def _generate_recommendations(self, company_name: str, industry: str, product: str, news_items: List[Dict]) -> List[Dict]:
         """Generate investment recommendations"""
@@ -257,37 +878,31 @@ class FinancialAnalysisService:
         
         return recommendations
     
-    def _assess_risks(self, news_items: List[Dict]) -> List[str]:
+    def _assess_risks(self, news_items: List[Dict], hits: Optional[List[int]] = None) -> List[str]:
         """Assess potential risks from news analysis"""
+        scanner = get_news_scanner()
+        if hits is None:
+            hits = self._scan_news(news_items)
         risks = []
         
-        risk_keywords = {
-            "volatility": "Market volatility",
-            "regulation": "Regulatory changes",
-            "competition": "Increased competition",
-            "economic": "Economic uncertainty",
-            "supply chain": "Supply chain disruptions"
-        }
-        
-        for item in news_items:
-            text = f"{item['title']} {item.get('summary', '')}".lower()
-            for keyword, risk in risk_keywords.items():
-                if keyword in text and risk not in risks:
+        for mask in hits:
+            for risk in scanner.labels(mask, "risks"):
+                if risk not in risks:
                     risks.append(risk)
         
         return risks[:3]  # Return top 3 risks
     
-    def _identify_opportunities(self, company_name: str, industry: str, product: str, news_items: List[Dict]) -> List[str]:
+    def _identify_opportunities(self, company_name: str, industry: str, product: str, news_items: List[Dict],
+                                hits: Optional[List[int]] = None) -> List[str]:
         """Identify potential opportunities"""
+        scanner = get_news_scanner()
         opportunities = []
         
-        opportunity_keywords = ["growth", "innovation", "expansion", "partnership", "investment"]
+        if hits is None:
+            hits = self._scan_news(news_items)
         
-        for item in news_items:
-            text = f"{item['title']} {item.get('summary', '')}".lower()
-            if any(keyword in text for keyword in opportunity_keywords):
-                opportunities.append("Market expansion opportunities")
-                break
+        if any(scanner.matches(mask, "opportunities") for mask in hits):
+            opportunities.append("Market expansion opportunities")
         
         if company_name:
             opportunities.append(f"{company_name} strategic positioning")
@@ -296,7 +911,6 @@ class FinancialAnalysisService:
         
         return list(set(opportunities))[:3]  # Return top 3 unique opportunities
 
-
 def main():
     """Test the financial analysis service"""
     service = FinancialAnalysisService()
@@ -31,20 +31,35 @@ class MarketResearchService:
         search_query = self._build_search_query(industry, product)
         
         # Use the ExaDevTool to run the search
-        exa_response = self.search_tool.run(
-            search_query=search_query,
-            search_type="neural",        # or "auto"/"keyword" etc.
-            text=True,
-            use_autoprompt=True,
-            num_results=20,
-            api_key=self.api_key
-        )
+        exa_response = self.search_tool.run(**self._search_params(search_query))
 
         # Build a summary from the results
         summary_text = self._create_summary_from_exa_results(exa_response, search_query)
         
         return summary_text
 
+    async def generate_market_research_async(
+        self,
+        industry: str = None,
+        product: str = None
+    ) -> str:
+        """
+        Async variant of generate_market_research() built on ExaDevTool.arun.
+        """
+        search_query = self._build_search_query(industry, product)
+        exa_response = await self.search_tool.arun(**self._search_params(search_query))
+        return self._create_summary_from_exa_results(exa_response, search_query)
+
+    def _search_params(self, search_query: str) -> dict:
+        return {
+            "search_query": search_query,
+            "search_type": "neural",        # or "auto"/"keyword" etc.
+            "text": True,
+            "use_autoprompt": True,
+            "num_results": 20,
+            "api_key": self.api_key
+        }
+
     def _build_search_query(self, industry: str, product: str) -> str:
         """
         Construct a search query from (industry, product).
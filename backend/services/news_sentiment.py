@@ -0,0 +1,232 @@
+# file: services/news_sentiment.py
+
+import json
+import math
+import os
+import random
+import re
+import sys
+import time
+from datetime import date, datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+# Term -> weight; single words or two-word phrases, lowercase
+SENTIMENT_LEXICON = {
+    "growth": 1.0, "grow": 0.8, "grows": 0.8, "growing": 0.8, "surge": 1.2, "surges": 1.2,
+    "profit": 1.0, "profits": 1.0, "profitable": 1.2, "profitability": 1.0,
+    "expansion": 0.8, "expands": 0.8, "expand": 0.6,
+    "innovation": 0.6, "innovative": 0.6, "opportunity": 0.6, "opportunities": 0.6,
+    "record": 0.6, "beat": 0.8, "beats": 0.8, "outperform": 1.0, "outperforms": 1.0,
+    "upgrade": 1.0, "upgraded": 1.0, "gain": 0.8, "gains": 0.8, "rally": 1.0,
+    "strong": 0.6, "partnership": 0.4, "raises": 0.4, "funding": 0.3,
+    "record revenue": 1.0, "raised guidance": 1.2,
+    "decline": -1.0, "declines": -1.0, "declining": -1.0, "drop": -0.8, "drops": -0.8,
+    "loss": -1.0, "losses": -1.0, "risk": -0.6, "risks": -0.6, "challenge": -0.6, "challenges": -0.6,
+    "competition": -0.4, "layoffs": -1.2, "layoff": -1.2, "lawsuit": -1.0, "probe": -0.8,
+    "downgrade": -1.0, "downgraded": -1.0, "miss": -0.8, "misses": -0.8, "weak": -0.6,
+    "slump": -1.2, "plunge": -1.4, "plunges": -1.4, "bankruptcy": -2.0, "fraud": -2.0,
+    "volatility": -0.4, "recession": -1.2, "cut guidance": -1.2, "supply chain": -0.2
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+# Normalizes a raw score x into (-1, 1) as x / sqrt(x^2 + alpha)
+_NORMALIZE_ALPHA = 4.0
+# Two-sided z value for the 95% confidence interval
+_Z_95 = 1.959964
+
+
+class NewsSentimentScorer:
+    """
+    Lexicon sentiment for a batch of articles in one vectorized pass.
+
+    Every article's title and summary are tokenized (words plus word pairs
+    when the lexicon has phrases; the words of a matched phrase do not also
+    count on their own) into a sparse term matrix kept as
+    coordinate arrays: one (article, term) entry per lexicon hit. Scoring
+    the batch is then a single weighted ``bincount`` over those entries.
+    Per-article scores are normalized into (-1, 1) and the aggregate is the
+    recency-weighted mean (articles lose half their weight every
+    ``half_life_days``) with a normal-approximation 95% confidence interval.
+    The article variance is pooled with ``prior_articles`` pseudo-articles
+    at the spread of the lexicon's own term scores, and confidence is capped
+    by the effective number of articles, so a few articles that happen to
+    agree cannot report certainty.
+    """
+
+    def __init__(self,
+                 lexicon: Optional[Dict[str, float]] = None,
+                 half_life_days: float = 14.0,
+                 neutral_band: float = 0.05,
+                 prior_articles: float = 2.0):
+        lexicon = {term.lower(): weight for term, weight in (lexicon if lexicon is not None else SENTIMENT_LEXICON).items()}
+        self.terms = sorted(lexicon)
+        self.term_ids = {term: i for i, term in enumerate(self.terms)}
+        self.weights = np.array([lexicon[term] for term in self.terms], dtype=np.float64)
+        # First words of the two-word phrases; only these start a pair lookup
+        self.phrase_heads = {term.split(" ", 1)[0] for term in self.terms if " " in term}
+        self.half_life_days = half_life_days
+        self.neutral_band = neutral_band
+        self.prior_articles = prior_articles
+        # Spread of single-term article scores, the variance expected before any evidence
+        term_scores = self.weights / np.sqrt(self.weights * self.weights + _NORMALIZE_ALPHA)
+        self.prior_variance = float(np.mean(term_scores * term_scores)) if len(term_scores) else 1.0
+
+    def term_matrix(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """(rows, cols) coordinate arrays with one entry per lexicon hit in ``texts``"""
+        rows: List[int] = []
+        cols: List[int] = []
+        lookup = self.term_ids.get
+        heads = self.phrase_heads
+        for row, text in enumerate(texts):
+            tokens = _TOKEN_RE.findall(text.lower())
+            if heads.isdisjoint(tokens):
+                hits = [term for term in map(lookup, tokens) if term is not None]
+            else:
+                hits = []
+                i = 0
+                while i < len(tokens):
+                    token = tokens[i]
+                    term = lookup(f"{token} {tokens[i + 1]}") if token in heads and i + 1 < len(tokens) else None
+                    if term is not None:
+                        # The phrase claims both words, e.g. "record revenue" is not also "record"
+                        hits.append(term)
+                        i += 2
+                        continue
+                    term = lookup(token)
+                    if term is not None:
+                        hits.append(term)
+                    i += 1
+            rows.extend([row] * len(hits))
+            cols.extend(hits)
+        return np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64)
+
+    def score_texts(self, texts: Sequence[str]) -> np.ndarray:
+        """Normalized sentiment in (-1, 1) of each text"""
+        rows, cols = self.term_matrix(texts)
+        raw = np.bincount(rows, weights=self.weights[cols], minlength=len(texts))
+        return raw / np.sqrt(raw * raw + _NORMALIZE_ALPHA)
+
+    def recency_weights(self, published_dates: Sequence[Optional[str]], today: Optional[date] = None) -> np.ndarray:
+        """Half-life decay by article age; undated articles count as published today"""
+        today = np.datetime64(today or date.today(), "D")
+        try:
+            days = np.array([str(published)[:10] if published else str(today) for published in published_dates],
+                            dtype="datetime64[D]")
+        except ValueError:
+            # Some date does not parse; fall back to one at a time
+            days = np.full(len(published_dates), today, dtype="datetime64[D]")
+            for i, published in enumerate(published_dates):
+                try:
+                    days[i] = np.datetime64(str(published)[:10], "D")
+                except ValueError:
+                    pass
+        ages = np.maximum((today - days).astype(np.float64), 0.0)
+        return np.power(0.5, ages / self.half_life_days)
+
+    def score_articles(self, news_items: List[Dict], today: Optional[date] = None) -> Dict:
+        """Per-article scores and the recency-weighted aggregate sentiment of ``news_items``"""
+        if not news_items:
+            return self._no_evidence([], np.zeros(0), np.zeros(0))
+        texts = [f"{item.get('title', '')} {item.get('summary', '')}" for item in news_items]
+        scores = self.score_texts(texts)
+        weights = self.recency_weights([item.get("published_date") for item in news_items], today)
+        if not scores.any():
+            # No lexicon term in any article: a zero variance would read as certainty
+            return self._no_evidence(news_items, scores, weights)
+
+        total = weights.sum()
+        mean = float(np.dot(weights, scores) / total)
+        variance = float(np.dot(weights, (scores - mean) ** 2) / total)
+        # Kish effective sample size of the weighted articles
+        effective_n = float(total * total / np.dot(weights, weights))
+        pooled_variance = (
+            (effective_n * variance + self.prior_articles * self.prior_variance)
+            / (effective_n + self.prior_articles)
+        )
+        stderr = math.sqrt(pooled_variance / effective_n)
+        low, high = mean - _Z_95 * stderr, mean + _Z_95 * stderr
+
+        if mean > self.neutral_band:
+            sentiment = "positive"
+        elif mean < -self.neutral_band:
+            sentiment = "cautious"
+        else:
+            sentiment = "neutral"
+        # Probability that the true mean lies on the reported side of zero
+        z = abs(mean) / stderr
+        confidence = 100 * 0.5 * (1 + math.erf(z / math.sqrt(2)))
+        # At most halfway from a coin flip to certainty with as many articles as prior ones
+        confidence = min(confidence, 50 + 50 * effective_n / (effective_n + self.prior_articles))
+
+        return {
+            "sentiment": sentiment,
+            "score": round(mean, 4),
+            "confidence": round(confidence, 1),
+            "confidence_interval": [round(max(-1.0, low), 4), round(min(1.0, high), 4)],
+            "articles_scored": len(news_items),
+            "effective_articles": round(effective_n, 2),
+            "article_scores": self._article_scores(news_items, scores, weights)
+        }
+
+    @classmethod
+    def _no_evidence(cls, news_items: List[Dict], scores: np.ndarray, weights: np.ndarray) -> Dict:
+        """Neutral at 50% confidence, for batches without any sentiment signal"""
+        return {
+            "sentiment": "neutral",
+            "score": 0.0,
+            "confidence": 50.0,
+            "confidence_interval": [0.0, 0.0],
+            "articles_scored": len(news_items),
+            "effective_articles": round(float(weights.sum() ** 2 / np.dot(weights, weights)), 2) if len(weights) else 0.0,
+            "article_scores": cls._article_scores(news_items, scores, weights)
+        }
+
+    @staticmethod
+    def _article_scores(news_items: List[Dict], scores: np.ndarray, weights: np.ndarray) -> List[Dict]:
+        return [
+            {"url": item.get("url", ""), "score": round(float(score), 4), "weight": round(float(weight), 4)}
+            for item, score, weight in zip(news_items, scores, weights)
+        ]
+
+
+def load_sentiment_lexicon(path: Optional[str]) -> Dict[str, float]:
+    """SENTIMENT_LEXICON updated with the {term: weight} JSON file at ``path``, if any"""
+    lexicon = dict(SENTIMENT_LEXICON)
+    if path:
+        try:
+            with open(path) as f:
+                lexicon.update({term.lower(): float(weight) for term, weight in json.load(f).items()})
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"Could not load sentiment lexicon from {path}: {e}")
+    return lexicon
+
+
+def main():
+    """Benchmark scoring synthetic article batches"""
+    rng = random.Random(5)
+    vocabulary = [f"word{i}" for i in range(3000)] + list(SENTIMENT_LEXICON)
+    scorer = NewsSentimentScorer()
+    for size in (100, 1000, 5000):
+        items = [{
+            "title": " ".join(rng.choice(vocabulary) for _ in range(10)),
+            "summary": " ".join(rng.choice(vocabulary) for _ in range(60)),
+            "url": f"https://example.com/{i}",
+            "published_date": (datetime.now().date().toordinal() - rng.randint(0, 60))
+        } for i in range(size)]
+        for item in items:
+            item["published_date"] = date.fromordinal(item["published_date"]).isoformat()
+        started = time.perf_counter()
+        result = scorer.score_articles(items)
+        elapsed = time.perf_counter() - started
+        print(f"{size} articles in {elapsed * 1000:.1f} ms: {result['sentiment']} "
+              f"score={result['score']} CI={result['confidence_interval']} confidence={result['confidence']}%")
+
+
+if __name__ == "__main__":
+    main()
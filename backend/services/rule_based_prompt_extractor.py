@@ -0,0 +1,399 @@
+# file: services/rule_based_prompt_extractor.py
+
+import os
+import re
+import sys
+import json
+import threading
+from typing import Dict, List, Optional, Pattern, Tuple
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from tools.company_intelligence_tool import VALID_COMPANY_STAGES
+from utils.envutils import EnvUtils
+
+LEAD_FIELDS = ["industry", "company_stage", "geography", "funding_stage", "product"]
+
+# Gazetteers: canonical value -> phrases that mean it
+FUNDING_STAGES: Dict[str, List[str]] = {
+    "Pre-Seed": ["pre-seed", "pre seed", "preseed"],
+    "Seed": ["seed", "seed-stage", "seed stage", "seed funded", "seed-funded"],
+    "Angel": ["angel", "angel-backed", "angel funded"],
+    "Series A": ["series a", "series-a"],
+    "Series B": ["series b", "series-b"],
+    "Series C": ["series c", "series-c"],
+    "Series D": ["series d", "series-d"],
+    "Series E": ["series e", "series-e"],
+    "Series F": ["series f", "series-f"],
+    "Bootstrapped": ["bootstrapped", "self-funded"],
+    "Public": ["ipo", "publicly traded", "public companies", "listed companies"]
+}
+
+# Keys must stay within CompanyIntelligenceTool's accepted stages
+COMPANY_STAGES: Dict[str, List[str]] = {
+    "startup": ["startup", "startups", "start-up", "start-ups", "early-stage", "early stage"],
+    "smb": ["smb", "smbs", "small business", "small businesses", "small and medium businesses",
+            "small and medium-sized businesses", "sme", "smes", "mid-sized companies", "midsize companies"],
+    "enterprise": ["enterprise", "enterprises", "large companies", "large enterprises",
+                   "fortune 500", "big companies", "corporations"],
+    "growing": ["growing", "scale-up", "scale-ups", "scaleup", "scaleups", "growth-stage",
+                "growth stage", "fast-growing", "high-growth", "late-stage", "late stage"]
+}
+
+GEOGRAPHIES: Dict[str, List[str]] = {
+    "Silicon Valley": ["silicon valley"],
+    "Bay Area": ["bay area", "sf bay area"],
+    "San Francisco": ["san francisco", "sf"],
+    "New York": ["new york", "nyc", "new york city"],
+    "Boston": ["boston"],
+    "Austin": ["austin"],
+    "Seattle": ["seattle"],
+    "Los Angeles": ["los angeles"],
+    "Chicago": ["chicago"],
+    "Miami": ["miami"],
+    "Denver": ["denver"],
+    "Toronto": ["toronto"],
+    "California": ["california"],
+    "Texas": ["texas"],
+    "United States": ["united states", "usa", "u.s.", "america"],
+    "Canada": ["canada"],
+    "United Kingdom": ["united kingdom", "uk", "u.k.", "britain"],
+    "London": ["london"],
+    "Berlin": ["berlin"],
+    "Paris": ["paris"],
+    "Germany": ["germany"],
+    "France": ["france"],
+    "Europe": ["europe", "eu", "european"],
+    "Nordics": ["nordics", "scandinavia"],
+    "Israel": ["israel", "tel aviv"],
+    "India": ["india", "bangalore", "bengaluru"],
+    "Singapore": ["singapore"],
+    "China": ["china"],
+    "Japan": ["japan", "tokyo"],
+    "Asia": ["asia", "apac", "southeast asia"],
+    "Latin America": ["latin america", "latam"],
+    "Africa": ["africa"],
+    "Middle East": ["middle east", "mena"],
+    "Australia": ["australia", "sydney"]
+}
+
+INDUSTRIES: Dict[str, List[str]] = {
+    "AI": ["ai", "artificial intelligence", "machine learning", "ml", "generative ai", "genai", "ai-powered"],
+    "Fintech": ["fintech", "financial technology", "financial services"],
+    "Healthcare": ["healthcare", "health care", "healthtech", "health tech", "digital health", "medtech", "medical"],
+    "Biotech": ["biotech", "biotechnology", "life sciences"],
+    "Edtech": ["edtech", "education technology", "education"],
+    "SaaS": ["saas", "b2b software", "enterprise software"],
+    "Cybersecurity": ["cybersecurity", "cyber security", "security"],
+    "E-commerce": ["e-commerce", "ecommerce", "online retail"],
+    "Retail": ["retail"],
+    "Logistics": ["logistics", "supply chain", "shipping"],
+    "Climate Tech": ["climate tech", "climatetech", "cleantech", "clean tech", "clean energy",
+                     "renewable energy", "renewables"],
+    "Robotics": ["robotics"],
+    "Semiconductors": ["semiconductor", "semiconductors"],
+    "Hardware": ["hardware"],
+    "Blockchain": ["blockchain", "crypto", "web3", "cryptocurrency"],
+    "Agtech": ["agtech", "agriculture", "agritech"],
+    "Proptech": ["proptech", "real estate"],
+    "Insurtech": ["insurtech", "insurance"],
+    "Gaming": ["gaming", "video games"],
+    "Automotive": ["automotive", "electric vehicle", "electric vehicles", "ev", "autonomous vehicles"],
+    "Aerospace": ["aerospace", "space tech", "spacetech"],
+    "Manufacturing": ["manufacturing"],
+    "Media": ["media", "entertainment"],
+    "Telecommunications": ["telecom", "telecommunications"],
+    "Food & Beverage": ["food and beverage", "food & beverage", "foodtech", "food tech"],
+    "HR Tech": ["hr tech", "hrtech", "recruiting", "human resources"],
+    "Legal Tech": ["legal tech", "legaltech"],
+    "Marketing Tech": ["martech", "marketing tech", "adtech"],
+    "IoT": ["iot", "internet of things"],
+    "Quantum Computing": ["quantum computing", "quantum"],
+    "Drones": ["drone", "drones"]
+}
+
+PRODUCTS: Dict[str, List[str]] = {
+    "chips": ["chip", "chips", "processors", "gpus", "accelerators"],
+    "software": ["software"],
+    "platform": ["platform", "platforms"],
+    "mobile apps": ["app", "apps", "mobile app", "mobile apps"],
+    "APIs": ["api", "apis"],
+    "CRM": ["crm", "crm software"],
+    "ERP": ["erp", "erp software"],
+    "analytics": ["analytics", "data analytics", "analytics tools"],
+    "payments": ["payments", "payment processing", "payment solutions"],
+    "chatbots": ["chatbot", "chatbots", "conversational ai"],
+    "LLMs": ["llm", "llms", "large language models", "foundation models"],
+    "robots": ["robot", "robots"],
+    "sensors": ["sensor", "sensors", "lidar"],
+    "batteries": ["battery", "batteries", "energy storage"],
+    "wearables": ["wearable", "wearables"],
+    "devices": ["devices", "medical devices"],
+    "diagnostics": ["diagnostics"],
+    "drug discovery": ["drug discovery"],
+    "lending": ["lending", "loans"],
+    "banking": ["neobank", "neobanks", "banking"],
+    "telehealth": ["telehealth", "telemedicine"],
+    "computer vision": ["computer vision"],
+    "cloud infrastructure": ["cloud", "cloud infrastructure", "cloud computing"],
+    "developer tools": ["developer tools", "devtools"],
+    "solar panels": ["solar", "solar panels"],
+    "3D printing": ["3d printing", "additive manufacturing"]
+}
+
+# Words that carry no lead information in prompts like "Find me ... in ..."
+FILLER_WORDS = {
+    "generate", "leads", "lead", "find", "me", "us", "list", "show", "get", "search", "looking",
+    "look", "for", "of", "in", "on", "at", "from", "to", "by", "with", "and", "or", "the", "a", "an",
+    "that", "which", "who", "are", "is", "based", "located", "headquartered", "operating", "companies",
+    "company", "businesses", "firms", "vendors", "providers", "players", "makers", "manufacturers",
+    "area", "region", "space", "sector", "industry", "market", "top", "best", "some", "all", "any",
+    "i", "want", "need", "please", "like", "such", "as", "around", "near", "across", "within",
+    "focused", "focusing", "building", "making", "developing", "selling", "offering", "working",
+    "raised", "funded", "funding", "stage", "round", "recently", "new", "emerging", "innovative",
+    "leading", "potential", "prospects", "customers", "clients", "targets", "sell", "into",
+    "can", "you", "could", "would", "help", "identify", "discover", "give", "my", "our", "their",
+    "about", "other", "&", "-", "tech", "technology", "solutions", "products", "services", "tools"
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9&+\.\-]*|&")
+# Negations and exclusions ("not in China", "except India", "non-US") flip the
+# meaning of the phrase they precede, which the gazetteers cannot express
+_NEGATION_RE = re.compile(
+    r"(?<![a-z0-9])(?:not|no|except|excluding|exclude|outside|without|besides|other than|non)(?![a-z0-9])|"
+    r"(?<![a-z0-9])non-|n't(?![a-z0-9])"
+)
+
+
+def _compile_gazetteer(gazetteer: Dict[str, List[str]]) -> Tuple[Pattern, Dict[str, str]]:
+    """One case-insensitive alternation per gazetteer, longest phrases first"""
+    phrase_to_value = {}
+    for value, phrases in gazetteer.items():
+        for phrase in phrases:
+            phrase_to_value[phrase.lower()] = value
+    alternation = "|".join(re.escape(p) for p in sorted(phrase_to_value, key=len, reverse=True))
+    return re.compile(rf"(?<![a-z0-9])(?:{alternation})(?![a-z0-9])", re.IGNORECASE), phrase_to_value
+
+
+class RuleBasedPromptExtractor:
+    """
+    Local, LLM-free extraction of the five lead fields from prompts such as
+    "AI chip startups in Silicon Valley".
+
+    Each gazetteer is compiled into a single regex. A prompt is accepted only
+    when the matched phrases plus filler words explain every one of its
+    words, nothing in it is negated or excluded, and an industry or product
+    was found; otherwise ``extract`` returns None and the caller should ask
+    the LLM.
+    """
+
+    # Fields are matched in this order; an earlier field claims overlapping text
+    FIELD_GAZETTEERS = [
+        ("funding_stage", FUNDING_STAGES),
+        ("company_stage", COMPANY_STAGES),
+        ("geography", GEOGRAPHIES),
+        ("industry", INDUSTRIES),
+        ("product", PRODUCTS)
+    ]
+
+    _compiled: Optional[List[Tuple[str, Pattern, Dict[str, str]]]] = None
+    _compile_lock = threading.Lock()
+
+    def __init__(self):
+        with self._compile_lock:
+            if RuleBasedPromptExtractor._compiled is None:
+                RuleBasedPromptExtractor._compiled = [
+                    (field, *_compile_gazetteer(gazetteer)) for field, gazetteer in self.FIELD_GAZETTEERS
+                ]
+
+    def analyze(self, prompt: str) -> Tuple[Dict[str, str], List[str]]:
+        """Return the extracted fields and the prompt's words that are neither matched nor filler"""
+        text = prompt.lower()
+        claimed = [False] * len(text)
+        values: Dict[str, List[str]] = {field: [] for field in LEAD_FIELDS}
+
+        for field, pattern, phrase_to_value in self._compiled:
+            for match in pattern.finditer(text):
+                start, end = match.span()
+                if any(claimed[start:end]):
+                    continue
+                for i in range(start, end):
+                    claimed[i] = True
+                value = phrase_to_value[match.group(0).lower()]
+                if value not in values[field]:
+                    values[field].append(value)
+
+        unexplained = []
+        for token in _TOKEN_RE.finditer(text):
+            word = token.group(0).strip(".")
+            if word and not all(claimed[token.start():token.end()]) and word not in FILLER_WORDS:
+                unexplained.append(word)
+
+        return {field: ", ".join(values[field]) for field in LEAD_FIELDS}, unexplained
+
+    def extract(self, prompt: str) -> Optional[Dict[str, str]]:
+        """The five lead fields, or None when the prompt needs the LLM"""
+        if _NEGATION_RE.search(prompt.lower()):
+            return None
+        fields, unexplained = self.analyze(prompt)
+        # Any unknown word may be a place, target or product the gazetteers would silently drop
+        if unexplained:
+            return None
+        if fields["company_stage"] not in VALID_COMPANY_STAGES:
+            # Several stages matched; leave the choice to the LLM
+            return None
+        if not (fields["industry"] or fields["product"]):
+            return None
+        return fields
+
+
+def unexplained_prompt_words(prompt: str) -> List[str]:
+    """Distinct words of ``prompt`` that no gazetteer phrase or filler word accounts for, sorted"""
+    _, unexplained = RuleBasedPromptExtractor().analyze(prompt)
+    return sorted(set(unexplained))
+
+
+_SYNONYMS: Optional[Dict[str, Dict[str, str]]] = None
+
+
+def canonicalize_lead_fields(fields: Dict[str, str]) -> Dict[str, str]:
+    """
+    Canonical form of extracted lead fields for use as a cache key: values
+    are case-folded, whitespace-collapsed and mapped through the gazetteers
+    ("Series-B" -> "series b", "NYC" -> "new york", "start-ups" -> "startup"),
+    and multi-valued fields are de-duplicated and sorted. Keys are always
+    LEAD_FIELDS, in that order.
+    """
+    global _SYNONYMS
+    if _SYNONYMS is None:
+        _SYNONYMS = {
+            field: {
+                phrase.lower(): value.lower()
+                for value, phrases in gazetteer.items()
+                for phrase in [value, *phrases]
+            }
+            for field, gazetteer in RuleBasedPromptExtractor.FIELD_GAZETTEERS
+        }
+
+    canonical = {}
+    for field in LEAD_FIELDS:
+        synonyms = _SYNONYMS[field]
+        parts = set()
+        for part in str(fields.get(field) or "").split(","):
+            part = " ".join(part.lower().split()).strip(" .;:")
+            if part and part != "none":
+                parts.add(synonyms.get(part, part))
+        canonical[field] = ", ".join(sorted(parts))
+    return canonical
+
+
+class FastPathStats:
+    """Process-wide counters for how often the rule-based path avoids an LLM call"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.fallbacks = 0
+
+    def record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.fallbacks += 1
+
+    def get_stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.fallbacks
+            return {
+                "hits": self.hits,
+                "fallbacks": self.fallbacks,
+                "hit_rate": self.hits / total if total else 0.0
+            }
+
+
+fast_path_stats = FastPathStats()
+
+
+FIXTURES_PATH = os.path.join(os.path.dirname(__file__), "prompt_extraction_fixtures.json")
+
+
+def evaluate_fixtures(extractor: RuleBasedPromptExtractor,
+                      fixtures: List[Dict],
+                      llm_extract=None) -> Dict:
+    """
+    Run the rule-based extractor over ``fixtures`` and report the fast-path
+    hit rate, the prompts routed differently from the fixture's
+    ``fast_path`` flag, and how often the accepted results agree with the
+    fields the LLM returned for the same prompt (``llm``, recorded with
+    ``--record``), compared in canonical form. ``llm_extract`` re-queries
+    the LLM instead of trusting the recorded fields.
+    """
+    hits = 0
+    compared = 0
+    agreements = 0
+    misrouted = []
+    disagreements = []
+    for fixture in fixtures:
+        fields = extractor.extract(fixture["prompt"])
+        if "fast_path" in fixture and fixture["fast_path"] != (fields is not None):
+            misrouted.append({"prompt": fixture["prompt"], "fast_path": fields is not None})
+        if fields is None:
+            continue
+        hits += 1
+        expected = llm_extract(fixture["prompt"]) if llm_extract else fixture.get("llm")
+        if expected is None:
+            continue
+        compared += 1
+        rules, llm = canonicalize_lead_fields(fields), canonicalize_lead_fields(expected)
+        mismatched = [f for f in LEAD_FIELDS if rules[f] != llm[f]]
+        if mismatched:
+            disagreements.append({"prompt": fixture["prompt"], "fields": mismatched, "rules": fields,
+                                  "llm": expected})
+        else:
+            agreements += 1
+    return {
+        "fixtures": len(fixtures),
+        "fast_path_hits": hits,
+        "hit_rate": hits / len(fixtures) if fixtures else 0.0,
+        "misrouted": misrouted,
+        "hits_with_llm_output": compared,
+        "agreement_rate": agreements / compared if compared else None,
+        "disagreements": disagreements
+    }
+
+
+def record_llm_fields(fixtures: List[Dict], sambanova_api_key: str) -> None:
+    """Fill in each fixture's ``llm`` fields with UserPromptExtractor's LLM output"""
+    from services.user_prompt_extractor_service import UserPromptExtractor
+
+    # Deterministic output, and no fast path so every prompt reaches the model
+    extractor = UserPromptExtractor(sambanova_api_key, temperature=0.0)
+    extractor.rule_extractor = None
+    for fixture in fixtures:
+        fields = extractor.extract_lead_info(fixture["prompt"])
+        fixture["llm"] = {field: str(fields.get(field) or "") for field in LEAD_FIELDS}
+        fixture["llm_model"] = extractor.model_name
+
+
+def main():
+    """Report the fast path against the fixtures; with --record, re-record their LLM fields first"""
+    with open(FIXTURES_PATH) as f:
+        fixtures = json.load(f)
+    if "--record" in sys.argv[1:]:
+        api_key = EnvUtils().get_env("SAMBANOVA_API_KEY")
+        if not api_key:
+            print("SAMBANOVA_API_KEY is required to record LLM fields")
+            return
+        record_llm_fields(fixtures, api_key)
+        with open(FIXTURES_PATH, "w") as f:
+            json.dump(fixtures, f, indent=2)
+            f.write("\n")
+    report = evaluate_fixtures(RuleBasedPromptExtractor(), fixtures)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
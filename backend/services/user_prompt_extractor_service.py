@@ -1,5 +1,7 @@
 import os
+import copy
 import json
+import httpx
 import requests
 import sys
 
@@ -7,10 +9,16 @@ parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
 
+from services.rule_based_prompt_extractor import RuleBasedPromptExtractor, fast_path_stats
+from utils.async_http import AsyncHttpClientManager
 from utils.envutils import EnvUtils
+from utils.http_session import HttpSessionManager
+from utils.llm_cache import get_llm_cache
+from utils.response_cache import make_cache_key
+from utils.single_flight import get_async_single_flight, get_single_flight
 
 class UserPromptExtractor:
-    def __init__(self, sambanova_api_key: str):
+    def __init__(self, sambanova_api_key: str, temperature: float = None):
         """
         This class uses the raw requests approach (like a curl) 
         to call the SambaNova ChatCompletion endpoint,
@@ -20,11 +28,21 @@ class UserPromptExtractor:
         """
         self.env_utils = EnvUtils()
         self.api_key = sambanova_api_key
+        self.http = HttpSessionManager()
 
         # We'll use an example model name "gpt-4o-mini" 
         # as in your curl snippet. Adjust if needed:
         self.model_name = "Meta-Llama-3.1-8B-Instruct"  
         self.url = "https://api.sambanova.ai/v1/chat/completions"
+        # Completions are only cached when this is low enough to be deterministic
+        if temperature is None:
+            temperature = float(self.env_utils.get_env("EXTRACTOR_TEMPERATURE", 0.7))
+        self.temperature = temperature
+
+        # Prompts the gazetteers fully explain skip the LLM call entirely
+        self.rule_extractor = None
+        if str(self.env_utils.get_env("EXTRACTOR_FAST_PATH", "true")).lower() == "true":
+            self.rule_extractor = RuleBasedPromptExtractor()
 
     def extract_lead_info(self, prompt: str) -> dict:
         """
@@ -33,7 +51,65 @@ class UserPromptExtractor:
         We instruct the model to return JSON with keys:
           'industry', 'company_stage', 'geography', 'funding_stage', 'product'.
         """
+        fast_result = self._fast_path(prompt)
+        if fast_result is not None:
+            return fast_result
+
+        payload, headers = self._build_request(prompt)
+
+        try:
+            json_response = self._complete(payload, headers)
+        except requests.exceptions.RequestException as e:
+            print(f"HTTP error calling SambaNova ChatCompletion: {e}")
+            return self._empty_result()
+        except json.JSONDecodeError:
+            print("Error: Could not parse JSON from OpenAI response.")
+            return self._empty_result()
+
+        return self._parse_completion(json_response)
+
+    async def extract_lead_info_async(self, prompt: str) -> dict:
+        """
+        Async variant of extract_lead_info() that awaits the SambaNova call
+        through the shared httpx client instead of blocking the event loop.
+        """
+        fast_result = self._fast_path(prompt)
+        if fast_result is not None:
+            return fast_result
+
+        payload, headers = self._build_request(prompt)
 
+        try:
+            json_response = await self._acomplete(payload, headers)
+        except httpx.HTTPError as e:
+            print(f"HTTP error calling SambaNova ChatCompletion: {e}")
+            return self._empty_result()
+        except json.JSONDecodeError:
+            print("Error: Could not parse JSON from OpenAI response.")
+            return self._empty_result()
+
+        return self._parse_completion(json_response)
+
+    def _fast_path(self, prompt: str):
+        """Return the rule-based extraction when it explains the whole prompt, else None"""
+        if self.rule_extractor is None:
+            return None
+        result = self.rule_extractor.extract(prompt)
+        fast_path_stats.record(result is not None)
+        return result
+
+    @staticmethod
+    def _empty_result() -> dict:
+        return {
+            "industry": "",
+            "company_stage": "",
+            "geography": "",
+            "funding_stage": "",
+            "product": ""
+        }
+
+    def _build_request(self, prompt: str) -> tuple:
+        """Build the ChatCompletion payload and headers for ``prompt``"""
         # You can customize system/user messages to ensure the LLM returns only JSON
         system_message = (
             "You are an expert system that extracts structured JSON "
@@ -67,7 +143,7 @@ class UserPromptExtractor:
                 {"role": "system", "content": system_message},
                 {"role": "user", "content": user_message}
             ],
-            "temperature": 0.7  # or 0.0 if you want it more deterministic
+            "temperature": self.temperature
         }
 
         # Build headers
@@ -76,48 +152,14 @@ class UserPromptExtractor:
             "Authorization": f"Bearer {self.api_key}"
         }
 
-        try:
-            # Make the POST request
-            response = requests.post(
-                self.url,
-                headers=headers,
-                data=json.dumps(payload),
-                timeout=30
-            )
-            response.raise_for_status()
-        except requests.exceptions.RequestException as e:
-            print(f"HTTP error calling SambaNova ChatCompletion: {e}")
-            return {
-                "industry": "",
-                "company_stage": "",
-                "geography": "",
-                "funding_stage": "",
-                "product": ""
-            }
-
-        # Parse the JSON response
-        try:
-            json_response = response.json()
-        except json.JSONDecodeError:
-            print("Error: Could not parse JSON from OpenAI response.")
-            return {
-                "industry": "",
-                "company_stage": "",
-                "geography": "",
-                "funding_stage": "",
-                "product": ""
-            }
+        return payload, headers
 
+    def _parse_completion(self, json_response: dict) -> dict:
+        """Turn a ChatCompletion response into the five lead fields"""
         # Extract the content from the first choice
         if "choices" not in json_response or len(json_response["choices"]) == 0:
             print("Error: No choices found in OpenAI response.")
-            return {
-                "industry": "",
-                "company_stage": "",
-                "geography": "",
-                "funding_stage": "",
-                "product": ""
-            }
+            return self._empty_result()
 
         content = json_response["choices"][0]["message"]["content"].strip()
         content = content.replace("```json", "").replace("```", "").strip()
@@ -136,6 +178,112 @@ class UserPromptExtractor:
 
         return parsed
 
+    def _complete(self, payload: dict, headers: dict) -> dict:
+        """
+        POST the ChatCompletion payload and return the decoded JSON response.
+        Deterministic prompts may be answered from the completion cache, and
+        identical prompts already in flight on other threads share one call.
+        """
+        cache, cache_key = self._completion_cache(payload)
+        if cache is not None:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        json_response = self._coalesced_completion(payload, headers)
+        if cache is not None and json_response.get("choices"):
+            cache.set(cache_key, json_response)
+        return json_response
+
+    async def _acomplete(self, payload: dict, headers: dict) -> dict:
+        """Async variant of _complete() with the same caching and coalescing rules"""
+        cache, cache_key = self._completion_cache(payload)
+        if cache is not None:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        json_response = await self._acoalesced_completion(payload, headers)
+        if cache is not None and json_response.get("choices"):
+            cache.set(cache_key, json_response)
+        return json_response
+
+    def _completion_cache(self, payload: dict) -> tuple:
+        """
+        Return (cache, key) when this completion may be served from the LLM
+        completion cache, else (None, None). Calls above LLM_CACHE_MAX_TEMPERATURE
+        (such as the default 0.7) always reach the model.
+        """
+        cache = get_llm_cache()
+        if cache is None:
+            return None, None
+        if not cache.is_cacheable(payload.get("temperature")):
+            cache.record_bypass()
+            return None, None
+        return cache, cache.make_key(
+            model=payload["model"],
+            temperature=payload["temperature"],
+            messages=payload["messages"]
+        )
+
+    def _coalesced_completion(self, payload: dict, headers: dict) -> dict:
+        ran_here = []
+
+        def post_completion():
+            ran_here.append(True)
+            return self._post_completion(payload, headers)
+
+        try:
+            json_response, shared = get_single_flight("sambanova").do(
+                make_cache_key(payload), post_completion
+            )
+        except (requests.exceptions.RequestException, json.JSONDecodeError):
+            if ran_here:
+                raise
+            # The leader's failure may be specific to its API key; retry with ours
+            return self._post_completion(payload, headers)
+        return copy.deepcopy(json_response) if shared else json_response
+
+    async def _acoalesced_completion(self, payload: dict, headers: dict) -> dict:
+        ran_here = []
+
+        async def post_completion():
+            ran_here.append(True)
+            return await self._apost_completion(payload, headers)
+
+        try:
+            json_response, shared = await get_async_single_flight("sambanova").do(
+                make_cache_key(payload), post_completion
+            )
+        except (httpx.HTTPError, json.JSONDecodeError):
+            if ran_here:
+                raise
+            return await self._apost_completion(payload, headers)
+        return copy.deepcopy(json_response) if shared else json_response
+
+    def _post_completion(self, payload: dict, headers: dict) -> dict:
+        # Make the POST request over the shared keep-alive session
+        response = self.http.post(
+            self.url,
+            api_key=self.api_key,
+            headers=headers,
+            data=json.dumps(payload),
+            timeout=30
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def _apost_completion(self, payload: dict, headers: dict) -> dict:
+        response = await AsyncHttpClientManager().post(
+            self.url,
+            api_key=self.api_key,
+            headers=headers,
+            content=json.dumps(payload),
+            timeout=30
+        )
+        response.raise_for_status()
+        return response.json()
+
 def main():
     extractor = UserPromptExtractor()
     prompt = "Generate leads for AI Chip Startups in Silicon Valley"
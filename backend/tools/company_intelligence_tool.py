@@ -14,6 +14,9 @@ if parent_dir not in sys.path:
 # Now referencing the new Exa-based service
 from services.company_research_service import CompanyIntelligenceService
 
+# Accepted company_stage values (empty or None also means "any")
+VALID_COMPANY_STAGES = ["startup", "smb", "enterprise", "growing", "none", ""]
+
 class CompanyIntelligenceTool(BaseTool):
     model_config = ConfigDict(arbitrary_types_allowed=True)
     
@@ -40,10 +43,9 @@ class CompanyIntelligenceTool(BaseTool):
         """
         try:
             # Accept empty or None for the optional fields
-            valid_stages = ["startup", "smb", "enterprise", "growing", "none", ""]
-            if company_stage and company_stage.lower() not in valid_stages:
+            if company_stage and company_stage.lower() not in VALID_COMPANY_STAGES:
                 raise ValueError(
-                    f"Invalid company_stage. Must be one of {valid_stages}."
+                    f"Invalid company_stage. Must be one of {VALID_COMPANY_STAGES}."
                 )
 
             # Prepare parameters
@@ -1,12 +1,72 @@
 # file: tools/exa_dev_tool.py
 
 import os
+import sys
+import copy
 import json
+import threading
+import httpx
 import requests
-from typing import Any, Type
+from typing import Any, Optional, Tuple, Type
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
 
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from utils.async_http import AsyncHttpClientManager
+from utils.envutils import EnvUtils
+from utils.http_session import HttpSessionManager
+from utils.instrumentation import BYTES_BUCKETS, Span, get_histogram_store, instrument
+from utils.response_cache import TieredCache, make_cache_key
+from utils.single_flight import get_async_single_flight, get_single_flight
+
+EXA_SEARCH_URL = "https://api.exa.ai/search"
+
+# Per-category TTLs in seconds: company profiles change slowly, news does not
+EXA_CACHE_MEMORY_TTLS = {"company": 6 * 3600, "news": 5 * 60}
+EXA_CACHE_DISK_TTLS = {"company": 3 * 24 * 3600, "news": 10 * 60}
+
+_exa_cache: Optional[TieredCache] = None
+_exa_cache_lock = threading.Lock()
+
+
+def get_exa_cache() -> Optional[TieredCache]:
+    """
+    Return the process-wide Exa response cache, or None if EXA_CACHE_ENABLED
+    is false. TTL overrides are JSON objects mapping category to seconds.
+    """
+    global _exa_cache
+    with _exa_cache_lock:
+        if _exa_cache is None:
+            config = EnvUtils().get_config({
+                "EXA_CACHE_ENABLED": "true",
+                "EXA_CACHE_PATH": os.path.join(parent_dir, ".cache", "exa_cache.sqlite"),
+                "EXA_CACHE_MEMORY_ENTRIES": 1000,
+                "EXA_CACHE_DISK_ENTRIES": 20000,
+                "EXA_CACHE_MEMORY_TTLS": "",
+                "EXA_CACHE_DISK_TTLS": ""
+            })
+            if str(config["EXA_CACHE_ENABLED"]).lower() != "true":
+                return None
+            memory_ttls = dict(EXA_CACHE_MEMORY_TTLS)
+            disk_ttls = dict(EXA_CACHE_DISK_TTLS)
+            try:
+                memory_ttls.update(json.loads(config["EXA_CACHE_MEMORY_TTLS"] or "{}"))
+                disk_ttls.update(json.loads(config["EXA_CACHE_DISK_TTLS"] or "{}"))
+            except json.JSONDecodeError as e:
+                print(f"Ignoring invalid Exa cache TTL override: {e}")
+            _exa_cache = TieredCache(
+                name="exa",
+                db_path=config["EXA_CACHE_PATH"] or None,
+                memory_max_entries=int(config["EXA_CACHE_MEMORY_ENTRIES"]),
+                disk_max_entries=int(config["EXA_CACHE_DISK_ENTRIES"]),
+                memory_ttls=memory_ttls,
+                disk_ttls=disk_ttls
+            )
+        return _exa_cache
+
 class ExaDevToolSchema(BaseModel):
     search_query: str = Field(..., description="Search query for Exa semantic search.")
     search_type: str = Field(default="auto", description="Search type: 'auto', 'neural', etc.")
@@ -15,6 +75,8 @@ class ExaDevToolSchema(BaseModel):
     text: bool = Field(default=True, description="Whether to retrieve the 'text' field")
     summary: bool = Field(default=True, description="Whether to retrieve the 'summary' field")
     livecrawl: str = Field(default="always", description="Use 'always' for fresh results")
+    use_cache: bool = Field(default=True, description="Serve identical searches from the response cache")
+    start_published_date: Optional[str] = Field(default=None, description="Only return results published after this ISO 8601 date")
 
 class ExaDevTool(BaseTool):
     name: str = "Exa Search Tool"
@@ -22,6 +84,95 @@ class ExaDevTool(BaseTool):
     args_schema = ExaDevToolSchema
 
     def _run(self, **kwargs: Any) -> Any:
+        payload, cache, request_key = self._prepare_request(kwargs)
+        with instrument("tool", "exa_search", category=payload["category"]) as span:
+            result = self._search(payload, cache, request_key, kwargs, span)
+            self._record_payload(span, payload, result)
+            return result
+
+    def _search(self, payload: dict, cache: Optional[TieredCache], request_key: str, kwargs: dict, span: Span) -> Any:
+        api_key = kwargs.get("api_key")
+        timeout = kwargs.get("timeout", 30)
+
+        if cache is not None:
+            cached = cache.get(request_key)
+            if cached is not None:
+                span.set("source", "cache")
+                return cached
+
+        # Identical searches already in flight on other threads share one upstream call
+        result, shared = get_single_flight("exa").do(
+            request_key, self._post_search, payload, api_key, timeout
+        )
+        span.set("source", "shared" if shared else "exa")
+        if shared:
+            if isinstance(result, dict) and "error" in result:
+                # The leader's failure may be specific to its API key; retry with ours
+                span.increment("retries")
+                return self._post_search(payload, api_key, timeout)
+            return copy.deepcopy(result)
+
+        if cache is not None and isinstance(result, dict) and "error" not in result:
+            cache.set(request_key, result, payload["category"])
+        return result
+
+    async def arun(self, **kwargs: Any) -> Any:
+        """
+        Async variant of run(): same payload, cache and coalescing rules, but
+        the request goes through the shared httpx.AsyncClient pool.
+        """
+        payload, cache, request_key = self._prepare_request(kwargs)
+        with instrument("tool", "exa_search", category=payload["category"]) as span:
+            result = await self._asearch(payload, cache, request_key, kwargs, span)
+            self._record_payload(span, payload, result)
+            return result
+
+    async def _asearch(self,
+                       payload: dict,
+                       cache: Optional[TieredCache],
+                       request_key: str,
+                       kwargs: dict,
+                       span: Span) -> Any:
+        api_key = kwargs.get("api_key")
+        timeout = kwargs.get("timeout", 30)
+
+        if cache is not None:
+            cached = await cache.aget(request_key)
+            if cached is not None:
+                span.set("source", "cache")
+                return cached
+
+        result, shared = await get_async_single_flight("exa").do(
+            request_key, self._apost_search, payload, api_key, timeout
+        )
+        span.set("source", "shared" if shared else "exa")
+        if shared:
+            if isinstance(result, dict) and "error" in result:
+                span.increment("retries")
+                return await self._apost_search(payload, api_key, timeout)
+            return copy.deepcopy(result)
+
+        if cache is not None and isinstance(result, dict) and "error" not in result:
+            await cache.aset(request_key, result, payload["category"])
+        return result
+
+    @staticmethod
+    def _record_payload(span: Span, payload: dict, result: Any) -> None:
+        """Attach request/response sizes and the result count to the tool span"""
+        request_bytes = len(json.dumps(payload))
+        response_bytes = len(json.dumps(result, default=str))
+        span.set("request_bytes", request_bytes)
+        span.set("response_bytes", response_bytes)
+        if isinstance(result, dict):
+            span.set("results", len(result.get("results", [])))
+            if "error" in result:
+                span.error = result["error"]
+        store = get_histogram_store()
+        store.observe("tool_payload_bytes", request_bytes, {"name": "exa_search", "direction": "input"}, BYTES_BUCKETS)
+        store.observe("tool_payload_bytes", response_bytes, {"name": "exa_search", "direction": "output"}, BYTES_BUCKETS)
+
+    def _prepare_request(self, kwargs: dict) -> Tuple[dict, Optional[TieredCache], str]:
+        """Build the Exa payload and decide whether the response cache applies"""
         search_query = kwargs.get("search_query")
         search_type = kwargs.get("search_type", "auto")
         category = kwargs.get("category", "company")
@@ -29,7 +180,8 @@ class ExaDevTool(BaseTool):
         #text = kwargs.get("text", True)
         summary = kwargs.get("summary", True)
         livecrawl = kwargs.get("livecrawl", "always")
-        api_key = kwargs.get("api_key")
+        use_cache = kwargs.get("use_cache", True)
+        start_published_date = kwargs.get("start_published_date")
 
         payload = {
             "query": search_query,
@@ -43,19 +195,48 @@ class ExaDevTool(BaseTool):
                 "livecrawl": livecrawl
             }
         }
+        if start_published_date:
+            payload["startPublishedDate"] = start_published_date
 
+        # livecrawl="always" only forces a cache bypass when EXA_CACHE_LIVECRAWL_BYPASS
+        # is set; otherwise it is just part of the cache key.
+        cache = get_exa_cache()
+        livecrawl_bypass = livecrawl == "always" and \
+            str(EnvUtils().get_env("EXA_CACHE_LIVECRAWL_BYPASS", "false")).lower() == "true"
+        if cache is not None and (not use_cache or livecrawl_bypass):
+            cache.record_bypass()
+            cache = None
+        return payload, cache, make_cache_key(payload)
 
-        headers = {
+    @staticmethod
+    def _headers(api_key: Optional[str]) -> dict:
+        return {
             "accept": "application/json",
             "content-type": "application/json",
             "x-api-key": api_key
         }
 
+    def _post_search(self, payload: dict, api_key: Optional[str], timeout: float) -> Any:
         try:
-            response = requests.post("https://api.exa.ai/search", headers=headers, json=payload, timeout=30)
+            # Pooled keep-alive session shared by every service in the process
+            response = HttpSessionManager().post(
+                EXA_SEARCH_URL, api_key=api_key, headers=self._headers(api_key), json=payload, timeout=timeout
+            )
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
             return {"error": f"Exa search request failed: {e}"}
         except json.JSONDecodeError:
-            return {"error": "Could not decode JSON from Exa response."}
\ No newline at end of file
+            return {"error": "Could not decode JSON from Exa response."}
+
+    async def _apost_search(self, payload: dict, api_key: Optional[str], timeout: float) -> Any:
+        try:
+            response = await AsyncHttpClientManager().post(
+                EXA_SEARCH_URL, api_key=api_key, headers=self._headers(api_key), json=payload, timeout=timeout
+            )
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPError as e:
+            return {"error": f"Exa search request failed: {e}"}
+        except json.JSONDecodeError:
+            return {"error": "Could not decode JSON from Exa response."}
@@ -0,0 +1,156 @@
+# file: utils/async_http.py
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+import httpx
+
+from utils.envutils import EnvUtils
+from utils.http_session import HttpSessionManager
+from utils.metrics import record_upstream_call
+
+
+class AsyncHttpClientManager:
+    """
+    Process-wide pool of keep-alive ``httpx.AsyncClient`` instances.
+
+    Async counterpart of HttpSessionManager: one client per (event loop, host,
+    API key), sized by the same HTTP_POOL_* settings, so a single worker can
+    keep many upstream requests in flight over reused connections. At most
+    HTTP_MAX_SESSIONS clients are kept; the least recently used one is
+    closed on its own loop once no request is using it.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._instance_lock:
+            if not cls._instance:
+                cls._instance = super(AsyncHttpClientManager, cls).__new__(cls)
+                cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        config = EnvUtils().get_config({
+            "HTTP_POOL_MAXSIZE": 20,
+            "HTTP_ASYNC_MAX_CONNECTIONS": 200,
+            "HTTP_KEEPALIVE_EXPIRY": 30,
+            "HTTP_MAX_SESSIONS": 64
+        })
+        self.limits = httpx.Limits(
+            max_connections=int(config["HTTP_ASYNC_MAX_CONNECTIONS"]),
+            max_keepalive_connections=int(config["HTTP_POOL_MAXSIZE"]),
+            keepalive_expiry=float(config["HTTP_KEEPALIVE_EXPIRY"])
+        )
+        self.max_clients = int(config["HTTP_MAX_SESSIONS"])
+        self._lock = threading.Lock()
+        # Each client is kept with the loop it belongs to, so eviction can close it there
+        self._clients: "OrderedDict[Tuple[int, str, str], Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]]" = \
+            OrderedDict()
+        self._in_flight: Dict[httpx.AsyncClient, int] = {}
+        self._evicted: Set[httpx.AsyncClient] = set()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._initialized = True
+
+    def _checkout(self, url: str, api_key: Optional[str] = None) -> httpx.AsyncClient:
+        """
+        The shared client for the running loop, host of ``url`` and
+        ``api_key``, held open for one request until _release()
+        """
+        loop = asyncio.get_running_loop()
+        host = urlparse(url).netloc
+        key = (id(loop), host, HttpSessionManager._fingerprint(api_key))
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is not None and not entry[1].is_closed:
+                client = entry[1]
+                self._clients.move_to_end(key)
+            else:
+                client = httpx.AsyncClient(limits=self.limits)
+                self._clients[key] = (loop, client)
+                self._clients.move_to_end(key)
+                self._stats.setdefault(host, {"requests": 0, "connections_opened": 0})
+                while len(self._clients) > self.max_clients:
+                    _, (old_loop, old_client) = self._clients.popitem(last=False)
+                    if self._in_flight.get(old_client):
+                        # Closed by its last request, see _release()
+                        self._evicted.add(old_client)
+                    else:
+                        self._close_on_loop(old_loop, old_client)
+            self._in_flight[client] = self._in_flight.get(client, 0) + 1
+        return client
+
+    async def _release(self, client: httpx.AsyncClient) -> None:
+        with self._lock:
+            self._in_flight[client] -= 1
+            if self._in_flight[client]:
+                return
+            del self._in_flight[client]
+            if client not in self._evicted:
+                return
+            self._evicted.discard(client)
+        await client.aclose()
+
+    @staticmethod
+    def _close_on_loop(loop: asyncio.AbstractEventLoop, client: httpx.AsyncClient) -> None:
+        """Schedule ``client.aclose()`` on the loop that owns its connections"""
+        if loop.is_closed():
+            # Nothing left to close: the connections went with the loop
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        except RuntimeError as e:
+            print(f"Could not close evicted HTTP client: {e}")
+
+    async def post(self, url: str, api_key: Optional[str] = None, **kwargs: Any) -> httpx.Response:
+        """POST through the pooled async client for (host, api_key)"""
+        client = self._checkout(url, api_key)
+        host_stats = self._stats[urlparse(url).netloc]
+
+        async def trace(event_name: str, info: Dict[str, Any]) -> None:
+            # httpcore only emits connect_tcp when it has to open a new connection
+            if event_name == "connection.connect_tcp.complete":
+                host_stats["connections_opened"] += 1
+
+        extensions = dict(kwargs.pop("extensions", None) or {})
+        extensions["trace"] = trace
+        host_stats["requests"] += 1
+        started = time.perf_counter()
+        try:
+            response = await client.post(url, extensions=extensions, **kwargs)
+        except httpx.HTTPError as e:
+            record_upstream_call(urlparse(url).netloc, type(e).__name__, time.perf_counter() - started)
+            raise
+        finally:
+            await self._release(client)
+        record_upstream_call(urlparse(url).netloc, response.status_code, time.perf_counter() - started)
+        return response
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Connection reuse counters, per host and in total"""
+        with self._lock:
+            hosts = {host: dict(stats) for host, stats in self._stats.items()}
+            active_clients = sum(1 for _, client in self._clients.values() if not client.is_closed)
+        totals = {"requests": 0, "connections_opened": 0}
+        for host_stats in hosts.values():
+            host_stats["connections_reused"] = max(0, host_stats["requests"] - host_stats["connections_opened"])
+            totals["requests"] += host_stats["requests"]
+            totals["connections_opened"] += host_stats["connections_opened"]
+        totals["connections_reused"] = max(0, totals["requests"] - totals["connections_opened"])
+        totals["active_clients"] = active_clients
+        return {"hosts": hosts, "totals": totals}
+
+    async def aclose(self) -> None:
+        """Close the clients that belong to the running event loop"""
+        loop_id = id(asyncio.get_running_loop())
+        with self._lock:
+            keys = [key for key in self._clients if key[0] == loop_id]
+            clients = [self._clients.pop(key)[1] for key in keys]
+        for client in clients:
+            await client.aclose()
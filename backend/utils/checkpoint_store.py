@@ -0,0 +1,144 @@
+# file: utils/checkpoint_store.py
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from utils.envutils import EnvUtils
+
+
+class CheckpointStore:
+    """
+    SQLite store of research runs and the output of each completed stage, so
+    a failed run can resume from its first incomplete stage. Stage outputs
+    must be JSON-serializable. API keys are never stored.
+    """
+
+    def __init__(self, db_path: str, retention_seconds: float = 7 * 24 * 3600):
+        self.db_path = db_path
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            " run_id TEXT PRIMARY KEY,"
+            " inputs TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " error TEXT,"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS stages ("
+            " run_id TEXT NOT NULL,"
+            " stage TEXT NOT NULL,"
+            " output TEXT NOT NULL,"
+            " completed_at REAL NOT NULL,"
+            " PRIMARY KEY (run_id, stage))"
+        )
+        self._conn.commit()
+
+    def create_run(self, inputs: Dict[str, Any], run_id: Optional[str] = None) -> str:
+        run_id = run_id or str(uuid.uuid4())
+        now = time.time()
+        with self._lock:
+            self._purge_expired()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO runs (run_id, inputs, status, error, created_at, updated_at) "
+                "VALUES (?, ?, 'running', NULL, ?, ?)",
+                (run_id, json.dumps(inputs), now, now)
+            )
+            self._conn.commit()
+        return run_id
+
+    def get_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT run_id, inputs, status, error, created_at, updated_at FROM runs WHERE run_id = ?",
+                (run_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "run_id": row[0],
+            "inputs": json.loads(row[1]),
+            "status": row[2],
+            "error": row[3],
+            "created_at": row[4],
+            "updated_at": row[5]
+        }
+
+    def set_status(self, run_id: str, status: str, error: Optional[str] = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE runs SET status = ?, error = ?, updated_at = ? WHERE run_id = ?",
+                (status, error, time.time(), run_id)
+            )
+            self._conn.commit()
+
+    def save_stage(self, run_id: str, stage: str, output: Any) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO stages (run_id, stage, output, completed_at) VALUES (?, ?, ?, ?)",
+                (run_id, stage, json.dumps(output), now)
+            )
+            self._conn.execute("UPDATE runs SET updated_at = ? WHERE run_id = ?", (now, run_id))
+            self._conn.commit()
+
+    def get_stages(self, run_id: str) -> Dict[str, Any]:
+        """Outputs of the completed stages of ``run_id``, keyed by stage name"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT stage, output FROM stages WHERE run_id = ? ORDER BY completed_at", (run_id,)
+            ).fetchall()
+        return {stage: json.loads(output) for stage, output in rows}
+
+    def _purge_expired(self) -> None:
+        """Drop runs older than the retention window; caller must hold the lock"""
+        cutoff = time.time() - self.retention_seconds
+        self._conn.execute(
+            "DELETE FROM stages WHERE run_id IN (SELECT run_id FROM runs WHERE updated_at < ?)", (cutoff,)
+        )
+        self._conn.execute("DELETE FROM runs WHERE updated_at < ?", (cutoff,))
+
+
+_checkpoint_store: Optional[CheckpointStore] = None
+_checkpoint_store_lock = threading.Lock()
+
+
+def get_checkpoint_store() -> Optional[CheckpointStore]:
+    """Return the process-wide checkpoint store, or None if CHECKPOINT_ENABLED is false"""
+    global _checkpoint_store
+    with _checkpoint_store_lock:
+        if _checkpoint_store is None:
+            config = EnvUtils().get_config({
+                "CHECKPOINT_ENABLED": "true",
+                "CHECKPOINT_PATH": os.path.join(parent_dir, ".cache", "checkpoints.sqlite"),
+                "CHECKPOINT_RETENTION_SECONDS": 7 * 24 * 3600
+            })
+            if str(config["CHECKPOINT_ENABLED"]).lower() != "true":
+                return None
+            try:
+                _checkpoint_store = CheckpointStore(
+                    db_path=config["CHECKPOINT_PATH"],
+                    retention_seconds=float(config["CHECKPOINT_RETENTION_SECONDS"])
+                )
+            except sqlite3.Error as e:
+                print(f"Failed to open checkpoint store: {e}")
+                return None
+        return _checkpoint_store
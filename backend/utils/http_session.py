@@ -0,0 +1,201 @@
+# file: utils/http_session.py
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.envutils import EnvUtils
+from utils.metrics import record_upstream_call
+
+
+class HttpSessionManager:
+    """
+    Process-wide pool of keep-alive HTTP sessions.
+
+    One ``requests.Session`` is kept per (host, API key) pair, so repeated calls
+    to Exa or SambaNova reuse already-open TCP/TLS connections instead of paying
+    a fresh handshake on every request.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        """
+        Singleton implementation so every service shares the same pools
+        """
+        with cls._instance_lock:
+            if not cls._instance:
+                cls._instance = super(HttpSessionManager, cls).__new__(cls)
+                cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        config = EnvUtils().get_config({
+            "HTTP_POOL_CONNECTIONS": 10,
+            "HTTP_POOL_MAXSIZE": 20,
+            "HTTP_MAX_SESSIONS": 64
+        })
+        self.pool_connections = int(config["HTTP_POOL_CONNECTIONS"])
+        self.pool_maxsize = int(config["HTTP_POOL_MAXSIZE"])
+        self.max_sessions = int(config["HTTP_MAX_SESSIONS"])
+
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[Tuple[str, str], requests.Session]" = OrderedDict()
+        self._request_counts: Dict[Tuple[str, str], int] = {}
+        self._in_use: Dict[requests.Session, int] = {}
+        self._evicted: Set[requests.Session] = set()
+        self._closed_stats = {"requests": 0, "connections_opened": 0}
+        self._initialized = True
+
+    @staticmethod
+    def _fingerprint(api_key: Optional[str]) -> str:
+        """Short, non-reversible label for an API key (never log the key itself)"""
+        if not api_key:
+            return "anonymous"
+        return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:8]
+
+    def _new_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _checkout(self, url: str, api_key: Optional[str] = None) -> requests.Session:
+        """
+        Return the shared session for the host of ``url`` and ``api_key``,
+        creating it on first use, held for one request until _release().
+        Least recently used sessions are dropped once more than
+        HTTP_MAX_SESSIONS distinct pairs are active, and closed as soon as
+        no other thread is still sending through them.
+        """
+        key = (urlparse(url).netloc, self._fingerprint(api_key))
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is not None:
+                self._sessions.move_to_end(key)
+            else:
+                session = self._new_session()
+                self._sessions[key] = session
+                self._request_counts[key] = 0
+                while len(self._sessions) > self.max_sessions:
+                    old_key, old_session = self._sessions.popitem(last=False)
+                    old_stats = self._session_stats(old_key, old_session)
+                    self._closed_stats["requests"] += old_stats["requests"]
+                    self._closed_stats["connections_opened"] += old_stats["connections_opened"]
+                    self._request_counts.pop(old_key, None)
+                    if self._in_use.get(old_session):
+                        # Closed by its last request, see _release()
+                        self._evicted.add(old_session)
+                    else:
+                        old_session.close()
+            self._request_counts[key] += 1
+            self._in_use[session] = self._in_use.get(session, 0) + 1
+        return session
+
+    def _release(self, session: requests.Session) -> None:
+        with self._lock:
+            self._in_use[session] -= 1
+            if self._in_use[session]:
+                return
+            del self._in_use[session]
+            if session not in self._evicted:
+                return
+            self._evicted.discard(session)
+        session.close()
+
+    def post(self, url: str, api_key: Optional[str] = None, **kwargs: Any) -> requests.Response:
+        """POST through the pooled session for (host, api_key)"""
+        return self._send("post", url, api_key, **kwargs)
+
+    def get(self, url: str, api_key: Optional[str] = None, **kwargs: Any) -> requests.Response:
+        """GET through the pooled session for (host, api_key)"""
+        return self._send("get", url, api_key, **kwargs)
+
+    def _send(self, method: str, url: str, api_key: Optional[str], **kwargs: Any) -> requests.Response:
+        session = self._checkout(url, api_key)
+        try:
+            return self._timed(url, getattr(session, method), **kwargs)
+        finally:
+            self._release(session)
+
+    @staticmethod
+    def _timed(url: str, send: Any, **kwargs: Any) -> requests.Response:
+        """Send the request and record its latency and status for /metrics"""
+        host = urlparse(url).netloc
+        started = time.perf_counter()
+        try:
+            response = send(url, **kwargs)
+        except requests.exceptions.RequestException as e:
+            record_upstream_call(host, type(e).__name__, time.perf_counter() - started)
+            raise
+        record_upstream_call(host, response.status_code, time.perf_counter() - started)
+        return response
+
+    def _session_stats(self, key: Tuple[str, str], session: requests.Session) -> Dict[str, int]:
+        connections_opened = 0
+        adapters = {id(a): a for a in session.adapters.values()}
+        for adapter in adapters.values():
+            pools = adapter.poolmanager.pools
+            for pool_key in list(pools.keys()):
+                pool = pools.get(pool_key)
+                if pool is not None:
+                    connections_opened += getattr(pool, "num_connections", 0)
+        return {
+            "requests": self._request_counts.get(key, 0),
+            "connections_opened": connections_opened
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Connection reuse counters, per host and in total.
+
+        ``connections_reused`` is the number of requests that did not need a
+        new TCP/TLS handshake.
+        """
+        hosts: Dict[str, Dict[str, int]] = {}
+        with self._lock:
+            totals = dict(self._closed_stats)
+            for key, session in self._sessions.items():
+                stats = self._session_stats(key, session)
+                host_stats = hosts.setdefault(key[0], {"sessions": 0, "requests": 0, "connections_opened": 0})
+                host_stats["sessions"] += 1
+                host_stats["requests"] += stats["requests"]
+                host_stats["connections_opened"] += stats["connections_opened"]
+                totals["requests"] += stats["requests"]
+                totals["connections_opened"] += stats["connections_opened"]
+
+        for host_stats in hosts.values():
+            host_stats["connections_reused"] = max(0, host_stats["requests"] - host_stats["connections_opened"])
+        totals["connections_reused"] = max(0, totals["requests"] - totals["connections_opened"])
+        totals["active_sessions"] = sum(h["sessions"] for h in hosts.values())
+        return {"hosts": hosts, "totals": totals}
+
+    def close(self) -> None:
+        """
+        Close every pooled session (e.g. on application shutdown); sessions
+        a request is still sending through are closed when it finishes
+        """
+        with self._lock:
+            idle = []
+            for session in self._sessions.values():
+                if self._in_use.get(session):
+                    # Closed by its last request, see _release()
+                    self._evicted.add(session)
+                else:
+                    idle.append(session)
+            self._sessions.clear()
+            self._request_counts.clear()
+        for session in idle:
+            session.close()
@@ -0,0 +1,211 @@
+# file: utils/instrumentation.py
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from uuid import uuid4
+
+# Upper bounds of the histogram buckets for each kind of measurement
+SECONDS_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50)
+
+
+class Histogram:
+    """Fixed-bucket histogram; quantiles are estimated from bucket upper bounds"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(sorted(buckets))
+        # One extra slot for values above the last bound (+Inf)
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, value: float) -> None:
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.bucket_counts):
+            cumulative += bucket_count
+            if cumulative >= rank and bucket_count:
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                return min(upper, self.max)
+        return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        cumulative = 0
+        buckets = {}
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), self.bucket_counts):
+            cumulative += bucket_count
+            buckets["+Inf" if bound == float("inf") else bound] = cumulative
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+            "mean": self.sum / self.count if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": buckets
+        }
+
+
+class HistogramStore:
+    """In-process histograms keyed by metric name and label set"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[Tuple[Tuple[str, str], ...], Histogram]] = {}
+
+    def observe(self,
+                name: str,
+                value: float,
+                labels: Optional[Dict[str, Any]] = None,
+                buckets: Sequence[float] = SECONDS_BUCKETS) -> None:
+        key = tuple(sorted((k, str(v)) for k, v in (labels or {}).items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        with self._lock:
+            return {
+                name: [{"labels": dict(key), **histogram.snapshot()} for key, histogram in series.items()]
+                for name, series in self._histograms.items()
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+
+_histogram_store = HistogramStore()
+
+
+def get_histogram_store() -> HistogramStore:
+    return _histogram_store
+
+
+class Span:
+    """
+    One timed unit of work (a task, a tool call, ...) with counters and the
+    spans nested inside it. Children may finish on other threads.
+    """
+
+    def __init__(self, kind: str, name: str, labels: Dict[str, Any], parent: Optional["Span"]):
+        self.id = str(uuid4())
+        self.kind = kind
+        self.name = name
+        self.labels = labels
+        self.parent = parent
+        self.attributes: Dict[str, Any] = {}
+        self.children: List["Span"] = []
+        self.error: Optional[str] = None
+        self.start_time = datetime.now()
+        self.end_time: Optional[datetime] = None
+        self.duration_seconds: Optional[float] = None
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self.attributes[key] = value
+
+    def increment(self, key: str, amount: float = 1) -> None:
+        with self._lock:
+            self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def _finish(self) -> None:
+        self.duration_seconds = time.monotonic() - self._started
+        self.end_time = datetime.now()
+        if self.parent is not None:
+            with self.parent._lock:
+                self.parent.children.append(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "id": self.id,
+                "kind": self.kind,
+                "name": self.name,
+                "labels": dict(self.labels),
+                "attributes": dict(self.attributes),
+                "error": self.error,
+                "start_time": self.start_time.isoformat(),
+                "end_time": self.end_time.isoformat() if self.end_time else None,
+                "duration_seconds": self.duration_seconds,
+                "children": [child.to_dict() for child in self.children]
+            }
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def instrument(kind: str, name: str, **labels: Any) -> Iterator[Span]:
+    """
+    Time the enclosed block as a ``kind`` span nested under the current one
+    and record its duration in the ``<kind>_duration_seconds`` histogram.
+    Worker threads only see the current span if they were started with
+    ``contextvars.copy_context()``.
+    """
+    span = Span(kind, name, labels, _current_span.get())
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        span._finish()
+        get_histogram_store().observe(
+            f"{kind}_duration_seconds", span.duration_seconds, {"name": name, **labels}, SECONDS_BUCKETS
+        )
+
+
+def record_step(step: Any) -> None:
+    """
+    Crew ``step_callback``: count agent steps and tool calls on the current
+    task span, with the size of each tool's input and output.
+    """
+    span = current_span()
+    if span is None:
+        return
+    span.increment("steps")
+    # Only AgentAction steps carry a tool name and its input
+    tool = getattr(step, "tool", None)
+    if tool is None or not hasattr(step, "tool_input"):
+        return
+    input_bytes = len(str(step.tool_input or "").encode("utf-8"))
+    output_bytes = len(str(getattr(step, "result", "") or "").encode("utf-8"))
+    span.increment("tool_calls")
+    span.increment(f"tool_calls.{tool}")
+    span.increment("tool_input_bytes", input_bytes)
+    span.increment("tool_output_bytes", output_bytes)
+    store = get_histogram_store()
+    store.observe("tool_payload_bytes", input_bytes, {"name": tool, "direction": "input"}, BYTES_BUCKETS)
+    store.observe("tool_payload_bytes", output_bytes, {"name": tool, "direction": "output"}, BYTES_BUCKETS)
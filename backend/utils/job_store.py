@@ -0,0 +1,325 @@
+# file: utils/job_store.py
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from utils.envutils import EnvUtils
+
+
+class JobStore:
+    """
+    Persistent job queue in SQLite. Jobs move queued -> running ->
+    completed | failed, and finished jobs are kept for ``retention_seconds``
+    so clients can collect results after reconnecting.
+
+    Every job belongs to the worker process that accepted it (its owner),
+    since only that process holds the job's credentials. Owners send
+    heartbeats so jobs of a process that is gone can be failed while
+    sibling processes sharing the database keep theirs.
+    """
+
+    def __init__(self, db_path: str, retention_seconds: float = 24 * 3600):
+        self.db_path = db_path
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " job_id TEXT PRIMARY KEY,"
+            " kind TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " stage TEXT,"
+            " payload TEXT NOT NULL,"
+            " result TEXT,"
+            " error TEXT,"
+            " run_id TEXT,"
+            " created_at REAL NOT NULL,"
+            " started_at REAL,"
+            " finished_at REAL,"
+            " owner TEXT)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "owner" not in columns:
+            # Databases created before jobs had owners
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_owners ("
+            " owner TEXT PRIMARY KEY,"
+            " heartbeat_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+        self._conn.commit()
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], owner: str) -> str:
+        job_id = str(uuid.uuid4())
+        with self._lock:
+            self._purge_expired()
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, kind, status, stage, payload, created_at, owner) "
+                "VALUES (?, ?, 'queued', 'queued', ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), time.time(), owner)
+            )
+            self._conn.commit()
+        return job_id
+
+    def claim_next(self, kind: str, owner: str) -> Optional[Dict[str, Any]]:
+        """Atomically move ``owner``'s oldest queued job of ``kind`` to running and return it"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT job_id FROM jobs WHERE kind = ? AND owner = ? AND status = 'queued' "
+                "ORDER BY created_at LIMIT 1",
+                (kind, owner)
+            ).fetchone()
+            if row is None:
+                return None
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'running', stage = 'starting', started_at = ? "
+                "WHERE job_id = ? AND status = 'queued'",
+                (time.time(), row[0])
+            )
+            self._conn.commit()
+            if cursor.rowcount == 0:
+                return None
+        return self.get(row[0])
+
+    def set_stage(self, job_id: str, stage: str) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET stage = ? WHERE job_id = ?", (stage, job_id))
+            self._conn.commit()
+
+    def set_run_id(self, job_id: str, run_id: Optional[str]) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET run_id = ? WHERE job_id = ?", (run_id, job_id))
+            self._conn.commit()
+
+    def complete(self, job_id: str, result: Any) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'completed', stage = 'completed', result = ?, finished_at = ? "
+                "WHERE job_id = ?",
+                (json.dumps(result), time.time(), job_id)
+            )
+            self._conn.commit()
+
+    def fail(self, job_id: str, error: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE job_id = ?",
+                (error, time.time(), job_id)
+            )
+            self._conn.commit()
+
+    def heartbeat(self, owner: str) -> None:
+        """Record that ``owner`` is alive"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO job_owners (owner, heartbeat_at) VALUES (?, ?) "
+                "ON CONFLICT (owner) DO UPDATE SET heartbeat_at = excluded.heartbeat_at",
+                (owner, time.time())
+            )
+            self._conn.commit()
+
+    def fail_orphaned(self, kind: str, error: str, owner_timeout: float) -> List[str]:
+        """
+        Fail every queued or running job of ``kind`` whose owner has not sent
+        a heartbeat for ``owner_timeout`` seconds (e.g. after a restart lost
+        their API keys); jobs of live owners are left alone.
+        """
+        cutoff = time.time() - owner_timeout
+        orphaned = (
+            "kind = ? AND status IN ('queued', 'running') AND (owner IS NULL OR owner NOT IN "
+            "(SELECT owner FROM job_owners WHERE heartbeat_at >= ?))"
+        )
+        with self._lock:
+            rows = self._conn.execute(f"SELECT job_id FROM jobs WHERE {orphaned}", (kind, cutoff)).fetchall()
+            if rows:
+                self._conn.execute(
+                    f"UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE {orphaned}",
+                    (error, time.time(), kind, cutoff)
+                )
+            self._conn.execute("DELETE FROM job_owners WHERE heartbeat_at < ?", (cutoff,))
+            self._conn.commit()
+        return [row[0] for row in rows]
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT job_id, kind, status, stage, payload, result, error, run_id, "
+                "created_at, started_at, finished_at FROM jobs WHERE job_id = ?",
+                (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row[0],
+            "kind": row[1],
+            "status": row[2],
+            "stage": row[3],
+            "payload": json.loads(row[4]),
+            "result": json.loads(row[5]) if row[5] is not None else None,
+            "error": row[6],
+            "run_id": row[7],
+            "created_at": row[8],
+            "started_at": row[9],
+            "finished_at": row[10]
+        }
+
+    def count(self, status: str) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)).fetchone()[0]
+
+    def _purge_expired(self) -> None:
+        """Drop finished jobs past the retention window; caller must hold the lock"""
+        self._conn.execute(
+            "DELETE FROM jobs WHERE status IN ('completed', 'failed') AND finished_at < ?",
+            (time.time() - self.retention_seconds,)
+        )
+
+
+class JobWorkerPool:
+    """
+    Fixed pool of worker threads that pull jobs of one kind from a JobStore.
+
+    Secrets (API keys) are handed over in memory at submit time and never
+    written to the store, so a pool only runs the jobs submitted to it: with
+    several server processes (``uvicorn --workers N``) sharing one store,
+    each claims only the jobs it owns. For the same reason queued and
+    running jobs do not survive a restart; once their process has missed
+    heartbeats for ``owner_timeout`` seconds they are marked failed.
+    ``handler(job, secrets, set_stage)`` returns the JSON-serializable job
+    result or raises.
+    """
+
+    def __init__(self,
+                 store: JobStore,
+                 kind: str,
+                 handler: Callable[[Dict[str, Any], Dict[str, str], Callable[[str], None]], Any],
+                 workers: int = 2,
+                 poll_interval: float = 1.0,
+                 heartbeat_interval: float = 10.0,
+                 owner_timeout: float = 60.0):
+        self.store = store
+        self.kind = kind
+        self.handler = handler
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.owner_timeout = owner_timeout
+        # Process id plus a boot token, unique even when a restarted process reuses the pid
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:12]}"
+        self._secrets: Dict[str, Dict[str, str]] = {}
+        self._secrets_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        self._stopping.clear()
+        self._heartbeat()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"{self.kind}-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        # Its own thread, so owning only long-running jobs does not look like a dead process
+        thread = threading.Thread(target=self._keep_alive, name=f"{self.kind}-heartbeat", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop taking new jobs; running jobs finish in their daemon threads"""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def submit(self, payload: Dict[str, Any], secrets: Dict[str, str]) -> str:
+        job_id = self.store.enqueue(self.kind, payload, self.owner)
+        with self._secrets_lock:
+            self._secrets[job_id] = secrets
+        self._wakeup.set()
+        return job_id
+
+    def _work(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                job = self.store.claim_next(self.kind, self.owner)
+            except sqlite3.Error as e:
+                print(f"Failed to claim {self.kind} job: {e}")
+                job = None
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            self._run(job)
+
+    def _keep_alive(self) -> None:
+        while not self._stopping.wait(self.heartbeat_interval):
+            self._heartbeat()
+
+    def _heartbeat(self) -> None:
+        """Refresh this process's heartbeat and fail the jobs of processes that are gone"""
+        try:
+            self.store.heartbeat(self.owner)
+            # Jobs of a dead process cannot run: their keys were only in its memory
+            orphaned = self.store.fail_orphaned(
+                self.kind,
+                "Job interrupted by a server restart. Resubmit it, or resume with its run_id.",
+                self.owner_timeout
+            )
+        except sqlite3.Error as e:
+            print(f"Failed to record {self.kind} worker heartbeat: {e}")
+            return
+        if orphaned:
+            print(f"Marked {len(orphaned)} interrupted {self.kind} jobs as failed")
+
+    def _run(self, job: Dict[str, Any]) -> None:
+        job_id = job["job_id"]
+        with self._secrets_lock:
+            secrets = self._secrets.pop(job_id, None)
+        try:
+            if secrets is None:
+                raise RuntimeError("Job credentials are no longer available. Resubmit the job.")
+            result = self.handler(job, secrets, lambda stage: self.store.set_stage(job_id, stage))
+            self.store.complete(job_id, result)
+        except Exception as e:
+            print(f"{self.kind} job {job_id} failed: {e}")
+            try:
+                self.store.fail(job_id, str(e))
+            except sqlite3.Error as store_error:
+                print(f"Failed to record failure of job {job_id}: {store_error}")
+
+
+_job_store: Optional[JobStore] = None
+_job_store_lock = threading.Lock()
+
+
+def get_job_store() -> JobStore:
+    """Return the process-wide job store"""
+    global _job_store
+    with _job_store_lock:
+        if _job_store is None:
+            config = EnvUtils().get_config({
+                "JOB_STORE_PATH": os.path.join(parent_dir, ".cache", "jobs.sqlite"),
+                "JOB_RETENTION_SECONDS": 24 * 3600
+            })
+            _job_store = JobStore(
+                db_path=config["JOB_STORE_PATH"],
+                retention_seconds=float(config["JOB_RETENTION_SECONDS"])
+            )
+        return _job_store
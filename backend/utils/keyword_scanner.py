@@ -0,0 +1,145 @@
+# file: utils/keyword_scanner.py
+
+import os
+import random
+import re
+import sys
+import time
+from typing import Dict, List, Tuple
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+# Lexicon name -> {keyword: label}
+Lexicons = Dict[str, Dict[str, str]]
+
+
+class KeywordScanner:
+    """
+    Finds every keyword of several lexicons in one pass over a text.
+
+    All keywords are compiled into a single alternation regex (longest
+    first) that walks the lowercased text once. After each match the search
+    resumes one character after the match start, so overlapping keywords are
+    found too; shorter keywords inside a match are implied by it. Matching
+    is case-insensitive substring matching, as with ``keyword in text``. A
+    scan returns bit masks (bit i = keyword i occurs) that any number of
+    lexicon checks can share without touching the text again.
+    """
+
+    def __init__(self, lexicons: Lexicons):
+        self.lexicons = {name: dict(entries) for name, entries in lexicons.items()}
+        self.keywords: List[str] = sorted({
+            keyword.lower() for entries in self.lexicons.values() for keyword in entries
+        })
+        bit = {keyword: i for i, keyword in enumerate(self.keywords)}
+
+        # A match of ``keyword`` also counts for every keyword inside it
+        self._implied: Dict[str, int] = {}
+        for keyword in self.keywords:
+            mask = 0
+            for other in self.keywords:
+                if other in keyword:
+                    mask |= 1 << bit[other]
+            self._implied[keyword] = mask
+
+        self._lexicon_masks: Dict[str, int] = {}
+        self._labels: Dict[str, List[Tuple[int, str]]] = {}
+        for name, entries in self.lexicons.items():
+            labels = [(1 << bit[keyword.lower()], label) for keyword, label in entries.items()]
+            self._labels[name] = labels
+            self._lexicon_masks[name] = sum({mask for mask, _ in labels})
+
+        alternation = "|".join(re.escape(keyword) for keyword in sorted(self.keywords, key=len, reverse=True))
+        # Lowercasing once beats re.IGNORECASE, which disables the literal prefix scan
+        self._pattern = re.compile(alternation) if self.keywords else None
+
+    def scan(self, text: str) -> int:
+        """Mask of the keywords in ``text``"""
+        mask = 0
+        if self._pattern is None:
+            return mask
+        text = text.lower()
+        search = self._pattern.search
+        match = search(text)
+        while match is not None:
+            mask |= self._implied[match.group()]
+            match = search(text, match.start() + 1)
+        return mask
+
+    def matches(self, mask: int, lexicon: str) -> bool:
+        """Whether ``mask`` contains any keyword of ``lexicon``"""
+        return bool(mask & self._lexicon_masks.get(lexicon, 0))
+
+    def labels(self, mask: int, lexicon: str) -> List[str]:
+        """Labels of the ``lexicon`` keywords in ``mask``, in lexicon order, without repeats"""
+        found: List[str] = []
+        for bit, label in self._labels.get(lexicon, ()):
+            if mask & bit and label not in found:
+                found.append(label)
+        return found
+
+
+def _naive_scan(articles: List[Tuple[str, str]], lexicons: Lexicons) -> List[Dict[str, set]]:
+    """What the aggregators did before: lowercase and scan each article once per lexicon"""
+    results = []
+    for title, summary in articles:
+        found = {}
+        for name, entries in lexicons.items():
+            text = f"{title} {summary}".lower()
+            found[name] = {entries[keyword] for keyword in entries if keyword in text}
+        results.append(found)
+    return results
+
+
+def _benchmark(label: str, lexicons: Lexicons, articles: List[Tuple[str, str]]) -> None:
+    started = time.perf_counter()
+    expected = _naive_scan(articles, lexicons)
+    naive_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    scanner = KeywordScanner(lexicons)
+    compile_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    scanned = [scanner.scan(f"{title} {summary}") for title, summary in articles]
+    scan_seconds = time.perf_counter() - started
+
+    mismatches = 0
+    for found, mask in zip(expected, scanned):
+        for name in lexicons:
+            if set(scanner.labels(mask, name)) != found[name]:
+                mismatches += 1
+
+    print(f"{label}: {len(articles)} articles, {len(scanner.keywords)} keywords in {len(lexicons)} lexicons")
+    print(f"  per-lexicon scans: {naive_seconds * 1000:.0f} ms")
+    print(f"  single pass:       {scan_seconds * 1000:.0f} ms (+{compile_seconds * 1000:.1f} ms compile)")
+    print(f"  mismatches:        {mismatches}")
+
+
+def main():
+    """Benchmark the single-pass scan against per-lexicon scans on 10k synthetic articles"""
+    from services.financial_analysis_service import NEWS_LEXICONS
+
+    rng = random.Random(3)
+    filler = [f"word{i}" for i in range(2000)]
+
+    def corpus(keywords: List[str]) -> List[Tuple[str, str]]:
+        articles = []
+        for _ in range(10000):
+            title = " ".join(rng.choice(filler if rng.random() > 0.1 else keywords) for _ in range(10))
+            summary = " ".join(rng.choice(filler if rng.random() > 0.05 else keywords) for _ in range(60))
+            articles.append((title.title(), summary))
+        return articles
+
+    keywords = [keyword for entries in NEWS_LEXICONS.values() for keyword in entries]
+    _benchmark("default lexicons", NEWS_LEXICONS, corpus(keywords))
+
+    # Larger lexicons, e.g. loaded from NEWS_LEXICONS_PATH
+    large = {f"lexicon{i}": {f"term{i}x{j}": f"label {i}" for j in range(50)} for i in range(8)}
+    keywords = [keyword for entries in large.values() for keyword in entries]
+    _benchmark("large lexicons", large, corpus(keywords))
+
+
+if __name__ == "__main__":
+    main()
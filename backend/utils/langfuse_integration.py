@@ -1,18 +1,28 @@
 import os
+import atexit
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 import json
 from uuid import uuid4
 from langfuse import Langfuse
 from utils.envutils import EnvUtils
+from utils.telemetry_exporter import HttpIngestionSink, LangfuseClientSink, TelemetryExporter, make_event
+from utils.trace_sampler import TailSampler
 
 
 class LangfuseIntegration:
     """
-    Langfuse integration for CrewAI agents to track and log agent executions
+    Langfuse integration for CrewAI agents to track and log agent executions.
+
+    Every log call only queues an event on a background TelemetryExporter,
+    so a slow Langfuse host never adds to request latency. Events are held
+    per trace until ``end_trace`` and only exported if the TailSampler keeps
+    the trace.
     """
     _instance = None
     _langfuse_client = None
+    _exporter = None
+    _sampler = None
     
     def __new__(cls):
         if not cls._instance:
@@ -20,7 +30,7 @@ class LangfuseIntegration:
         return cls._instance
     
     def __init__(self):
-        if self._langfuse_client is None:
+        if self._langfuse_client is None and self._exporter is None:
             self._initialize_langfuse()
     
     def _initialize_langfuse(self) -> None:
@@ -30,14 +40,20 @@ class LangfuseIntegration:
         langfuse_public_key = env_utils.get_env('LANGFUSE_PUBLIC_KEY')
         langfuse_secret_key = env_utils.get_env('LANGFUSE_SECRET_KEY')
         langfuse_host = env_utils.get_env('LANGFUSE_HOST', 'https://cloud.langfuse.com')
-        
-        if langfuse_public_key and langfuse_secret_key:
+        # Send batches straight to an ingestion endpoint (e.g. utils/telemetry_stub.py) instead of the SDK
+        export_endpoint = env_utils.get_env('LANGFUSE_EXPORT_ENDPOINT')
+
+        if export_endpoint:
+            self._start_exporter(HttpIngestionSink(export_endpoint, langfuse_public_key, langfuse_secret_key))
+            print(f"Langfuse events will be exported to {export_endpoint}")
+        elif langfuse_public_key and langfuse_secret_key:
             try:
                 self._langfuse_client = Langfuse(
                     public_key=langfuse_public_key,
                     secret_key=langfuse_secret_key,
                     host=langfuse_host
                 )
+                self._start_exporter(LangfuseClientSink(self._langfuse_client))
                 print("Langfuse client initialized successfully")
             except Exception as e:
                 print(f"Failed to initialize Langfuse client: {e}")
@@ -46,9 +62,38 @@ class LangfuseIntegration:
             print("Langfuse credentials not found, running without Langfuse tracking")
             self._langfuse_client = None
     
+    def _start_exporter(self, sink) -> None:
+        config = EnvUtils().get_config({
+            "TELEMETRY_QUEUE_SIZE": 10000,
+            "TELEMETRY_BATCH_SIZE": 100,
+            "TELEMETRY_FLUSH_INTERVAL": 2.0,
+            "TELEMETRY_DROP_POLICY": "drop_newest",
+            "TELEMETRY_SHUTDOWN_TIMEOUT": 10.0,
+            "TRACE_SAMPLE_RATE": 1.0,
+            "TRACE_SLOW_THRESHOLD_SECONDS": 30.0,
+            "TRACE_BUFFER_MAX_TRACES": 1000,
+            "TRACE_BUFFER_MAX_EVENTS": 200
+        })
+        LangfuseIntegration._exporter = TelemetryExporter(
+            sink=sink,
+            max_queue_size=int(config["TELEMETRY_QUEUE_SIZE"]),
+            batch_size=int(config["TELEMETRY_BATCH_SIZE"]),
+            flush_interval=float(config["TELEMETRY_FLUSH_INTERVAL"]),
+            drop_policy=config["TELEMETRY_DROP_POLICY"]
+        )
+        LangfuseIntegration._sampler = TailSampler(
+            export=self._exporter.export,
+            sample_rate=float(config["TRACE_SAMPLE_RATE"]),
+            slow_threshold_seconds=float(config["TRACE_SLOW_THRESHOLD_SECONDS"]),
+            max_traces=int(config["TRACE_BUFFER_MAX_TRACES"]),
+            max_events_per_trace=int(config["TRACE_BUFFER_MAX_EVENTS"])
+        )
+        self._shutdown_timeout = float(config["TELEMETRY_SHUTDOWN_TIMEOUT"])
+        atexit.register(self.shutdown)
+
     def is_enabled(self) -> bool:
         """Check if Langfuse tracking is enabled"""
-        return self._langfuse_client is not None
+        return self._exporter is not None
     
     def create_trace(self, 
                     name: str, 
@@ -60,12 +105,12 @@ class LangfuseIntegration:
         
         try:
             trace_id = str(uuid4())
-            trace = self._langfuse_client.trace(
-                id=trace_id,
-                name=name,
-                userId=user_id,
-                metadata=metadata or {}
-            )
+            self._sampler.start(trace_id, make_event("trace-create", {
+                "id": trace_id,
+                "name": name,
+                "userId": user_id,
+                "metadata": dict(metadata or {})
+            }))
             return trace_id
         except Exception as e:
             print(f"Failed to create Langfuse trace: {e}")
@@ -82,18 +127,18 @@ class LangfuseIntegration:
             return
         
         try:
-            generation = self._langfuse_client.generation(
-                trace_id=trace_id,
-                name=f"agent_{agent_name}",
-                input=input_data,
-                output=output_data,
-                metadata={
+            self._sampler.add(trace_id, make_event("generation-create", {
+                "id": str(uuid4()),
+                "traceId": trace_id,
+                "name": f"agent_{agent_name}",
+                "input": input_data,
+                "output": output_data,
+                "metadata": {
                     'agent_name': agent_name,
                     'timestamp': datetime.now().isoformat(),
                     **(metadata or {})
                 }
-            )
-            generation.end()
+            }))
         except Exception as e:
             print(f"Failed to log agent execution to Langfuse: {e}")
     
@@ -108,21 +153,51 @@ class LangfuseIntegration:
             return
         
         try:
-            span = self._langfuse_client.span(
-                trace_id=trace_id,
-                name=f"task_{task_name}",
-                input=input_data,
-                output=output_data,
-                metadata={
+            self._sampler.add(trace_id, make_event("span-create", {
+                "id": str(uuid4()),
+                "traceId": trace_id,
+                "name": f"task_{task_name}",
+                "input": input_data,
+                "output": output_data,
+                "metadata": {
                     'task_name': task_name,
                     'timestamp': datetime.now().isoformat(),
                     **(metadata or {})
                 }
-            )
-            span.end()
+            }))
         except Exception as e:
             print(f"Failed to log task execution to Langfuse: {e}")
     
+    def log_span(self,
+                 trace_id: str,
+                 span_id: str,
+                 name: str,
+                 start_time: datetime,
+                 end_time: Optional[datetime],
+                 metadata: Optional[Dict[str, Any]] = None,
+                 parent_id: Optional[str] = None,
+                 error: Optional[str] = None) -> None:
+        """Log a timed span, nested under ``parent_id`` when given"""
+        if not self.is_enabled() or not trace_id:
+            return
+
+        try:
+            body = {
+                "id": span_id,
+                "traceId": trace_id,
+                "parentObservationId": parent_id,
+                "name": name,
+                "startTime": start_time.isoformat(),
+                "endTime": end_time.isoformat() if end_time else None,
+                "metadata": metadata or {}
+            }
+            if error:
+                body["level"] = "ERROR"
+                body["statusMessage"] = error
+            self._sampler.add(trace_id, make_event("span-create", body), error=bool(error))
+        except Exception as e:
+            print(f"Failed to log span to Langfuse: {e}")
+
     def log_error(self, 
                  trace_id: str, 
                  error_message: str, 
@@ -132,23 +207,48 @@ class LangfuseIntegration:
             return
         
         try:
-            self._langfuse_client.score(
-                trace_id=trace_id,
-                name="error_occurred",
-                value=1,
-                comment=error_message,
-                metadata=context or {}
-            )
+            self._sampler.add(trace_id, make_event("score-create", {
+                "id": str(uuid4()),
+                "traceId": trace_id,
+                "name": "error_occurred",
+                "value": 1,
+                "comment": error_message,
+                "metadata": context or {}
+            }), error=True)
         except Exception as e:
             print(f"Failed to log error to Langfuse: {e}")
     
+    def end_trace(self, trace_id: Optional[str], error: bool = False) -> Optional[List[str]]:
+        """
+        Close a trace and export it if the sampler keeps it. Returns the keep
+        reasons ("error", "slow", "sampled") or None if the trace was dropped.
+        """
+        if not self.is_enabled() or not trace_id:
+            return None
+        try:
+            return self._sampler.end(trace_id, error=error)
+        except Exception as e:
+            print(f"Failed to end Langfuse trace: {e}")
+            return None
+
     def flush(self) -> None:
-        """Flush any pending Langfuse events"""
+        """Ask the exporter to send pending events now; does not wait for them"""
         if self.is_enabled():
-            try:
-                self._langfuse_client.flush()
-            except Exception as e:
-                print(f"Failed to flush Langfuse events: {e}")
+            self._exporter.flush()
+
+    def shutdown(self) -> None:
+        """Drain queued events before the process exits"""
+        if self.is_enabled():
+            self._sampler.end_all()
+            self._exporter.shutdown(self._shutdown_timeout)
+
+    def get_stats(self) -> Optional[Dict[str, Any]]:
+        """Exporter queue/drop counters and sampling decisions, or None when tracking is disabled"""
+        if not self.is_enabled():
+            return None
+        stats = self._exporter.get_stats()
+        stats["sampling"] = self._sampler.get_stats()
+        return stats
 
 
 def main():
@@ -182,8 +282,10 @@ def main():
                 output_data={"output": "test output"}
             )
             
-            langfuse.flush()
+            langfuse.end_trace(trace_id)
+            langfuse.shutdown()
             print(f"Test trace created with ID: {trace_id}")
+            print(f"Exporter stats: {langfuse.get_stats()}")
         else:
             print("Failed to create test trace")
     else:
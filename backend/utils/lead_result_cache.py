@@ -0,0 +1,160 @@
+# file: utils/lead_result_cache.py
+
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from utils.envutils import EnvUtils
+from utils.response_cache import TieredCache, make_cache_key
+
+
+class LeadResultCache:
+    """
+    Request-level cache of lead generation results, keyed on the canonical
+    extracted fields rather than the prompt text, so differently worded
+    prompts that extract to the same query share one entry. Prompt words
+    the extraction cannot account for are part of the key as well, so a
+    lossy extraction never merges two different queries.
+
+    Entries younger than ``fresh_seconds`` are served as-is. Entries up to
+    ``stale_seconds`` older than that are still served, but the caller is
+    expected to refresh them in the background (stale-while-revalidate).
+    """
+
+    def __init__(self, cache: TieredCache, fresh_seconds: float, stale_seconds: float):
+        self.cache = cache
+        self.fresh_seconds = fresh_seconds
+        self.stale_seconds = stale_seconds
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, Dict[str, int]] = {}
+        self._refreshing: set = set()
+        self._revalidation_stats = {"started": 0, "skipped": 0, "succeeded": 0, "failed": 0}
+
+    @staticmethod
+    def make_key(canonical_fields: Dict[str, str], prompt_words: Optional[List[str]] = None) -> str:
+        key = {"kind": "outreach", "fields": canonical_fields}
+        if prompt_words:
+            key["prompt_words"] = prompt_words
+        return make_cache_key(key)
+
+    def _count(self, endpoint: str, stat: str) -> None:
+        with self._lock:
+            counters = self._endpoints.setdefault(endpoint, {"hits": 0, "stale_hits": 0, "misses": 0})
+            counters[stat] += 1
+
+    def lookup(self, endpoint: str, key: str) -> Optional[Tuple[Any, bool]]:
+        """Return (value, is_stale) for a servable entry and count the lookup against ``endpoint``"""
+        entry = self.cache.get_entry(key)
+        if entry is None:
+            self._count(endpoint, "misses")
+            return None
+        value, stored_at = entry
+        is_stale = time.time() - stored_at > self.fresh_seconds
+        self._count(endpoint, "stale_hits" if is_stale else "hits")
+        return value, is_stale
+
+    def store(self, key: str, value: Any) -> None:
+        self.cache.set(key, value, category="outreach")
+
+    def revalidate(self,
+                   key: str,
+                   refresh: Callable[[], Any],
+                   submit: Callable[[Callable[[], None]], Any]) -> bool:
+        """
+        Recompute a stale entry with ``refresh`` via ``submit`` (e.g. a
+        scheduler's submit). At most one refresh per key runs at a time;
+        returns False when one is already running or ``submit`` refused.
+        """
+        with self._lock:
+            if key in self._refreshing:
+                self._revalidation_stats["skipped"] += 1
+                return False
+            self._refreshing.add(key)
+
+        def run() -> None:
+            try:
+                value = refresh()
+                if value:
+                    self.store(key, value)
+                outcome = "succeeded"
+            except Exception as e:
+                print(f"Background refresh of cached leads failed: {e}")
+                outcome = "failed"
+            with self._lock:
+                self._refreshing.discard(key)
+                self._revalidation_stats[outcome] += 1
+
+        try:
+            submit(run)
+        except Exception as e:
+            print(f"Skipping background refresh of cached leads: {e}")
+            with self._lock:
+                self._refreshing.discard(key)
+                self._revalidation_stats["skipped"] += 1
+            return False
+        with self._lock:
+            self._revalidation_stats["started"] += 1
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            endpoints = {}
+            for endpoint, counters in self._endpoints.items():
+                lookups = counters["hits"] + counters["stale_hits"] + counters["misses"]
+                endpoints[endpoint] = dict(counters)
+                endpoints[endpoint]["hit_ratio"] = (
+                    (counters["hits"] + counters["stale_hits"]) / lookups if lookups else 0.0
+                )
+            revalidations = dict(self._revalidation_stats)
+            revalidations["in_progress"] = len(self._refreshing)
+        return {
+            "fresh_seconds": self.fresh_seconds,
+            "stale_seconds": self.stale_seconds,
+            "endpoints": endpoints,
+            "revalidations": revalidations,
+            "storage": self.cache.get_stats()
+        }
+
+
+_lead_result_cache: Optional[LeadResultCache] = None
+_lead_result_cache_lock = threading.Lock()
+
+
+def get_lead_result_cache() -> Optional[LeadResultCache]:
+    """Return the process-wide lead result cache, or None if LEAD_CACHE_ENABLED is false"""
+    global _lead_result_cache
+    with _lead_result_cache_lock:
+        if _lead_result_cache is None:
+            config = EnvUtils().get_config({
+                "LEAD_CACHE_ENABLED": "true",
+                "LEAD_CACHE_PATH": os.path.join(parent_dir, ".cache", "lead_results.sqlite"),
+                "LEAD_CACHE_MEMORY_ENTRIES": 200,
+                "LEAD_CACHE_DISK_ENTRIES": 2000,
+                "LEAD_CACHE_FRESH_SECONDS": 3600,
+                "LEAD_CACHE_STALE_SECONDS": 6 * 3600
+            })
+            if str(config["LEAD_CACHE_ENABLED"]).lower() != "true":
+                return None
+            fresh_seconds = float(config["LEAD_CACHE_FRESH_SECONDS"])
+            stale_seconds = float(config["LEAD_CACHE_STALE_SECONDS"])
+            # Both tiers drop entries once they are too old to serve even stale
+            max_age = fresh_seconds + stale_seconds
+            _lead_result_cache = LeadResultCache(
+                TieredCache(
+                    name="lead_results",
+                    db_path=config["LEAD_CACHE_PATH"] or None,
+                    memory_max_entries=int(config["LEAD_CACHE_MEMORY_ENTRIES"]),
+                    disk_max_entries=int(config["LEAD_CACHE_DISK_ENTRIES"]),
+                    default_memory_ttl=max_age,
+                    default_disk_ttl=max_age
+                ),
+                fresh_seconds=fresh_seconds,
+                stale_seconds=stale_seconds
+            )
+        return _lead_result_cache
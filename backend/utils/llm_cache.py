@@ -0,0 +1,163 @@
+# file: utils/llm_cache.py
+
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from crewai import LLM
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from utils.envutils import EnvUtils
+from utils.metrics import get_metrics_registry
+from utils.response_cache import TieredCache, make_cache_key
+
+
+def normalize_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """Role and whitespace-collapsed content of each chat message"""
+    normalized = []
+    for message in messages:
+        content = message.get("content")
+        if not isinstance(content, str):
+            content = make_cache_key(content)
+        normalized.append({"role": str(message.get("role", "")), "content": " ".join(content.split())})
+    return normalized
+
+
+class LLMCompletionCache:
+    """
+    Exact-match cache for chat completions.
+
+    Entries are keyed on model, temperature, sampling parameters, the output
+    schema and a hash of the normalized messages. Only calls at or below
+    ``max_temperature`` are cached: sampling at higher temperatures is meant
+    to vary between calls.
+    """
+
+    def __init__(self, cache: TieredCache, max_temperature: float = 0.1):
+        self.cache = cache
+        self.max_temperature = max_temperature
+
+    def is_cacheable(self, temperature: Optional[float]) -> bool:
+        return temperature is not None and float(temperature) <= self.max_temperature
+
+    def make_key(self,
+                 model: str,
+                 temperature: Optional[float],
+                 messages: List[Dict[str, Any]],
+                 schema: Any = None,
+                 params: Optional[Dict[str, Any]] = None) -> str:
+        return make_cache_key({
+            "model": model,
+            "temperature": temperature,
+            "messages": make_cache_key(normalize_messages(messages)),
+            "schema": schema,
+            "params": params or {}
+        })
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.cache.get(key)
+
+    def set(self, key: str, value: Any) -> None:
+        self.cache.set(key, value, category="completion")
+
+    def record_bypass(self) -> None:
+        self.cache.record_bypass()
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self.cache.get_stats()
+        stats["max_temperature"] = self.max_temperature
+        return stats
+
+
+_llm_cache: Optional[LLMCompletionCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMCompletionCache]:
+    """
+    Return the process-wide completion cache, or None unless
+    LLM_CACHE_ENABLED is true (the cache is opt-in).
+    """
+    global _llm_cache
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            config = EnvUtils().get_config({
+                "LLM_CACHE_ENABLED": "false",
+                "LLM_CACHE_PATH": os.path.join(parent_dir, ".cache", "llm_cache.sqlite"),
+                "LLM_CACHE_MEMORY_ENTRIES": 500,
+                "LLM_CACHE_DISK_ENTRIES": 5000,
+                "LLM_CACHE_TTL": 24 * 3600,
+                "LLM_CACHE_MAX_TEMPERATURE": 0.1
+            })
+            if str(config["LLM_CACHE_ENABLED"]).lower() != "true":
+                return None
+            ttl = float(config["LLM_CACHE_TTL"])
+            _llm_cache = LLMCompletionCache(
+                TieredCache(
+                    name="llm",
+                    db_path=config["LLM_CACHE_PATH"] or None,
+                    memory_max_entries=int(config["LLM_CACHE_MEMORY_ENTRIES"]),
+                    disk_max_entries=int(config["LLM_CACHE_DISK_ENTRIES"]),
+                    default_memory_ttl=ttl,
+                    default_disk_ttl=ttl
+                ),
+                max_temperature=float(config["LLM_CACHE_MAX_TEMPERATURE"])
+            )
+        return _llm_cache
+
+
+class CachedLLM(LLM):
+    """
+    crewai ``LLM`` that answers repeated low-temperature prompts from the
+    completion cache. Behaves exactly like ``LLM`` when the cache is disabled.
+    """
+
+    def call(self, messages: List[Dict[str, str]], callbacks: List[Any] = []) -> str:
+        cache = get_llm_cache()
+        if cache is None:
+            return self._timed_call(messages, callbacks)
+        if not cache.is_cacheable(self.temperature):
+            cache.record_bypass()
+            return self._timed_call(messages, callbacks)
+
+        key = cache.make_key(
+            model=self.model,
+            temperature=self.temperature,
+            messages=messages,
+            schema=self.response_format,
+            params={
+                "top_p": self.top_p,
+                "stop": self.stop,
+                "max_tokens": self.max_tokens or self.max_completion_tokens,
+                "seed": self.seed
+            }
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            get_metrics_registry().inc("llm_requests_total", {"model": self.model, "status": "cache_hit"})
+            return cached
+
+        response = self._timed_call(messages, callbacks)
+        if response:
+            cache.set(key, response)
+        return response
+
+    def _timed_call(self, messages: List[Dict[str, str]], callbacks: List[Any]) -> str:
+        """Call the model and record latency and status (HTTP code on failure) for /metrics"""
+        registry = get_metrics_registry()
+        started = time.perf_counter()
+        status: Any = "ok"
+        try:
+            return super().call(messages, callbacks)
+        except Exception as e:
+            status = getattr(e, "status_code", None) or type(e).__name__
+            raise
+        finally:
+            labels = {"model": self.model}
+            registry.inc("llm_requests_total", {**labels, "status": status})
+            registry.observe("llm_request_duration_seconds", time.perf_counter() - started, labels)
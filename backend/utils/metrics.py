@@ -0,0 +1,288 @@
+# file: utils/metrics.py
+
+import bisect
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from utils.instrumentation import SECONDS_BUCKETS, get_histogram_store
+
+METRIC_PREFIX = "salescrew_"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelKey = Tuple[Tuple[str, str], ...]
+# (name, type, help, [(labels, value)]) returned by collectors for gauges
+GaugeFamily = Tuple[str, str, str, List[Tuple[Dict[str, Any], float]]]
+
+
+def _label_key(labels: Optional[Dict[str, Any]]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in (labels or {}).items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in labels]
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Shard:
+    """Counters and histograms written by one thread only"""
+
+    __slots__ = ("thread", "counters", "histograms")
+
+    def __init__(self, thread: Optional[threading.Thread]):
+        self.thread = thread
+        self.counters: Dict[Tuple[str, LabelKey], float] = {}
+        # value: [count per bucket..., count above the last bucket, sum]
+        self.histograms: Dict[Tuple[str, LabelKey], List[float]] = {}
+
+
+class MetricsRegistry:
+    """
+    Prometheus-style counters and histograms with a lock-free write path.
+
+    Every thread records into its own shard, so request threads never wait
+    on each other or on a scrape. ``render`` merges the shards, copying each
+    shard's dicts in one C-level call, and folds shards of finished threads
+    into a single retired shard so short-lived worker threads do not
+    accumulate. Gauges (queue depths, cache hit ratios, ...) are read from
+    collector callbacks at scrape time.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._retired = _Shard(None)
+        self._shards_lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, ...]] = {}
+        self._help: Dict[str, str] = {}
+        self._collectors: Dict[str, Callable[[], List[GaugeFamily]]] = {}
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = _Shard(threading.current_thread())
+            with self._shards_lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def describe(self, name: str, help_text: str) -> None:
+        self._help[name] = help_text
+
+    def inc(self, name: str, labels: Optional[Dict[str, Any]] = None, amount: float = 1) -> None:
+        counters = self._shard().counters
+        key = (name, _label_key(labels))
+        counters[key] = counters.get(key, 0) + amount
+
+    def observe(self,
+                name: str,
+                value: float,
+                labels: Optional[Dict[str, Any]] = None,
+                buckets: Sequence[float] = SECONDS_BUCKETS) -> None:
+        bounds = self._buckets.get(name)
+        if bounds is None:
+            bounds = self._buckets.setdefault(name, tuple(sorted(buckets)))
+        histograms = self._shard().histograms
+        key = (name, _label_key(labels))
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = [0] * (len(bounds) + 2)
+        histogram[bisect.bisect_left(bounds, value)] += 1
+        histogram[-1] += value
+
+    def register_collector(self, name: str, collector: Callable[[], List[GaugeFamily]]) -> None:
+        """``collector()`` returns gauge families and is called on every scrape; replaces ``name``"""
+        self._collectors[name] = collector
+
+    @staticmethod
+    def _merge(into: _Shard, counters: Dict, histograms: Dict) -> None:
+        for key, value in counters.items():
+            into.counters[key] = into.counters.get(key, 0) + value
+        for key, values in histograms.items():
+            merged = into.histograms.get(key)
+            if merged is None:
+                into.histograms[key] = list(values)
+            else:
+                for i, value in enumerate(values):
+                    merged[i] += value
+
+    def collect(self) -> _Shard:
+        """Merged view of every shard"""
+        total = _Shard(None)
+        with self._shards_lock:
+            live = []
+            for shard in self._shards:
+                if shard.thread is not None and not shard.thread.is_alive():
+                    # The owner is gone, so nothing writes to this shard anymore
+                    self._merge(self._retired, shard.counters, shard.histograms)
+                else:
+                    live.append(shard)
+            self._shards = live
+            self._merge(total, self._retired.counters, self._retired.histograms)
+        for shard in live:
+            # dict.copy() runs without releasing the GIL, so the owner cannot mutate mid-copy
+            counters = shard.counters.copy()
+            histograms = {key: list(values) for key, values in shard.histograms.copy().items()}
+            self._merge(total, counters, histograms)
+        return total
+
+    def render(self) -> str:
+        """Everything in the Prometheus text exposition format"""
+        merged = self.collect()
+        lines: List[str] = []
+
+        by_name: Dict[str, List[Tuple[LabelKey, Any]]] = {}
+        for (name, labels), value in sorted(merged.counters.items()):
+            by_name.setdefault(name, []).append((labels, value))
+        for name, series in by_name.items():
+            metric = METRIC_PREFIX + name
+            lines.append(f"# HELP {metric} {self._help.get(name, name)}")
+            lines.append(f"# TYPE {metric} counter")
+            for labels, value in series:
+                lines.append(f"{metric}{_format_labels(labels)} {_format_value(value)}")
+
+        by_name = {}
+        for (name, labels), values in sorted(merged.histograms.items()):
+            by_name.setdefault(name, []).append((labels, values))
+        for name, series in by_name.items():
+            bounds = self._buckets[name]
+            lines.extend(self._render_histogram(name, [
+                (labels, list(bounds) + [float("inf")], values[:-1], values[-1]) for labels, values in series
+            ]))
+
+        # Task, tool and stage histograms recorded by utils/instrumentation
+        for name, series in sorted(get_histogram_store().snapshot().items()):
+            rendered = []
+            for entry in series:
+                cumulative = list(entry["buckets"].values())
+                counts = [cumulative[0]] + [b - a for a, b in zip(cumulative, cumulative[1:])]
+                bounds = [float("inf") if b == "+Inf" else float(b) for b in entry["buckets"]]
+                rendered.append((_label_key(entry["labels"]), bounds, counts, entry["sum"]))
+            lines.extend(self._render_histogram(name, rendered))
+
+        for collector in list(self._collectors.values()):
+            try:
+                families = collector()
+            except Exception as e:
+                print(f"Metrics collector failed: {e}")
+                continue
+            for name, metric_type, help_text, samples in families:
+                metric = METRIC_PREFIX + name
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} {metric_type}")
+                for labels, value in samples:
+                    if value is None:
+                        continue
+                    lines.append(f"{metric}{_format_labels(_label_key(labels))} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+    def _render_histogram(self, name: str, series: List[Tuple[LabelKey, List[float], List[float], float]]) -> List[str]:
+        metric = METRIC_PREFIX + name
+        lines = [f"# HELP {metric} {self._help.get(name, name)}", f"# TYPE {metric} histogram"]
+        for labels, bounds, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = (("le", _format_value(bound)),)
+                lines.append(f"{metric}_bucket{_format_labels(labels + le)} {_format_value(cumulative)}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {_format_value(cumulative)}")
+        return lines
+
+
+_registry = MetricsRegistry()
+_registry.describe("http_requests_total", "HTTP requests by app, method, route and status")
+_registry.describe("http_request_errors_total", "HTTP requests that failed with a 5xx status")
+_registry.describe("http_request_duration_seconds", "HTTP request latency, including streamed bodies")
+_registry.describe("upstream_requests_total", "Calls to upstream APIs (Exa, SambaNova) by host and status")
+_registry.describe("upstream_request_duration_seconds", "Latency of calls to upstream APIs")
+_registry.describe("llm_requests_total", "crewai LLM calls by model and status")
+_registry.describe("llm_request_duration_seconds", "Latency of crewai LLM calls")
+_registry.describe("task_duration_seconds", "Crew task wall time by task and agent")
+_registry.describe("stage_duration_seconds", "Pipeline stages run outside the crew")
+_registry.describe("tool_duration_seconds", "Tool call wall time")
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    return _registry
+
+
+def record_upstream_call(host: str, status: Any, seconds: float) -> None:
+    """Count one upstream HTTP call; ``status`` is the HTTP status or an error class name"""
+    _registry.inc("upstream_requests_total", {"host": host, "status": status})
+    _registry.observe("upstream_request_duration_seconds", seconds, {"host": host})
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request count, 5xx errors and latency per
+    route template (e.g. ``/jobs/{job_id}``, not the raw path).
+    """
+
+    def __init__(self, app: Any, app_name: str):
+        self.app = app
+        self.app_name = app_name
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = [500]
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the shared scope
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            labels = {"app": self.app_name, "method": scope["method"], "route": route}
+            _registry.inc("http_requests_total", {**labels, "status": status[0]})
+            if status[0] >= 500:
+                _registry.inc("http_request_errors_total", labels)
+            _registry.observe("http_request_duration_seconds", time.perf_counter() - started, labels)
+
+
+def cache_gauges(caches: Dict[str, Optional[Dict[str, Any]]]) -> List[GaugeFamily]:
+    """Gauge families for TieredCache-style ``get_stats()`` dicts, keyed by cache name"""
+    hit_ratio, hits, misses = [], [], []
+    for name, stats in caches.items():
+        if not stats:
+            continue
+        hit_ratio.append(({"cache": name}, stats.get("hit_ratio", 0.0)))
+        hits.append(({"cache": name}, stats.get("memory_hits", 0) + stats.get("disk_hits", 0)))
+        misses.append(({"cache": name}, stats.get("misses", 0)))
+    return [
+        ("cache_hit_ratio", "gauge", "Share of cache lookups served from the cache", hit_ratio),
+        ("cache_hits", "gauge", "Cache lookups served from the cache since start", hits),
+        ("cache_misses", "gauge", "Cache lookups that missed since start", misses)
+    ]
+
+
+def scheduler_gauges(stats: Dict[str, Any]) -> List[GaugeFamily]:
+    """Gauge families for a BoundedScheduler or AsyncAdmissionController"""
+    labels = {"scheduler": stats["name"]}
+    workers = stats.get("workers", stats.get("max_concurrency"))
+    return [
+        ("scheduler_queue_depth", "gauge", "Requests waiting for a worker", [(labels, stats["queue_depth"])]),
+        ("scheduler_queue_capacity", "gauge", "Maximum number of waiting requests", [(labels, stats["queue_capacity"])]),
+        ("scheduler_active_workers", "gauge", "Requests currently running", [(labels, stats["active"])]),
+        ("scheduler_workers", "gauge", "Maximum number of concurrently running requests", [(labels, workers)]),
+        ("scheduler_rejected", "gauge", "Requests rejected with 429 since start", [(labels, stats["rejected"])])
+    ]
@@ -0,0 +1,163 @@
+# file: utils/near_duplicate.py
+
+import hashlib
+import random
+import re
+import time
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Hashable, List, Optional, Tuple
+
+# Mersenne prime for the (a * x + b) mod p permutation family
+_PRIME = (1 << 61) - 1
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+@lru_cache(maxsize=65536)
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big") % _PRIME
+
+
+def shingles(text: str, size: int = 2) -> FrozenSet[str]:
+    """Lowercased word tokens of ``text`` plus its word ``size``-grams"""
+    tokens = _TOKEN_RE.findall(text.lower())
+    grams = [" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)] if size > 1 else []
+    return frozenset(tokens + grams)
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def lsh_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    (bands, rows) with bands * rows <= num_perm whose S-curve
+    (1 / bands) ** (1 / rows) sits closest to ``threshold``: pairs above it
+    very likely share a band, pairs well below it very likely do not.
+    """
+    best = (1, num_perm)
+    best_gap = None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        gap = abs((1.0 / bands) ** (1.0 / rows) - threshold)
+        if best_gap is None or gap < best_gap:
+            best, best_gap = (bands, rows), gap
+    return best
+
+
+class NearDuplicateIndex:
+    """
+    Groups near-duplicate texts into clusters with MinHash and LSH.
+
+    Texts are compared as sets of word shingles; two are duplicates when
+    their Jaccard similarity is at least ``threshold`` or they share an
+    ``exact_key``. Each text gets a ``num_perm`` MinHash signature that is
+    cut into bands, and every band is an LSH bucket, so a new text is only
+    compared against the few texts it shares a bucket with and indexing
+    stays close to linear in the number of texts.
+    """
+
+    def __init__(self, threshold: float = 0.7, num_perm: int = 64, shingle_size: int = 2, seed: int = 1):
+        self.threshold = min(1.0, max(0.0, threshold))
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = lsh_bands(self.threshold, num_perm)
+        rng = random.Random(seed)
+        self._permutations = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+
+        self._buckets: List[Dict[Tuple[int, ...], List[int]]] = [{} for _ in range(self.bands)]
+        self._shingles: List[FrozenSet[str]] = []
+        self._cluster_of: List[int] = []
+        self._exact: Dict[Hashable, int] = {}
+        self._members: Dict[int, List[Any]] = {}
+        self.comparisons = 0
+
+    def __len__(self) -> int:
+        return len(self._shingles)
+
+    def _signature(self, features: FrozenSet[str]) -> List[int]:
+        values = [_feature_hash(feature) for feature in features] or [0]
+        return [min((a * value + b) % _PRIME for value in values) for a, b in self._permutations]
+
+    def _band_keys(self, signature: List[int]) -> List[Tuple[int, ...]]:
+        return [tuple(signature[band * self.rows:(band + 1) * self.rows]) for band in range(self.bands)]
+
+    def _find(self, features: FrozenSet[str], band_keys: List[Tuple[int, ...]],
+              exact_key: Optional[Hashable]) -> Optional[int]:
+        if exact_key is not None and exact_key in self._exact:
+            return self._exact[exact_key]
+        checked = set()
+        best: Optional[Tuple[float, int]] = None
+        for buckets, key in zip(self._buckets, band_keys):
+            for position in buckets.get(key, ()):
+                if position in checked:
+                    continue
+                checked.add(position)
+                self.comparisons += 1
+                # Confirm the LSH candidate with the exact similarity
+                similarity = jaccard(features, self._shingles[position])
+                if similarity >= self.threshold and (best is None or similarity > best[0]):
+                    best = (similarity, position)
+        return self._cluster_of[best[1]] if best else None
+
+    def find(self, text: str, exact_key: Optional[Hashable] = None) -> Optional[int]:
+        """Cluster id of an indexed near-duplicate of ``text``, or None"""
+        features = shingles(text, self.shingle_size)
+        return self._find(features, self._band_keys(self._signature(features)), exact_key)
+
+    def add(self, text: str, item: Any = None, exact_key: Optional[Hashable] = None) -> Tuple[int, bool]:
+        """
+        Index ``text`` and record ``item`` as a member of its cluster;
+        returns the cluster id and whether the cluster is new.
+        """
+        features = shingles(text, self.shingle_size)
+        band_keys = self._band_keys(self._signature(features))
+        cluster = self._find(features, band_keys, exact_key)
+        is_new = cluster is None
+        position = len(self._shingles)
+        if is_new:
+            cluster = position
+            self._members[cluster] = []
+        self._shingles.append(features)
+        self._cluster_of.append(cluster)
+        for buckets, key in zip(self._buckets, band_keys):
+            buckets.setdefault(key, []).append(position)
+        if exact_key is not None:
+            self._exact.setdefault(exact_key, cluster)
+        self._members[cluster].append(item)
+        return cluster, is_new
+
+    def clusters(self) -> Dict[int, List[Any]]:
+        """Cluster id -> items in insertion order; the first item started the cluster"""
+        return {cluster: list(members) for cluster, members in self._members.items()}
+
+
+def main():
+    """Benchmark: index synthetic articles, a third of them syndicated near-copies"""
+    rng = random.Random(7)
+    words = [f"w{i}" for i in range(5000)]
+    stories = [[rng.choice(words) for _ in range(40)] for _ in range(3000)]
+    texts = []
+    for story in stories:
+        texts.append(" ".join(story))
+        for _ in range(rng.randint(0, 1)):
+            # A syndicated copy: the same story with one word changed
+            copy = list(story)
+            copy[rng.randrange(len(copy))] = rng.choice(words)
+            texts.append(" ".join(copy))
+    rng.shuffle(texts)
+
+    for threshold in (0.9, 0.7, 0.5):
+        index = NearDuplicateIndex(threshold=threshold)
+        started = time.perf_counter()
+        for text in texts:
+            index.add(text)
+        elapsed = time.perf_counter() - started
+        print(f"threshold={threshold} ({index.bands}x{index.rows} bands): {len(texts)} texts -> "
+              f"{len(index.clusters())} clusters (expected {len(stories)}) in {elapsed:.2f}s, "
+              f"{index.comparisons / len(texts):.2f} comparisons per text")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+# file: utils/news_index.py
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from utils.envutils import EnvUtils
+
+
+def subject_key(company_name: Optional[str] = None,
+                industry: Optional[str] = None,
+                product: Optional[str] = None) -> str:
+    """Stable key of one analysis subject, e.g. 'company=acme|industry=fintech|product='"""
+    parts = {"company": company_name, "industry": industry, "product": product}
+    return "|".join(f"{name}={' '.join((value or '').lower().split())}" for name, value in parts.items())
+
+
+class NewsIndex:
+    """
+    Local store of the news articles fetched for each analysis subject.
+
+    Articles are kept once per URL with their publication date and linked
+    to every subject whose queries returned them. Each subject has a
+    watermark (the newest publication date seen) and the time of its last
+    full refresh, so follow-up analyses only need to ask Exa for articles
+    newer than the watermark.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS articles ("
+            " url TEXT PRIMARY KEY,"
+            " title TEXT NOT NULL,"
+            " summary TEXT,"
+            " body TEXT,"
+            " published_date TEXT,"
+            " fetched_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS subject_articles ("
+            " subject TEXT NOT NULL,"
+            " url TEXT NOT NULL,"
+            " PRIMARY KEY (subject, url))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS watermarks ("
+            " subject TEXT PRIMARY KEY,"
+            " published_date TEXT,"
+            " full_refresh_at REAL,"
+            " delta_refresh_at REAL)"
+        )
+        # Full-text index of earlier versions, which nothing queried
+        self._conn.execute("DROP TABLE IF EXISTS articles_fts")
+        self._conn.commit()
+        self._stats = {"full_refreshes": 0, "delta_refreshes": 0, "articles_added": 0}
+
+    def get_watermark(self, subject: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT published_date, full_refresh_at, delta_refresh_at FROM watermarks WHERE subject = ?",
+                (subject,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"published_date": row[0], "full_refresh_at": row[1], "delta_refresh_at": row[2]}
+
+    def merge(self, subject: str, news_items: List[Dict], full_refresh: bool = False) -> int:
+        """
+        Add ``news_items`` to ``subject`` and advance its watermark; returns
+        how many were new to the subject. ``full_refresh`` marks a run of the
+        complete query set rather than a delta query.
+        """
+        now = time.time()
+        added = 0
+        newest = None
+        with self._lock:
+            for item in news_items:
+                url = item.get("url")
+                if not url:
+                    continue
+                published = item.get("published_date") or None
+                if published and (newest is None or published > newest):
+                    newest = published
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO articles (url, title, summary, body, published_date, fetched_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (url, item.get("title", ""), item.get("summary", ""), item.get("text", ""), published, now)
+                )
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO subject_articles (subject, url) VALUES (?, ?)", (subject, url)
+                )
+                added += cursor.rowcount
+
+            refreshed = "full_refresh_at" if full_refresh else "delta_refresh_at"
+            self._conn.execute(
+                f"INSERT INTO watermarks (subject, published_date, {refreshed}) VALUES (?, ?, ?) "
+                f"ON CONFLICT (subject) DO UPDATE SET "
+                f" published_date = NULLIF(MAX(COALESCE(published_date, ''), COALESCE(excluded.published_date, '')), ''),"
+                f" {refreshed} = excluded.{refreshed}",
+                (subject, newest, now)
+            )
+            self._conn.commit()
+            self._stats["full_refreshes" if full_refresh else "delta_refreshes"] += 1
+            self._stats["articles_added"] += added
+        return added
+
+    def articles(self, subject: str, limit: int = 50) -> List[Dict]:
+        """The subject's articles, newest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT a.title, a.url, a.summary, a.body, a.published_date, a.fetched_at FROM articles a "
+                "JOIN subject_articles s ON s.url = a.url WHERE s.subject = ? "
+                "ORDER BY COALESCE(a.published_date, '') DESC, a.fetched_at DESC LIMIT ?",
+                (subject, limit)
+            ).fetchall()
+        return [self._article(row) for row in rows]
+
+    @staticmethod
+    def _article(row) -> Dict:
+        return {
+            "title": row[0],
+            "url": row[1],
+            "summary": row[2] or "",
+            "text": row[3] or "",
+            # Articles Exa returned without a date count as published when first fetched
+            "published_date": row[4] or date.fromtimestamp(row[5]).strftime("%Y-%m-%d")
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["articles"] = self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+            stats["subjects"] = self._conn.execute("SELECT COUNT(*) FROM watermarks").fetchone()[0]
+        return stats
+
+
+_news_index: Optional[NewsIndex] = None
+_news_index_lock = threading.Lock()
+
+
+def get_news_index() -> Optional[NewsIndex]:
+    """Return the process-wide news index, or None if NEWS_INDEX_ENABLED is false"""
+    global _news_index
+    with _news_index_lock:
+        if _news_index is None:
+            config = EnvUtils().get_config({
+                "NEWS_INDEX_ENABLED": "true",
+                "NEWS_INDEX_PATH": os.path.join(parent_dir, ".cache", "news_index.sqlite")
+            })
+            if str(config["NEWS_INDEX_ENABLED"]).lower() != "true":
+                return None
+            _news_index = NewsIndex(config["NEWS_INDEX_PATH"])
+        return _news_index
+
+
+def main():
+    """Index a few articles and query them back"""
+    index = NewsIndex(":memory:")
+    subject = subject_key("Acme", "fintech")
+    index.merge(subject, [
+        {"title": "Acme raises Series B", "url": "https://example.com/a", "summary": "Acme raised $50M.",
+         "published_date": "2024-11-02"},
+        {"title": "Fintech lending slows", "url": "https://example.com/b", "summary": "Loan volumes fell.",
+         "published_date": "2024-11-05"}
+    ], full_refresh=True)
+    index.merge(subject, [
+        {"title": "Acme expands to Europe", "url": "https://example.com/c", "summary": "Acme opens in Berlin.",
+         "published_date": "2024-11-09"}
+    ])
+    print(json.dumps(index.get_watermark(subject), indent=2))
+    print(json.dumps(index.articles(subject), indent=2))
+    print(json.dumps(index.get_stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
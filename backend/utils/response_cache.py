@@ -0,0 +1,269 @@
+# file: utils/response_cache.py
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+def make_cache_key(payload: Any) -> str:
+    """
+    Canonical SHA-256 of a JSON-serializable payload. Key order and whitespace
+    do not affect the hash, so equivalent payloads share one cache entry.
+    """
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class MemoryTier:
+    """Size-bounded in-memory LRU tier with a per-category TTL"""
+
+    def __init__(self, max_entries: int, ttls: Dict[str, float], default_ttl: float):
+        self.max_entries = max_entries
+        self.ttls = ttls
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[str, Tuple[str, str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def ttl_for(self, category: Optional[str]) -> float:
+        return float(self.ttls.get(category or "", self.default_ttl))
+
+    def get(self, key: str) -> Optional[Tuple[str, str, float]]:
+        """Return (serialized value, category, stored_at) if present and not expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            _, category, stored_at = entry
+            if time.time() - stored_at > self.ttl_for(category):
+                del self._entries[key]
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, value: str, category: str, stored_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, category, stored_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteTier:
+    """Size-bounded on-disk tier (SQLite) with a per-category TTL and LRU eviction"""
+
+    def __init__(self, db_path: str, max_entries: int, ttls: Dict[str, float], default_ttl: float):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttls = ttls
+        self.default_ttl = default_ttl
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            " key TEXT PRIMARY KEY,"
+            " category TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " stored_at REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cache_entries_last_access ON cache_entries (last_access)"
+        )
+        self._conn.commit()
+
+    def ttl_for(self, category: Optional[str]) -> float:
+        return float(self.ttls.get(category or "", self.default_ttl))
+
+    def get(self, key: str) -> Optional[Tuple[str, str, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, category, stored_at FROM cache_entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, category, stored_at = row
+            now = time.time()
+            if now - stored_at > self.ttl_for(category):
+                self._conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+                self._conn.commit()
+                self.expirations += 1
+                return None
+            self._conn.execute("UPDATE cache_entries SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return value, category, stored_at
+
+    def set(self, key: str, value: str, category: str, stored_at: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, category, value, stored_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, category, value, stored_at, time.time())
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+            if count > self.max_entries:
+                self._purge_expired()
+                count = self._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+            overflow = count - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM cache_entries WHERE key IN ("
+                    " SELECT key FROM cache_entries ORDER BY last_access ASC LIMIT ?)",
+                    (overflow,)
+                )
+                self.evictions += overflow
+            self._conn.commit()
+
+    def _purge_expired(self) -> None:
+        """Drop expired rows; caller must hold the lock"""
+        now = time.time()
+        for category, ttl in self.ttls.items():
+            cursor = self._conn.execute(
+                "DELETE FROM cache_entries WHERE category = ? AND stored_at < ?",
+                (category, now - float(ttl))
+            )
+            self.expirations += cursor.rowcount
+        placeholders = ",".join("?" for _ in self.ttls)
+        query = "DELETE FROM cache_entries WHERE stored_at < ?"
+        params = [now - self.default_ttl]
+        if self.ttls:
+            query += f" AND category NOT IN ({placeholders})"
+            params.extend(self.ttls.keys())
+        cursor = self._conn.execute(query, params)
+        self.expirations += cursor.rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+
+
+class TieredCache:
+    """
+    Two-tier JSON response cache: an in-memory LRU in front of a SQLite file.
+
+    Each tier has its own TTL per category, so e.g. company profiles can live
+    for days on disk while news expires after minutes. Values must be
+    JSON-serializable; every hit returns a fresh copy. Coroutines use
+    ``aget``/``aset``, which do the SQLite work in a worker thread.
+    """
+
+    def __init__(self,
+                 name: str,
+                 db_path: Optional[str],
+                 memory_max_entries: int = 1000,
+                 disk_max_entries: int = 10000,
+                 memory_ttls: Optional[Dict[str, float]] = None,
+                 disk_ttls: Optional[Dict[str, float]] = None,
+                 default_memory_ttl: float = 1800,
+                 default_disk_ttl: float = 21600):
+        self.name = name
+        self.memory = MemoryTier(memory_max_entries, memory_ttls or {}, default_memory_ttl)
+        self.disk = SQLiteTier(db_path, disk_max_entries, disk_ttls or {}, default_disk_ttl) if db_path else None
+
+        self._stats_lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "sets": 0, "bypasses": 0}
+
+    def _count(self, stat: str) -> None:
+        with self._stats_lock:
+            self._stats[stat] += 1
+
+    def get_entry(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Return (value, stored_at) from the fastest tier holding a fresh entry"""
+        entry = self.memory.get(key)
+        if entry is not None:
+            self._count("memory_hits")
+            return json.loads(entry[0]), entry[2]
+
+        if self.disk is not None:
+            try:
+                entry = self.disk.get(key)
+            except sqlite3.Error as e:
+                print(f"Failed to read {self.name} cache entry from disk: {e}")
+                entry = None
+            if entry is not None:
+                self._count("disk_hits")
+                value, category, stored_at = entry
+                # Promote to memory, keeping the original age
+                self.memory.set(key, value, category, stored_at)
+                return json.loads(value), stored_at
+
+        self._count("misses")
+        return None
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """get() for coroutines: memory hits return inline, disk lookups run in a worker thread"""
+        if self.disk is None or self.memory.get(key) is not None:
+            return self.get(key)
+        return await asyncio.to_thread(self.get, key)
+
+    def set(self, key: str, value: Any, category: str = "") -> None:
+        serialized = json.dumps(value)
+        stored_at = time.time()
+        self.memory.set(key, serialized, category, stored_at)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, serialized, category, stored_at)
+            except sqlite3.Error as e:
+                print(f"Failed to write {self.name} cache entry to disk: {e}")
+        self._count("sets")
+
+    async def aset(self, key: str, value: Any, category: str = "") -> None:
+        """set() for coroutines; the disk write runs in a worker thread"""
+        if self.disk is None:
+            self.set(key, value, category)
+        else:
+            await asyncio.to_thread(self.set, key, value, category)
+
+    def record_bypass(self) -> None:
+        self._count("bypasses")
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_ratio"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        stats["memory_entries"] = len(self.memory)
+        stats["memory_evictions"] = self.memory.evictions
+        stats["memory_expirations"] = self.memory.expirations
+        if self.disk is not None:
+            stats["disk_entries"] = len(self.disk)
+            stats["disk_evictions"] = self.disk.evictions
+            stats["disk_expirations"] = self.disk.expirations
+        return stats
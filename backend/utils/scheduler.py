@@ -0,0 +1,227 @@
+# file: utils/scheduler.py
+
+import asyncio
+import math
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+
+class QueueFullError(Exception):
+    """Raised when a scheduler has no room left; ``retry_after`` is in seconds"""
+
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(f"{name} is at capacity, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class _AdmissionStats:
+    """Counters plus recent wait and run times shared by both schedulers"""
+
+    def __init__(self, default_duration: float, window: int = 50):
+        self.default_duration = default_duration
+        self._lock = threading.Lock()
+        self._durations: "deque[float]" = deque(maxlen=window)
+        self._waits: "deque[float]" = deque(maxlen=window)
+        self.counters = {"submitted": 0, "rejected": 0, "completed": 0, "failed": 0}
+        self.max_wait_seconds = 0.0
+
+    def count(self, counter: str) -> None:
+        with self._lock:
+            self.counters[counter] += 1
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self._waits.append(seconds)
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def record_duration(self, seconds: float) -> None:
+        with self._lock:
+            self._durations.append(seconds)
+
+    def average_duration(self) -> float:
+        with self._lock:
+            if not self._durations:
+                return self.default_duration
+            return sum(self._durations) / len(self._durations)
+
+    def retry_after(self, backlog: int, workers: int, max_seconds: int = 600) -> int:
+        """Seconds until ``backlog`` queued/running items drain at the recent average duration"""
+        estimate = (backlog / max(1, workers)) * self.average_duration()
+        return int(min(max_seconds, max(1, math.ceil(estimate))))
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self.counters)
+            stats["avg_wait_seconds"] = sum(self._waits) / len(self._waits) if self._waits else 0.0
+            stats["max_wait_seconds"] = self.max_wait_seconds
+            stats["avg_duration_seconds"] = (
+                sum(self._durations) / len(self._durations) if self._durations else None
+            )
+        return stats
+
+
+class BoundedScheduler:
+    """
+    Fixed pool of worker threads in front of a bounded FIFO queue.
+
+    Replaces the unbounded ``ThreadPoolExecutor`` + ``run_in_executor`` pair:
+    each request holds one worker thread while it runs, and once
+    ``queue_size`` requests are waiting, ``submit`` raises QueueFullError
+    with a Retry-After estimate instead of letting latency grow without
+    limit.
+    """
+
+    def __init__(self, name: str, workers: int, queue_size: int, default_duration: float = 60.0):
+        self.name = name
+        self.workers = workers
+        self.queue_size = queue_size
+        self.stats = _AdmissionStats(default_duration)
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._active = 0
+        self._lock = threading.Lock()
+        self._threads: list = []
+
+    def _ensure_workers(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"{self.name}-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """Queue ``fn(*args, **kwargs)``; raises QueueFullError when the queue is full"""
+        self._ensure_workers()
+        future: Future = Future()
+        try:
+            self._queue.put_nowait((future, time.monotonic(), fn, args, kwargs))
+        except queue.Full:
+            self.stats.count("rejected")
+            raise QueueFullError(self.name, self.retry_after())
+        self.stats.count("submitted")
+        return future
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Await ``fn`` on a worker thread without blocking the event loop"""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def is_full(self) -> bool:
+        return self._queue.full()
+
+    def retry_after(self) -> int:
+        return self.stats.retry_after(self._queue.qsize() + self._active, self.workers)
+
+    def _work(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            future, queued_at, fn, args, kwargs = item
+            # Skip work whose caller has gone away (e.g. the client disconnected)
+            if not future.set_running_or_notify_cancel():
+                continue
+            started = time.monotonic()
+            self.stats.record_wait(started - queued_at)
+            with self._lock:
+                self._active += 1
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                self.stats.count("failed")
+                future.set_exception(e)
+            else:
+                self.stats.count("completed")
+                future.set_result(result)
+            finally:
+                self.stats.record_duration(time.monotonic() - started)
+                with self._lock:
+                    self._active -= 1
+
+    def shutdown(self) -> None:
+        """Let the workers exit once the queued work is done"""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self.stats.snapshot()
+        stats.update({
+            "name": self.name,
+            "workers": self.workers,
+            "active": self._active,
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self.queue_size
+        })
+        return stats
+
+
+class AsyncAdmissionController:
+    """
+    asyncio counterpart of BoundedScheduler for handlers that stay on the
+    event loop: at most ``max_concurrency`` requests run at once and at most
+    ``queue_size`` wait; anything beyond that is rejected with QueueFullError.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, queue_size: int, default_duration: float = 10.0):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.queue_size = queue_size
+        self.stats = _AdmissionStats(default_duration)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._active = 0
+        self._waiting = 0
+
+    def retry_after(self) -> int:
+        return self.stats.retry_after(self._active + self._waiting, self.max_concurrency)
+
+    def is_full(self) -> bool:
+        return self._active >= self.max_concurrency and self._waiting >= self.queue_size
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one execution slot for the duration of the ``async with`` block"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        if self.is_full():
+            self.stats.count("rejected")
+            raise QueueFullError(self.name, self.retry_after())
+
+        self.stats.count("submitted")
+        queued_at = time.monotonic()
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        started = time.monotonic()
+        self.stats.record_wait(started - queued_at)
+        self._active += 1
+        try:
+            yield
+        except BaseException:
+            self.stats.count("failed")
+            raise
+        else:
+            self.stats.count("completed")
+        finally:
+            self._active -= 1
+            self._semaphore.release()
+            self.stats.record_duration(time.monotonic() - started)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self.stats.snapshot()
+        stats.update({
+            "name": self.name,
+            "max_concurrency": self.max_concurrency,
+            "active": self._active,
+            "queue_depth": self._waiting,
+            "queue_capacity": self.queue_size
+        })
+        return stats
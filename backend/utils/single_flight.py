@@ -0,0 +1,168 @@
+# file: utils/single_flight.py
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+class _InFlightCall:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class _LeaderCancelled(Exception):
+    """Set on a shared asyncio call whose leader was cancelled; its waiters retry"""
+
+
+class SingleFlight:
+    """
+    Coalesce identical concurrent calls into one upstream call.
+
+    The first thread to ask for a key runs the function; every thread asking
+    for the same key while it is running blocks and receives the same result
+    (or exception). Works across the threads of the API executors.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _InFlightCall] = {}
+        self._stats = {"calls": 0, "executions": 0, "shared": 0}
+
+    def do(self, key: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Tuple[Any, bool]:
+        """
+        Run ``fn(*args, **kwargs)`` unless an identical call is already in
+        flight. Returns ``(result, shared)`` where ``shared`` is True when the
+        result came from another thread's call.
+        """
+        with self._lock:
+            self._stats["calls"] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _InFlightCall()
+                self._calls[key] = call
+                self._stats["executions"] += 1
+            else:
+                self._stats["shared"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result, False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Call counters; ``fan_in_ratio`` is callers per upstream execution"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls)
+        stats["fan_in_ratio"] = stats["calls"] / stats["executions"] if stats["executions"] else 1.0
+        return stats
+
+
+class AsyncSingleFlight:
+    """
+    asyncio counterpart of SingleFlight: identical concurrent awaits on the
+    same event loop share one upstream coroutine. Cancelling the caller that
+    runs it does not cancel the others; they start the call again.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Tuple[int, str], asyncio.Future] = {}
+        self._stats = {"calls": 0, "executions": 0, "shared": 0}
+
+    async def do(self, key: str, fn: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> Tuple[Any, bool]:
+        """Await ``fn(*args, **kwargs)`` once per key; returns ``(result, shared)``"""
+        loop = asyncio.get_running_loop()
+        call_key = (id(loop), key)
+        with self._lock:
+            self._stats["calls"] += 1
+        while True:
+            with self._lock:
+                future = self._calls.get(call_key)
+                leader = future is None
+                if leader:
+                    future = loop.create_future()
+                    self._calls[call_key] = future
+                    self._stats["executions"] += 1
+                else:
+                    self._stats["shared"] += 1
+            if leader:
+                break
+            try:
+                # shield() so a cancelled waiter does not cancel the shared call
+                return await asyncio.shield(future), True
+            except _LeaderCancelled:
+                # Take over (or join) a fresh call for the key
+                with self._lock:
+                    self._stats["shared"] -= 1
+
+        try:
+            result = await fn(*args, **kwargs)
+        except asyncio.CancelledError:
+            # The leader's cancellation (a timeout, a closed stream) is not the waiters'
+            future.set_exception(_LeaderCancelled())
+            future.exception()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                self._calls.pop(call_key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls)
+        stats["fan_in_ratio"] = stats["calls"] / stats["executions"] if stats["executions"] else 1.0
+        return stats
+
+
+_groups: Dict[str, Any] = {}
+_groups_lock = threading.Lock()
+
+
+def get_single_flight(name: str) -> SingleFlight:
+    """Return the process-wide single-flight group called ``name``"""
+    with _groups_lock:
+        if name not in _groups:
+            _groups[name] = SingleFlight(name)
+        return _groups[name]
+
+
+def get_async_single_flight(name: str) -> AsyncSingleFlight:
+    """Return the process-wide asyncio single-flight group called ``name``"""
+    group_name = f"{name}_async"
+    with _groups_lock:
+        if group_name not in _groups:
+            _groups[group_name] = AsyncSingleFlight(group_name)
+        return _groups[group_name]
+
+
+def get_all_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats for every single-flight group, keyed by group name"""
+    with _groups_lock:
+        groups = list(_groups.values())
+    return {group.name: group.get_stats() for group in groups}
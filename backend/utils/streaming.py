@@ -0,0 +1,26 @@
+# file: utils/streaming.py
+
+import json
+from typing import Any
+
+# Media types for the two supported streaming formats
+STREAM_MEDIA_TYPES = {
+    "sse": "text/event-stream",
+    "ndjson": "application/x-ndjson"
+}
+
+# Keep proxies (e.g. nginx) from buffering the stream
+STREAM_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no"
+}
+
+
+def format_stream_event(event: str, data: Any, stream_format: str = "sse") -> str:
+    """
+    Serialize one event as a Server-Sent Events frame, or as one NDJSON line
+    of the form {"event": ..., "data": ...}
+    """
+    if stream_format == "ndjson":
+        return json.dumps({"event": event, "data": data}) + "\n"
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
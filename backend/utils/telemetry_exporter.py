@@ -0,0 +1,232 @@
+# file: utils/telemetry_exporter.py
+
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+from uuid import uuid4
+
+from utils.http_session import HttpSessionManager
+
+DROP_POLICIES = ("drop_newest", "drop_oldest")
+
+
+def make_event(event_type: str, body: Dict[str, Any]) -> Dict[str, Any]:
+    """One event in the Langfuse ingestion API format"""
+    return {
+        "id": str(uuid4()),
+        "type": event_type,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "body": body
+    }
+
+
+class TelemetryExporter:
+    """
+    Ships telemetry events to ``sink`` from a background thread.
+
+    ``export`` only appends to a bounded in-memory queue and never waits on
+    the network. A batch is sent once ``batch_size`` events are queued, every
+    ``flush_interval`` seconds, or as soon as ``flush()`` is called. When the
+    queue is full, ``drop_policy`` decides whether the incoming event
+    (``drop_newest``) or the oldest queued one (``drop_oldest``) is
+    discarded; both are counted in ``get_stats()``.
+    """
+
+    def __init__(self,
+                 sink: Callable[[List[Dict[str, Any]]], None],
+                 max_queue_size: int = 10000,
+                 batch_size: int = 100,
+                 flush_interval: float = 2.0,
+                 drop_policy: str = "drop_newest"):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"drop_policy must be one of {DROP_POLICIES}, got '{drop_policy}'")
+        self.sink = sink
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.drop_policy = drop_policy
+
+        self._queue: "deque[Dict[str, Any]]" = deque()
+        self._condition = threading.Condition()
+        self._flush_requested = False
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {
+            "enqueued": 0,
+            "dropped_newest": 0,
+            "dropped_oldest": 0,
+            "dropped_after_shutdown": 0,
+            "sent": 0,
+            "failed": 0,
+            "batches": 0
+        }
+
+    def _ensure_worker(self) -> None:
+        # Caller holds the condition
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._work, name="telemetry-exporter", daemon=True)
+            self._thread.start()
+
+    def export(self, event: Dict[str, Any]) -> bool:
+        """Queue one event without blocking; returns False if it was dropped"""
+        with self._condition:
+            if self._closed:
+                self._stats["dropped_after_shutdown"] += 1
+                return False
+            if len(self._queue) >= self.max_queue_size:
+                if self.drop_policy == "drop_newest":
+                    self._stats["dropped_newest"] += 1
+                    return False
+                self._queue.popleft()
+                self._stats["dropped_oldest"] += 1
+            self._queue.append(event)
+            self._stats["enqueued"] += 1
+            self._ensure_worker()
+            if len(self._queue) >= self.batch_size:
+                self._condition.notify()
+        return True
+
+    def flush(self) -> None:
+        """Ask the worker to send what is queued now; returns immediately"""
+        with self._condition:
+            self._flush_requested = True
+            self._condition.notify()
+
+    def _next_batch(self) -> Optional[List[Dict[str, Any]]]:
+        """Wait for a size, time or flush trigger; None once closed and drained"""
+        with self._condition:
+            deadline = time.monotonic() + self.flush_interval
+            while (len(self._queue) < self.batch_size
+                   and not self._flush_requested
+                   and not self._closed):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            if not self._queue:
+                self._flush_requested = False
+                return None if self._closed else []
+            count = min(self.batch_size, len(self._queue))
+            batch = [self._queue.popleft() for _ in range(count)]
+            if not self._queue:
+                self._flush_requested = False
+            return batch
+
+    def _work(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            if batch:
+                self._send(batch)
+
+    def _send(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            self.sink(batch)
+        except Exception as e:
+            print(f"Failed to export {len(batch)} telemetry events: {e}")
+            with self._condition:
+                self._stats["failed"] += len(batch)
+            return
+        with self._condition:
+            self._stats["sent"] += len(batch)
+            self._stats["batches"] += 1
+
+    def shutdown(self, timeout: Optional[float] = 10.0) -> None:
+        """Stop accepting events and wait up to ``timeout`` seconds for the queue to drain"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+            if thread.is_alive():
+                print(f"Telemetry exporter did not drain within {timeout}s; {len(self._queue)} events left")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._condition:
+            stats = dict(self._stats)
+            stats["queue_depth"] = len(self._queue)
+        stats.update({
+            "queue_capacity": self.max_queue_size,
+            "batch_size": self.batch_size,
+            "flush_interval": self.flush_interval,
+            "drop_policy": self.drop_policy
+        })
+        return stats
+
+
+class HttpIngestionSink:
+    """POST batches to a Langfuse-compatible ``/api/public/ingestion`` endpoint"""
+
+    def __init__(self, url: str, public_key: Optional[str] = None, secret_key: Optional[str] = None,
+                 timeout: float = 10.0):
+        self.url = url
+        self.auth = (public_key, secret_key) if public_key and secret_key else None
+        self.timeout = timeout
+        self.http = HttpSessionManager()
+
+    def __call__(self, batch: List[Dict[str, Any]]) -> None:
+        response = self.http.post(
+            self.url,
+            api_key=self.auth[0] if self.auth else None,
+            auth=self.auth,
+            headers={"Content-Type": "application/json"},
+            data=json.dumps({"batch": batch}, default=str),
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+
+
+class LangfuseClientSink:
+    """Replay ingestion events through a Langfuse SDK client, then flush it"""
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    def __call__(self, batch: List[Dict[str, Any]]) -> None:
+        for event in batch:
+            body = event["body"]
+            if event["type"] == "trace-create":
+                self.client.trace(
+                    id=body["id"],
+                    name=body["name"],
+                    userId=body.get("userId"),
+                    metadata=body.get("metadata") or {}
+                )
+            elif event["type"] in ("span-create", "generation-create"):
+                create = self.client.span if event["type"] == "span-create" else self.client.generation
+                timing = {}
+                if body.get("startTime"):
+                    # Spans recorded with their own timing (and possibly a parent) keep it
+                    timing = {
+                        "parent_observation_id": body.get("parentObservationId"),
+                        "start_time": datetime.fromisoformat(body["startTime"]),
+                        "end_time": datetime.fromisoformat(body["endTime"]) if body.get("endTime") else None,
+                        "level": body.get("level"),
+                        "status_message": body.get("statusMessage")
+                    }
+                observation = create(
+                    id=body.get("id"),
+                    trace_id=body["traceId"],
+                    name=body["name"],
+                    input=body.get("input"),
+                    output=body.get("output"),
+                    metadata=body.get("metadata") or {},
+                    **{key: value for key, value in timing.items() if value is not None}
+                )
+                if not timing.get("end_time"):
+                    observation.end()
+            elif event["type"] == "score-create":
+                self.client.score(
+                    trace_id=body["traceId"],
+                    name=body["name"],
+                    value=body["value"],
+                    comment=body.get("comment"),
+                    metadata=body.get("metadata") or {}
+                )
+        self.client.flush()
@@ -0,0 +1,100 @@
+# file: utils/telemetry_stub.py
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+
+class StubIngestionServer:
+    """
+    Local stand-in for the Langfuse ingestion API, for tests and load runs.
+
+    Accepts ``POST /api/public/ingestion`` and records every event; ``GET
+    /events`` returns them. ``delay`` seconds are slept per request to mimic
+    a slow host. Point the app at it with
+    LANGFUSE_EXPORT_ENDPOINT=http://127.0.0.1:<port>/api/public/ingestion.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, delay: float = 0.0):
+        self.delay = delay
+        self.events: List[Dict[str, Any]] = []
+        self.batches = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/public/ingestion"
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, status: int, payload: Any) -> None:
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                if self.path != "/api/public/ingestion":
+                    self._reply(404, {"error": "not found"})
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                batch = json.loads(self.rfile.read(length) or b"{}").get("batch", [])
+                if stub.delay:
+                    time.sleep(stub.delay)
+                with stub._lock:
+                    stub.events.extend(batch)
+                    stub.batches += 1
+                # Same shape as Langfuse's 207 Multi-Status reply
+                self._reply(207, {"successes": [{"id": e.get("id"), "status": 201} for e in batch], "errors": []})
+
+            def do_GET(self):
+                if self.path != "/events":
+                    self._reply(404, {"error": "not found"})
+                    return
+                with stub._lock:
+                    self._reply(200, {"batches": stub.batches, "events": stub.events})
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "StubIngestionServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Langfuse ingestion stub")
+    parser.add_argument("--port", type=int, default=3999)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to sleep per batch")
+    args = parser.parse_args()
+
+    stub = StubIngestionServer(port=args.port, delay=args.delay)
+    print(f"Stub ingestion endpoint listening on {stub.url}")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.stop()
+        print(f"Received {len(stub.events)} events in {stub.batches} batches")
+
+
+if __name__ == "__main__":
+    main()
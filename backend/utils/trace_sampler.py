@@ -0,0 +1,147 @@
+# file: utils/trace_sampler.py
+
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+
+class TailSampler:
+    """
+    Tail-based trace sampling in front of a telemetry exporter.
+
+    A trace's events are buffered from ``start`` until ``end``, then either
+    exported together or dropped. A trace is kept when it logged an error,
+    when it ran for at least ``slow_threshold_seconds``, or when it won the
+    head sample taken at start (probability ``sample_rate``). Kept traces
+    carry their keep reasons and the sampling settings in
+    ``metadata.sampling``.
+
+    At most ``max_traces`` traces are buffered; starting one more ends the
+    oldest early. Events beyond ``max_events_per_trace`` are dropped and
+    counted.
+    """
+
+    def __init__(self,
+                 export: Callable[[Dict[str, Any]], Any],
+                 sample_rate: float = 1.0,
+                 slow_threshold_seconds: float = 30.0,
+                 max_traces: int = 1000,
+                 max_events_per_trace: int = 200):
+        self.export = export
+        self.sample_rate = sample_rate
+        self.slow_threshold_seconds = slow_threshold_seconds
+        self.max_traces = max_traces
+        self.max_events_per_trace = max_events_per_trace
+        self._lock = threading.Lock()
+        self._pending: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Outcome of recently ended traces, for events that arrive after the decision
+        self._decided: "OrderedDict[str, bool]" = OrderedDict()
+        self._stats = {
+            "traces_kept": 0,
+            "traces_dropped": 0,
+            "traces_evicted": 0,
+            "events_dropped": 0,
+            "keep_reasons": {"error": 0, "slow": 0, "sampled": 0}
+        }
+
+    def start(self, trace_id: str, trace_event: Dict[str, Any]) -> None:
+        with self._lock:
+            self._pending[trace_id] = {
+                "trace": trace_event,
+                "events": [],
+                "started": time.monotonic(),
+                "head_sampled": random.random() < self.sample_rate,
+                "errored": False,
+                "dropped_events": 0
+            }
+            evicted = []
+            while len(self._pending) > self.max_traces:
+                evicted.append(self._pending.popitem(last=False))
+                self._stats["traces_evicted"] += 1
+        for evicted_id, pending in evicted:
+            self._decide(evicted_id, pending)
+
+    def add(self, trace_id: str, event: Dict[str, Any], error: bool = False) -> None:
+        """Buffer ``event`` for its trace; ``error`` marks the trace as one to keep"""
+        with self._lock:
+            pending = self._pending.get(trace_id)
+            if pending is not None:
+                pending["errored"] = pending["errored"] or error
+                if len(pending["events"]) < self.max_events_per_trace:
+                    pending["events"].append(event)
+                else:
+                    pending["dropped_events"] += 1
+                    self._stats["events_dropped"] += 1
+                return
+            kept = self._decided.get(trace_id)
+        # Late event: follow the decision already made for its trace
+        if kept is None or kept:
+            self.export(event)
+        else:
+            with self._lock:
+                self._stats["events_dropped"] += 1
+
+    def end(self, trace_id: str, error: bool = False) -> Optional[List[str]]:
+        """Decide on a trace; returns its keep reasons, or None if it was dropped or unknown"""
+        with self._lock:
+            pending = self._pending.pop(trace_id, None)
+        if pending is None:
+            return None
+        pending["errored"] = pending["errored"] or error
+        return self._decide(trace_id, pending)
+
+    def _decide(self, trace_id: str, pending: Dict[str, Any]) -> Optional[List[str]]:
+        duration = time.monotonic() - pending["started"]
+        reasons = []
+        if pending["errored"]:
+            reasons.append("error")
+        if duration >= self.slow_threshold_seconds:
+            reasons.append("slow")
+        if pending["head_sampled"]:
+            reasons.append("sampled")
+
+        with self._lock:
+            self._decided[trace_id] = bool(reasons)
+            while len(self._decided) > self.max_traces:
+                self._decided.popitem(last=False)
+            if not reasons:
+                self._stats["traces_dropped"] += 1
+                return None
+            self._stats["traces_kept"] += 1
+            for reason in reasons:
+                self._stats["keep_reasons"][reason] += 1
+
+        trace_event = pending["trace"]
+        metadata = trace_event["body"].setdefault("metadata", {})
+        metadata["sampling"] = {
+            "keep_reasons": reasons,
+            "sample_rate": self.sample_rate,
+            "slow_threshold_seconds": self.slow_threshold_seconds,
+            "duration_seconds": round(duration, 3),
+            "dropped_events": pending["dropped_events"]
+        }
+        self.export(trace_event)
+        for event in pending["events"]:
+            self.export(event)
+        return reasons
+
+    def end_all(self) -> None:
+        """Decide on every buffered trace (e.g. at shutdown)"""
+        with self._lock:
+            pending = list(self._pending.items())
+            self._pending.clear()
+        for trace_id, trace in pending:
+            self._decide(trace_id, trace)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["keep_reasons"] = dict(self._stats["keep_reasons"])
+            stats["pending_traces"] = len(self._pending)
+        decided = stats["traces_kept"] + stats["traces_dropped"]
+        stats["keep_ratio"] = stats["traces_kept"] / decided if decided else 0.0
+        stats["sample_rate"] = self.sample_rate
+        stats["slow_threshold_seconds"] = self.slow_threshold_seconds
+        return stats